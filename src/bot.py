@@ -4,7 +4,9 @@ Telegram Bot for Image Uniqueization.
 Provides multiple methods for making images unique while preserving quality.
 """
 
+import asyncio
 import logging
+from functools import partial
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -16,8 +18,10 @@ from telegram.ext import (
 )
 
 from src.config import BOT_TOKEN, METHOD_NAMES
-from src.handlers.photo import handle_photo, handle_document, handle_media_group
+from src.handlers.photo import handle_photo, handle_document, handle_media_group, expire_session
 from src.handlers.callbacks import handle_callback, handle_custom_count_input
+from src.utils.session_store import get_session_store
+from src.workers import get_worker_pool, shutdown_worker_pool
 
 # Configure logging
 logging.basicConfig(
@@ -100,6 +104,21 @@ async def handle_document_with_album(update: Update, context: ContextTypes.DEFAU
         await handle_document(update, context)
 
 
+async def post_init(application: Application) -> None:
+    """Start background workers before polling begins."""
+    get_worker_pool().start()
+    get_session_store().start_sweeper(partial(expire_session, application.bot))
+
+
+async def post_shutdown(application: Application) -> None:
+    """Stop background workers after the application has stopped."""
+    store = get_session_store()
+    await store.stop_sweeper()
+    store.clear()
+    # Cleared sessions cancelled their jobs; wait for workers off the event loop
+    await asyncio.to_thread(shutdown_worker_pool)
+
+
 def create_application() -> Application:
     """
     Create and configure the bot application.
@@ -110,7 +129,13 @@ def create_application() -> Application:
     if not BOT_TOKEN:
         raise ValueError("BOT_TOKEN environment variable not set")
 
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Command handlers
     application.add_handler(CommandHandler("start", start))
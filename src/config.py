@@ -16,14 +16,102 @@ MAX_COPY_COUNT = 100
 # Quality thresholds
 MIN_SSIM = 0.99
 MAX_SIZE_RATIO = 1.2
+# SSIM is computed on images reduced (1/2, 1/4, 1/8) to at least this size
+SSIM_ANALYSIS_SIZE = 512
+# Quality gate: copies that fail the thresholds are regenerated
+QUALITY_GATE_ENABLED = os.environ.get("QUALITY_GATE_ENABLED", "1") != "0"
+# Score at reduced resolution (SSIM_ANALYSIS_SIZE) instead of full size
+QUALITY_GATE_FAST = True
+# Regeneration time budget: share of the generation time, capped in seconds
+QUALITY_GATE_BUDGET_RATIO = 0.5
+QUALITY_GATE_BUDGET_MAX = 30
 
 # Timeouts (seconds)
 METHOD_SELECTION_TIMEOUT = 30
 COUNT_SELECTION_TIMEOUT = 30
 CUSTOM_COUNT_INPUT_TIMEOUT = 60
 MEDIA_GROUP_COLLECTION_TIMEOUT = 2
+# Job deadline: per copy, capped per job (copies finished by then are sent)
 PROCESSING_TIMEOUT_PER_COPY = 60
 PROCESSING_TIMEOUT_MAX = 300
+# After a deadline or cancel, workers get this long to stop between stages
+PROCESSING_CANCEL_GRACE = 10
+# Unconfirmed previews are discarded after this long
+PREVIEW_CONFIRM_TIMEOUT = 600
+# Idle sessions (abandoned dialogs) expire after this long; one sweeper checks them
+SESSION_TTL = 900
+SESSION_SWEEP_INTERVAL = 30
+# Progress message: shown once a job runs this long, edited at most this often
+# (Telegram rate-limits edits per chat)
+PROGRESS_SHOW_DELAY = 2
+PROGRESS_EDIT_INTERVAL = 3
+
+# Worker pool for CPU-bound uniqueization (processes)
+WORKER_POOL_SIZE = int(os.environ.get("WORKER_POOL_SIZE", 0)) or max(1, (os.cpu_count() or 2) - 1)
+# Replace a worker after this many jobs to release memory (0 = never)
+WORKER_MAX_TASKS_PER_CHILD = int(os.environ.get("WORKER_MAX_TASKS_PER_CHILD", 50))
+# Request admission: jobs running at once overall and per user; waiting
+# requests are admitted by weighted fair queuing (cost = method weight x images)
+SCHEDULER_MAX_JOBS = int(os.environ.get("SCHEDULER_MAX_JOBS", 0)) or max(2, WORKER_POOL_SIZE)
+SCHEDULER_MAX_JOBS_PER_USER = int(os.environ.get("SCHEDULER_MAX_JOBS_PER_USER", 1))
+METHOD_COSTS = {
+    "metadata": 1,
+    "icc_profile": 1,
+    "lsb": 2,
+    "micro": 3,
+    "method1": 3,
+    "method2": 4,
+    "method3": 5,
+    "all_combined": 8,
+    "all_combined_with_pixel": 10,
+}
+DEFAULT_METHOD_COST = 4
+# Variants per job when a request is split so results can stream out early
+VARIANT_CHUNK_SIZE = 4
+# Finished copies buffered between generation and the archive writer
+PIPELINE_QUEUE_SIZE = 8
+# Album results are uploaded as document groups of up to this many files
+# (Telegram's limit), with at most BATCH_UPLOAD_CONCURRENCY groups in flight
+MEDIA_GROUP_MAX_SIZE = 10
+BATCH_UPLOAD_CONCURRENCY = int(os.environ.get("BATCH_UPLOAD_CONCURRENCY", 2))
+
+# Decoded originals kept per process, reused across copies, methods and sessions
+SOURCE_CACHE_SIZE = 8
+SOURCE_CACHE_MAX_BYTES = int(os.environ.get("SOURCE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Downloaded Telegram files, keyed by file_unique_id (re-uploads skip the download)
+DOWNLOAD_CACHE_MAX_BYTES = int(os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+# Optional disk tier for entries evicted from memory; empty = memory only
+DOWNLOAD_CACHE_DIR = os.environ.get("DOWNLOAD_CACHE_DIR", "")
+DOWNLOAD_CACHE_DISK_MAX_BYTES = int(os.environ.get("DOWNLOAD_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Logo/text detection (OCR)
+# Path to tesseract binary; empty = auto-detect (PATH, common install locations)
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "")
+# Minimum share of strong-edge pixels before OCR is attempted
+LOGO_EDGE_DENSITY_MIN = 0.02
+# Number of per-source detection results kept per process
+LOGO_CACHE_SIZE = 64
+# OCR runs on the source reduced (1/2, 1/4, 1/8) to at least this size
+OCR_ANALYSIS_SIZE = 1024
+
+# Result archives are kept in memory up to this size, then spooled to disk
+ARCHIVE_SPOOL_MAX_BYTES = int(os.environ.get("ARCHIVE_SPOOL_MAX_BYTES", 16 * 1024 * 1024))
+
+# Preview copies awaiting confirmation: small copies stay in memory within
+# these quotas, the rest is spilled to temp files (COPY_STORE_DIR, empty = system temp)
+COPY_STORE_INLINE_MAX_BYTES = int(os.environ.get("COPY_STORE_INLINE_MAX_BYTES", 2 * 1024 * 1024))
+COPY_STORE_SESSION_MEMORY_MAX_BYTES = int(os.environ.get("COPY_STORE_SESSION_MEMORY_MAX_BYTES", 32 * 1024 * 1024))
+COPY_STORE_MEMORY_MAX_BYTES = int(os.environ.get("COPY_STORE_MEMORY_MAX_BYTES", 256 * 1024 * 1024))
+# Hard caps: total per session, spilled bytes across all sessions
+COPY_STORE_SESSION_MAX_BYTES = int(os.environ.get("COPY_STORE_SESSION_MAX_BYTES", 3 * 1024 * 1024 * 1024))
+COPY_STORE_DISK_MAX_BYTES = int(os.environ.get("COPY_STORE_DISK_MAX_BYTES", 16 * 1024 * 1024 * 1024))
+COPY_STORE_DIR = os.environ.get("COPY_STORE_DIR", "")
+
+# Session memory: larger sessions are rejected, over the global limit idle
+# sessions are evicted least recently used first
+SESSION_USER_MAX_BYTES = int(os.environ.get("SESSION_USER_MAX_BYTES", 256 * 1024 * 1024))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", 1024 * 1024 * 1024))
 
 # Supported formats
 SUPPORTED_MIME_TYPES = ["image/jpeg", "image/png", "image/jpg"]
@@ -17,6 +17,7 @@ from src.config import (
     MAX_COPY_COUNT,
 )
 from src.uniqueizers import UniqueizationMethod
+from src.utils.session_store import get_session_store
 
 
 def get_method_keyboard() -> InlineKeyboardMarkup:
@@ -89,24 +90,29 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     data = query.data
     user_id = update.effective_user.id
 
-    # Initialize user data if needed
-    if "sessions" not in context.bot_data:
-        context.bot_data["sessions"] = {}
+    store = get_session_store()
+    session = store.get(user_id)
 
-    session = context.bot_data["sessions"].get(user_id, {})
+    if session is None:
+        # Expired, evicted or already finished
+        try:
+            await query.edit_message_reply_markup(reply_markup=None)
+        except Exception:
+            pass
+        await query.message.reply_text("Сессия истекла. Отправьте изображение заново.")
+        return
 
     if data.startswith("method:"):
         # Method selection
         method = data.split(":")[1]
-        session["method"] = method
+        session.method = method
 
         # Check if this is a batch processing session
-        if session.get("state") == "batch_method_select":
-            session["state"] = "batch_processing"
-            context.bot_data["sessions"][user_id] = session
+        if session.state == "batch_method_select":
+            session.state = "batch_processing"
 
             method_name = METHOD_NAMES.get(method, method)
-            images = session.get("batch_images", [])
+            images = session.batch_images or []
 
             await query.edit_message_text(
                 f"Обрабатываю {len(images)} изображений методом {method_name}..."
@@ -123,8 +129,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
         else:
             # Single image - show count selection
-            session["state"] = "count_select"
-            context.bot_data["sessions"][user_id] = session
+            session.state = "count_select"
 
             method_name = METHOD_NAMES.get(method, method)
             await query.edit_message_text(
@@ -143,16 +148,14 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         count_str = data.split(":")[1]
 
         if count_str == "custom":
-            session["state"] = "awaiting_custom_count"
-            context.bot_data["sessions"][user_id] = session
+            session.state = "awaiting_custom_count"
             await query.edit_message_text(
                 "Введите количество копий (1-100):"
             )
         else:
             count = int(count_str)
-            session["count"] = count
-            session["state"] = "processing"
-            context.bot_data["sessions"][user_id] = session
+            session.count = count
+            session.state = "processing"
 
             # Trigger processing
             from src.handlers.photo import process_image_request
@@ -162,15 +165,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         action = data.split(":")[1]
 
         if action == "confirm":
-            session["state"] = "processing"
-            context.bot_data["sessions"][user_id] = session
+            session.state = "processing"
 
             from src.handlers.photo import send_full_result
             await send_full_result(update, context, session)
         else:
-            # Cancel - clear session
-            if user_id in context.bot_data["sessions"]:
-                del context.bot_data["sessions"][user_id]
+            # Cancel - clear session and release the stored copies
+            store.discard(user_id, session)
             await query.edit_message_text("Обработка отменена.")
 
 
@@ -189,12 +190,9 @@ async def handle_custom_count_input(
     """
     user_id = update.effective_user.id
 
-    if "sessions" not in context.bot_data:
-        return False
-
-    session = context.bot_data["sessions"].get(user_id, {})
+    session = get_session_store().get(user_id)
 
-    if session.get("state") != "awaiting_custom_count":
+    if session is None or session.state != "awaiting_custom_count":
         return False
 
     text = update.message.text.strip()
@@ -207,9 +205,8 @@ async def handle_custom_count_input(
             )
             return True
 
-        session["count"] = count
-        session["state"] = "processing"
-        context.bot_data["sessions"][user_id] = session
+        session.count = count
+        session.state = "processing"
 
         # Trigger processing
         from src.handlers.photo import process_image_request
@@ -232,15 +229,11 @@ async def _count_selection_timeout(
     """Handle timeout for count selection."""
     await asyncio.sleep(COUNT_SELECTION_TIMEOUT)
 
-    if "sessions" not in context.bot_data:
-        return
-
-    session = context.bot_data["sessions"].get(user_id, {})
+    session = get_session_store().peek(user_id)
 
-    if session.get("state") == "count_select":
-        session["count"] = DEFAULT_COPY_COUNT
-        session["state"] = "processing"
-        context.bot_data["sessions"][user_id] = session
+    if session is not None and session.state == "count_select":
+        session.count = DEFAULT_COPY_COUNT
+        session.state = "processing"
 
         try:
             await context.bot.edit_message_text(
@@ -6,9 +6,11 @@ import asyncio
 import io
 import os
 import hashlib
-from typing import Optional, Dict, Any, List, Tuple
+from contextlib import aclosing
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 
-from telegram import Update, Message
+from telegram import Bot, InputFile, InputMediaDocument, Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 from src.config import (
@@ -21,12 +23,29 @@ from src.config import (
     MAX_COPY_COUNT,
     MAX_BATCH_SIZE,
     MEDIA_GROUP_COLLECTION_TIMEOUT,
+    QUALITY_GATE_ENABLED,
+    QUALITY_GATE_FAST,
+    QUALITY_GATE_BUDGET_RATIO,
+    QUALITY_GATE_BUDGET_MAX,
+    PIPELINE_QUEUE_SIZE,
+    PREVIEW_CONFIRM_TIMEOUT,
+    PROCESSING_TIMEOUT_PER_COPY,
+    PROCESSING_TIMEOUT_MAX,
+    PROCESSING_CANCEL_GRACE,
+    MEDIA_GROUP_MAX_SIZE,
+    BATCH_UPLOAD_CONCURRENCY,
 )
 from src.uniqueizers import UniqueizationMethod, get_uniqueizer
-from src.utils.archive import create_zip_archive
+from src.utils.archive import ArchiveWriter, create_zip_archive
+from src.utils.cancellation import CancelToken
+from src.utils.copy_store import CopySet, QuotaExceededError, get_copy_store
+from src.utils.progress import ProgressReporter, get_progress_hub
+from src.utils.session_store import Session, get_session_store
+from src.utils.download_cache import get_download_cache
 from src.utils.image import get_image_format
 from src.utils.filename import generate_random_filename, normalize_to_photo
 from src.handlers.callbacks import get_method_keyboard
+from src.workers import get_scheduler, get_worker_pool
 
 
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -40,14 +59,14 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     photo = update.message.photo[-1]  # Get highest resolution
 
-    # Download photo
-    file = await context.bot.get_file(photo.file_id)
-    file_bytes = await file.download_as_bytearray()
-    image_bytes = bytes(file_bytes)
+    # Download photo (re-sent photos come from the cache)
+    image_bytes = await _download_media(context, photo)
 
     # Initialize session with random filename
     random_filename = generate_random_filename("photo.jpg", prefix="photo")
-    await _init_session(context, user_id, image_bytes, random_filename, update.message)
+    session = await _init_session(update, user_id, image_bytes, random_filename)
+    if session is None:
+        return
 
     # Show method selection
     msg = await update.message.reply_text(
@@ -56,9 +75,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     )
 
     # Store message for editing
-    session = context.bot_data["sessions"][user_id]
-    session["selection_message_id"] = msg.message_id
-    session["chat_id"] = update.effective_chat.id
+    session.selection_message_id = msg.message_id
 
     # Set timeout for method selection
     asyncio.create_task(
@@ -93,10 +110,8 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     user_id = update.effective_user.id
 
-    # Download document
-    file = await context.bot.get_file(document.file_id)
-    file_bytes = await file.download_as_bytearray()
-    image_bytes = bytes(file_bytes)
+    # Download document (re-sent files come from the cache)
+    image_bytes = await _download_media(context, document)
 
     # Validate image
     try:
@@ -111,7 +126,9 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     original_filename = document.file_name or "image.jpg"
     normalized_filename = normalize_to_photo(original_filename)
     random_filename = generate_random_filename(normalized_filename, prefix="photo")
-    await _init_session(context, user_id, image_bytes, random_filename, update.message)
+    session = await _init_session(update, user_id, image_bytes, random_filename)
+    if session is None:
+        return
 
     # Show method selection
     msg = await update.message.reply_text(
@@ -120,9 +137,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     )
 
     # Store message for editing
-    session = context.bot_data["sessions"][user_id]
-    session["selection_message_id"] = msg.message_id
-    session["chat_id"] = update.effective_chat.id
+    session.selection_message_id = msg.message_id
 
     # Set timeout
     asyncio.create_task(
@@ -130,25 +145,66 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     )
 
 
-async def _init_session(
-    context: ContextTypes.DEFAULT_TYPE,
-    user_id: int,
-    image_bytes: bytes,
-    filename: str,
-    message: Message,
-) -> None:
-    """Initialize user processing session."""
-    if "sessions" not in context.bot_data:
-        context.bot_data["sessions"] = {}
+async def _download_media(context: ContextTypes.DEFAULT_TYPE, media) -> bytes:
+    """
+    Download a photo or document, reusing bytes cached by file_unique_id.
 
-    context.bot_data["sessions"][user_id] = {
-        "image_bytes": image_bytes,
-        "original_filename": filename,
-        "method": None,
-        "count": None,
-        "state": "method_select",
-        "message": message,
-    }
+    Args:
+        context: Bot context
+        media: PhotoSize or Document
+
+    Returns:
+        File bytes
+    """
+    cache = get_download_cache()
+    image_bytes = cache.get(media.file_unique_id)
+    if image_bytes is None:
+        file = await context.bot.get_file(media.file_id)
+        image_bytes = bytes(await file.download_as_bytearray())
+        cache.put(media.file_unique_id, image_bytes)
+    return image_bytes
+
+
+async def _init_session(update: Update, user_id: int, image_bytes: bytes, filename: str) -> Optional[Session]:
+    """
+    Initialize user processing session (replacing and releasing any previous one).
+
+    Returns:
+        The session, or None if it exceeds the session quota (the user is told)
+    """
+    try:
+        return get_session_store().put(
+            Session(user_id, update.effective_chat.id, image_bytes=image_bytes, original_filename=filename)
+        )
+    except QuotaExceededError as e:
+        import logging
+        logging.getLogger(__name__).warning("Upload rejected: {}".format(e))
+        await update.message.reply_text(
+            "Слишком большой объём изображения. Отправьте файл меньшего размера."
+        )
+        return None
+
+
+async def expire_session(bot: Bot, session: Session) -> None:
+    """
+    Tell the user that an idle session expired (session store sweeper hook).
+
+    Args:
+        bot: Bot instance
+        session: Expired session (released after this returns)
+    """
+    if session.state == "awaiting_preview_confirm" and session.preview_message_id:
+        await bot.edit_message_caption(
+            chat_id=session.chat_id,
+            message_id=session.preview_message_id,
+            caption="Время подтверждения истекло. Отправьте изображение заново.",
+        )
+    elif session.selection_message_id:
+        await bot.edit_message_text(
+            chat_id=session.chat_id,
+            message_id=session.selection_message_id,
+            text="Время истекло. Отправьте изображение заново.",
+        )
 
 
 async def _method_selection_timeout(
@@ -160,16 +216,12 @@ async def _method_selection_timeout(
     """Handle timeout for method selection."""
     await asyncio.sleep(METHOD_SELECTION_TIMEOUT)
 
-    if "sessions" not in context.bot_data:
-        return
-
-    session = context.bot_data["sessions"].get(user_id, {})
+    session = get_session_store().peek(user_id)
 
-    if session.get("state") == "method_select":
-        session["method"] = DEFAULT_METHOD
-        session["count"] = DEFAULT_COPY_COUNT
-        session["state"] = "processing"
-        context.bot_data["sessions"][user_id] = session
+    if session is not None and session.state == "method_select":
+        session.method = DEFAULT_METHOD
+        session.count = DEFAULT_COPY_COUNT
+        session.state = "processing"
 
         try:
             method_name = METHOD_NAMES.get(DEFAULT_METHOD, DEFAULT_METHOD)
@@ -185,7 +237,7 @@ async def _method_selection_timeout(
 
 
 async def process_image_request(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, session: Dict[str, Any]
+    update: Update, context: ContextTypes.DEFAULT_TYPE, session: Session
 ) -> None:
     """
     Process image with selected method and count.
@@ -200,8 +252,8 @@ async def process_image_request(
 
     query = update.callback_query
     if query:
-        method_name = METHOD_NAMES.get(session["method"], session["method"])
-        count = session["count"]
+        method_name = METHOD_NAMES.get(session.method, session.method)
+        count = session.count
 
         if count == 1:
             await query.edit_message_text(
@@ -226,51 +278,114 @@ async def process_image_from_session(
         user_id: User ID
         chat_id: Chat ID
     """
-    session = context.bot_data["sessions"].get(user_id, {})
+    session = get_session_store().get(user_id)
 
-    if not session:
+    if session is None or not session.image_bytes:
         return
 
-    image_bytes = session.get("image_bytes")
-    method_str = session.get("method", DEFAULT_METHOD)
-    count = session.get("count", DEFAULT_COPY_COUNT)
-    original_filename = session.get("original_filename", "image.jpg")
+    # Queue for a fair share of the workers; the update loop moves on
+    # (the session cancels the job if it is replaced or discarded)
+    scheduler = get_scheduler()
+    session.job = scheduler.submit(
+        user_id,
+        scheduler.cost(session.method or DEFAULT_METHOD, session.count or DEFAULT_COPY_COUNT),
+        lambda: _process_session(context, user_id, chat_id, session),
+        on_position=_queue_position_reporter(context, chat_id),
+    )
+
+
+def _queue_position_reporter(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    """Scheduler callback that keeps one queue status message up to date."""
+    status_msg = None
+
+    async def report(position: int) -> None:
+        nonlocal status_msg
+        if position == 0:
+            # Started: the status message is no longer needed
+            if status_msg is not None:
+                await status_msg.delete()
+                status_msg = None
+            return
+        text = f"Запрос в очереди, позиция: {position}. Обработка начнётся автоматически."
+        if status_msg is None:
+            status_msg = await context.bot.send_message(chat_id=chat_id, text=text)
+        else:
+            await status_msg.edit_text(text)
+
+    return report
+
+
+async def _process_session(
+    context: ContextTypes.DEFAULT_TYPE, user_id: int, chat_id: int, session: Session
+) -> None:
+    """Generate and send copies for a session (runs as a scheduler job)."""
+    store = get_session_store()
+
+    image_bytes = session.image_bytes
+    method_str = session.method or DEFAULT_METHOD
+    count = session.count or DEFAULT_COPY_COUNT
+    original_filename = session.original_filename
 
     if not image_bytes:
+        # Replaced by a new upload while queued
         return
 
     # Check if preview mode is enabled
     user_settings = context.bot_data.get("user_settings", {}).get(user_id, {})
     preview_mode = user_settings.get("preview_mode", False)
 
+    # Deadline: per copy, capped per job; copies finished by then are sent
+    loop = asyncio.get_running_loop()
+    cancel = CancelToken(deadline=loop.time() + min(PROCESSING_TIMEOUT_PER_COPY * count, PROCESSING_TIMEOUT_MAX))
+    session.cancel_token = cancel
+    # Live progress from the workers' copy/stage events (slow jobs only)
+    progress = ProgressReporter(context.bot, chat_id, count, title="Обработка копий")
+
     try:
         # Get uniqueizer
         method = UniqueizationMethod(method_str)
         uniqueizer = get_uniqueizer(method)
 
-        # Generate copies with progress updates for heavy methods
-        if count > 5 and method_str in ["all_combined", "all_combined_with_pixel"]:
-            # Send progress message for heavy operations
-            progress_msg = await context.bot.send_message(
+        with get_progress_hub().subscription(cancel.path, progress.on_event):
+            if preview_mode:
+                # Copies wait for confirmation in the copy store, not in RAM
+                copies = await generate_copies_to_store(
+                    image_bytes, count, uniqueizer, original_filename, method_str, cancel
+                )
+                produced = len(copies)
+            elif count > 1:
+                # Copies stream into the archive while later ones are generated
+                produced = await generate_and_send_archive(
+                    context, chat_id, image_bytes, count, uniqueizer, original_filename, method_str, cancel
+                )
+                copies = None
+            else:
+                copies = await generate_copies(image_bytes, count, uniqueizer, original_filename, method_str, cancel)
+                produced = len(copies)
+        await progress.close()
+
+        if cancel.reason == "cancelled":
+            # The user moved on; the session was already released
+            if isinstance(copies, CopySet):
+                copies.close()
+            return
+
+        if cancel.reason == "deadline" and 0 < produced < count:
+            await context.bot.send_message(
                 chat_id=chat_id,
-                text=f"Обрабатываю изображение... Это может занять некоторое время."
+                text=f"Время обработки истекло: готово {produced} из {count} копий.",
             )
-            copies = await generate_copies(image_bytes, count, uniqueizer, original_filename, method_str)
-            try:
-                await progress_msg.delete()
-            except:
-                pass
-        else:
-            copies = await generate_copies(image_bytes, count, uniqueizer, original_filename, method_str)
-        
+
         # Check: ensure we got the correct number of copies
-        if len(copies) != count:
+        if copies is not None and len(copies) != count:
             import logging
             logger = logging.getLogger(__name__)
             logger.warning(f"Generated {len(copies)} copies but {count} were requested!")
             logger.warning(f"Method: {method_str}, User: {user_id}")
             # Don't raise error, just use what we have
             if len(copies) == 0:
+                if isinstance(copies, CopySet):
+                    copies.close()
                 raise ValueError(f"Failed to generate any copies!")
 
         if preview_mode and copies:
@@ -278,38 +393,58 @@ async def process_image_from_session(
             from src.utils.image import create_preview
             from src.handlers.callbacks import get_preview_confirm_keyboard
 
+            session.processed_copies = copies
+            session.state = "awaiting_preview_confirm"
+            session.ttl = PREVIEW_CONFIRM_TIMEOUT
+            # Re-check the session's bytes against the store limits
+            store.put(session)
             preview_bytes = create_preview(copies[0][0])
-            session["processed_copies"] = copies
-            session["state"] = "awaiting_preview_confirm"
-            context.bot_data["sessions"][user_id] = session
 
-            count_text = "копия" if count == 1 else "копий"
+            count_text = "копия" if len(copies) == 1 else "копий"
             method_name = METHOD_NAMES.get(method_str, method_str)
-            caption = "Предпросмотр результата ({}) {}\nМетод: {}".format(count, count_text, method_name)
-            await context.bot.send_photo(
+            caption = "Предпросмотр результата ({}) {}\nМетод: {}".format(len(copies), count_text, method_name)
+            preview_msg = await context.bot.send_photo(
                 chat_id=chat_id,
                 photo=io.BytesIO(preview_bytes),
                 caption=caption,
                 reply_markup=get_preview_confirm_keyboard(),
             )
+            # Unanswered previews are expired by the session store sweeper
+            session.preview_message_id = preview_msg.message_id
         else:
-            # Send result directly
-            await send_result(context, chat_id, copies, method_str, original_filename)
+            # Send result directly (archives were already sent by the pipeline)
+            if copies is not None:
+                await send_result(context, chat_id, copies, method_str, original_filename)
 
             # Clear session
-            if user_id in context.bot_data["sessions"]:
-                del context.bot_data["sessions"][user_id]
+            store.discard(user_id, session)
 
-    except Exception as e:
+    except QuotaExceededError as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error("Error processing image: {}".format(e), exc_info=True)
+        logger.warning("Preview copies rejected: {}".format(e))
         await context.bot.send_message(
             chat_id=chat_id,
-            text="Произошла ошибка при обработке. Попробуйте ещё раз.",
+            text="Слишком большой объём результата для предпросмотра. "
+                 "Уменьшите количество копий или отключите предпросмотр.",
         )
-        if user_id in context.bot_data["sessions"]:
-            del context.bot_data["sessions"][user_id]
+        store.discard(user_id, session)
+
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error("Error processing image: {}".format(e), exc_info=True)
+        if cancel.reason == "deadline":
+            text = "Не удалось обработать изображение за отведённое время. Попробуйте меньше копий или другой метод."
+        else:
+            text = "Произошла ошибка при обработке. Попробуйте ещё раз."
+        await context.bot.send_message(chat_id=chat_id, text=text)
+        store.discard(user_id, session)
+
+    finally:
+        await progress.close()
+        session.cancel_token = None
+        cancel.close()
 
 
 async def generate_copies(
@@ -318,6 +453,7 @@ async def generate_copies(
     uniqueizer,
     original_filename: str,
     method_str: str = None,
+    cancel: Optional[CancelToken] = None,
 ) -> List[Tuple[bytes, str]]:
     """
     Generate multiple unique copies of an image.
@@ -327,124 +463,365 @@ async def generate_copies(
         count: Number of copies to generate
         uniqueizer: Uniqueizer instance
         original_filename: Original filename
+        method_str: Method key, used to run the jobs in the worker pool
+        cancel: Cancel token with the job deadline (see iter_copies)
 
     Returns:
         List of (image_bytes, filename) tuples
     """
     copies = []
-    name, ext = os.path.splitext(original_filename)
-    if not ext:
-        ext = ".jpg"
+    async for chunk in iter_copies(image_bytes, count, uniqueizer, original_filename, method_str, cancel):
+        copies.extend(chunk)
+    return copies
+
+
+async def generate_copies_to_store(
+    image_bytes: bytes,
+    count: int,
+    uniqueizer,
+    original_filename: str,
+    method_str: str = None,
+    cancel: Optional[CancelToken] = None,
+) -> CopySet:
+    """
+    Generate copies into a copy set (large copies are spilled to disk).
+
+    Args:
+        image_bytes: Original image bytes
+        count: Number of copies to generate
+        uniqueizer: Uniqueizer instance
+        original_filename: Original filename
+        method_str: Method key, used to run the jobs in the worker pool
+        cancel: Cancel token with the job deadline (see iter_copies)
+
+    Returns:
+        CopySet of (image_bytes, filename); the caller closes it
+
+    Raises:
+        QuotaExceededError: If the copies exceed the copy store quotas
+    """
+    copies = get_copy_store().create()
+    try:
+        async for chunk in iter_copies(image_bytes, count, uniqueizer, original_filename, method_str, cancel):
+            for image, filename in chunk:
+                copies.add(image, filename)
+    except BaseException:
+        copies.close()
+        raise
+    return copies
+
+
+async def iter_copies(
+    image_bytes: bytes,
+    count: int,
+    uniqueizer,
+    original_filename: str,
+    method_str: str = None,
+    cancel: Optional[CancelToken] = None,
+) -> AsyncIterator[List[Tuple[bytes, str]]]:
+    """
+    Generate unique copies of an image, yielding them in chunks as they finish.
+
+    Every yielded copy is final: its hash is unique, it has been through
+    the quality gate and it has a unique random filename. Consumers can
+    archive or send it while later chunks are still being generated.
+
+    When the cancel token's deadline passes, the token is cancelled with
+    reason "deadline": workers stop between stages and return what they
+    finished, and the generator ends after yielding those copies (fewer
+    than `count`). Workers that don't stop within PROCESSING_CANCEL_GRACE
+    are abandoned.
+
+    Args:
+        image_bytes: Original image bytes
+        count: Number of copies to generate
+        uniqueizer: Uniqueizer instance
+        original_filename: Original filename
+        method_str: Method key, used to run the jobs in the worker pool
+        cancel: Cancel token with the job deadline (None = no deadline)
+
+    Yields:
+        Lists of (image_bytes, filename) tuples
+    """
+    import logging
+    logger = logging.getLogger(__name__)
 
     # Track hashes to ensure uniqueness
     seen_hashes = set()
     original_hash = hashlib.md5(image_bytes).hexdigest()
     seen_hashes.add(original_hash)
+    seen_filenames = set()
+    produced = 0
+
+    # CPU-bound work runs in worker processes, not on the event loop
+    pool = get_worker_pool()
+    loop = asyncio.get_running_loop()
+
+    cancel_path = cancel.path if cancel is not None else None
+    deadline_handle = None
+    if cancel is not None and cancel.deadline is not None:
+        deadline_handle = loop.call_at(cancel.deadline, cancel.cancel, "deadline")
+
+    def stopped() -> bool:
+        return cancel is not None and cancel.cancelled
+
+    def wait_timeout() -> Optional[float]:
+        """Longest wait for workers: until the deadline plus the grace period."""
+        remaining = cancel.remaining(loop.time()) if cancel is not None else None
+        return None if remaining is None else remaining + PROCESSING_CANCEL_GRACE
+
+    async def finalize(chunk: List[bytes], generation_seconds: float) -> List[Tuple[bytes, str]]:
+        """Deduplicate, quality-gate and name a chunk of copies."""
+        unique = []
+        for processed in chunk:
+            processed_hash = hashlib.md5(processed).hexdigest()
+
+            # If hash collision, re-process (rare but possible)
+            attempts = 0
+            while processed_hash in seen_hashes and attempts < 5 and not stopped():
+                retry = await pool.process(method_str, image_bytes, cancel_path)
+                if retry is None:
+                    break
+                processed = retry
+                processed_hash = hashlib.md5(processed).hexdigest()
+                attempts += 1
+
+            seen_hashes.add(processed_hash)
+            unique.append(processed)
+
+        if not stopped():
+            unique = await _enforce_quality(
+                pool, method_str, image_bytes, unique, seen_hashes, generation_seconds, cancel
+            )
+
+        named = []
+        for processed in unique:
+            # Generate random filename (always random, not numbered)
+            # Ensure unique filename to avoid ZIP renaming duplicates
+            attempts = 0
+            while attempts < 10:
+                filename = generate_random_filename(original_filename, prefix="photo")
+                if filename not in seen_filenames:
+                    break
+                attempts += 1
+                logger.warning(f"Filename collision: {filename}, generating new one...")
+
+            logger.info(f"Generated filename for copy {len(seen_filenames) + 1}/{count}: {filename}")
+            seen_filenames.add(filename)
+            named.append((processed, filename))
+        return named
 
     # Check if uniqueizer supports variants (method2, method3)
     has_process_variants = hasattr(uniqueizer, 'process_variants')
-    
-    if has_process_variants:
-        # For methods with process_variants support, generate variants directly
-        try:
-            variants = uniqueizer.process_variants(image_bytes, count=count)
-            # Debug: check how many variants we got
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.info(f"process_variants returned {len(variants)} variants (requested {count})")
-            
-            if len(variants) == 0:
-                # Fallback to standard processing
-                pass
-            else:
-                for i, variant_bytes in enumerate(variants):
-                    processed_hash = hashlib.md5(variant_bytes).hexdigest()
-                    
-                    # Ensure uniqueness
-                    attempts = 0
-                    while processed_hash in seen_hashes and attempts < 3:
-                        # Re-process this variant
-                        variant_bytes = uniqueizer.process(image_bytes)
-                        processed_hash = hashlib.md5(variant_bytes).hexdigest()
-                        attempts += 1
-                    
-                    seen_hashes.add(processed_hash)
-                    
-                    # Generate random filename (always random, not numbered)
-                    # Ensure unique filename to avoid ZIP renaming duplicates
-                    seen_filenames = {f[1] for f in copies}  # Get all existing filenames
-                    filename_attempts = 0
-                    while filename_attempts < 10:
-                        filename = generate_random_filename(original_filename, prefix="photo")
-                        if filename not in seen_filenames:
+
+    try:
+        if has_process_variants:
+            # For methods with process_variants support, generate variants directly
+            try:
+                async with aclosing(pool.iter_variants(method_str, image_bytes, count, cancel_path)) as variant_chunks:
+                    while True:
+                        try:
+                            variants, seconds = await asyncio.wait_for(anext(variant_chunks), wait_timeout())
+                        except StopAsyncIteration:
                             break
-                        filename_attempts += 1
-                        logger.warning(f"Filename collision: {filename}, generating new one...")
-                    
-                    logger.info(f"Generated filename for variant {i+1}: {filename}")
-                    copies.append((variant_bytes, filename))
-                    
-                    # Check if we got enough variants
-                    if len(copies) >= count:
-                        break
-            
-            # If we got all needed copies, return early
-            if len(copies) >= count:
-                return copies[:count]
-            
-            # If we got some but not enough, continue with standard processing for remaining
-            if len(copies) < count:
-                remaining = count - len(copies)
-                logger.warning(f"Only got {len(copies)} variants, generating {remaining} more with standard processing")
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"process_variants failed: {e}, falling back to standard processing")
-            # Fallback to standard processing
-            pass
+                        logger.info(f"process_variants returned {len(variants)} variants (requested {count})")
+                        chunk = await finalize(variants[:count - produced], seconds)
+                        produced += len(chunk)
+                        yield chunk
+
+                        # Check if we got enough variants
+                        if produced >= count:
+                            return
+
+                if stopped():
+                    logger.warning(f"Processing stopped ({cancel.reason}) after {produced}/{count} copies")
+                    return
+
+                # If we got some but not enough, continue with standard processing for remaining
+                logger.warning(f"Only got {produced} variants, generating {count - produced} more with standard processing")
+            except asyncio.TimeoutError:
+                logger.warning(f"Workers did not stop after the deadline, returning {produced}/{count} copies")
+                return
+            except Exception as e:
+                logger.warning(f"process_variants failed: {e}, falling back to standard processing")
 
-    # Standard processing for other methods (or remaining copies)
-    # Calculate how many more copies we need
-    remaining_copies = count - len(copies)
-    if remaining_copies <= 0:
-        return copies[:count]
-    
-    for i in range(remaining_copies):
-        # Process with uniqueizer
-        processed = uniqueizer.process(image_bytes)
-
-        # Verify unique hash
-        processed_hash = hashlib.md5(processed).hexdigest()
-
-        # If hash collision, re-process (rare but possible)
-        attempts = 0
-        while processed_hash in seen_hashes and attempts < 5:
-            processed = uniqueizer.process(image_bytes)
-            processed_hash = hashlib.md5(processed).hexdigest()
-            attempts += 1
+        # Standard processing for other methods (or remaining copies),
+        # one copy per worker per round
+        while produced < count and not stopped():
+            started = loop.time()
+            try:
+                batch = await asyncio.wait_for(
+                    asyncio.gather(*[
+                        pool.process(method_str, image_bytes, cancel_path)
+                        for _ in range(min(count - produced, pool.max_workers))
+                    ]),
+                    wait_timeout(),
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Workers did not stop after the deadline, returning {produced}/{count} copies")
+                return
+            chunk = await finalize([copy for copy in batch if copy is not None], loop.time() - started)
+            produced += len(chunk)
+            yield chunk
+    finally:
+        if deadline_handle is not None:
+            deadline_handle.cancel()
 
-        seen_hashes.add(processed_hash)
 
-        # Generate random filename (always random, not numbered)
-        # Ensure unique filename to avoid ZIP renaming duplicates
-        import logging
-        logger = logging.getLogger(__name__)
-        seen_filenames = {f[1] for f in copies}  # Get all existing filenames
-        attempts = 0
-        while attempts < 10:
-            filename = generate_random_filename(original_filename, prefix="photo")
-            if filename not in seen_filenames:
+async def _enforce_quality(
+    pool,
+    method_str: str,
+    image_bytes: bytes,
+    copies: List[bytes],
+    seen_hashes: set,
+    generation_seconds: float,
+    cancel: Optional[CancelToken] = None,
+) -> List[bytes]:
+    """
+    Regenerate copies that fail the quality gate, within a time budget.
+
+    All copies are scored in one batch. Failing copies are regenerated
+    and re-scored while the budget (a share of the generation time) lasts;
+    a regenerated copy replaces the old one if it scores better. Copies
+    that still fail are kept, so the requested count is always returned.
+    Regeneration stops as soon as the cancel token is cancelled.
+
+    Args:
+        pool: Worker pool
+        method_str: Method key
+        image_bytes: Original image bytes
+        copies: Copy bytes
+        seen_hashes: MD5 hashes already used (updated in place)
+        generation_seconds: Time spent generating the copies
+        cancel: Cancel token of the request (None = not cancellable)
+
+    Returns:
+        Copy bytes, in order
+    """
+    if not QUALITY_GATE_ENABLED or not copies:
+        return copies
+
+    import logging
+    logger = logging.getLogger(__name__)
+
+    cancel_path = cancel.path if cancel is not None else None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(QUALITY_GATE_BUDGET_MAX, QUALITY_GATE_BUDGET_RATIO * generation_seconds)
+    copies_per_second = len(copies) / max(generation_seconds, 1e-3)
+
+    try:
+        scores = await pool.score_copies(method_str, image_bytes, copies, QUALITY_GATE_FAST)
+        failed = [i for i, score in enumerate(scores) if not score.passed]
+        while failed and not (cancel is not None and cancel.cancelled):
+            # Only regenerate as many copies as the remaining budget allows
+            affordable = int((deadline - loop.time()) * copies_per_second)
+            if affordable < 1:
+                break
+            batch = failed[:affordable]
+
+            regenerated = await asyncio.gather(*[
+                pool.process(method_str, image_bytes, cancel_path) for _ in batch
+            ])
+            # Cancelled jobs return None
+            retried = [(i, processed) for i, processed in zip(batch, regenerated) if processed is not None]
+            if not retried:
                 break
-            attempts += 1
-            logger.warning(f"Filename collision: {filename}, generating new one...")
-        
-        logger.info(f"Generated filename for copy {len(copies) + 1}/{count}: {filename}")
-        seen_filenames.add(filename)
-        copies.append((processed, filename))
+            new_scores = await pool.score_copies(
+                method_str, image_bytes, [processed for _, processed in retried], QUALITY_GATE_FAST
+            )
+
+            for (i, processed), score in zip(retried, new_scores):
+                processed_hash = hashlib.md5(processed).hexdigest()
+                if processed_hash not in seen_hashes and score.rank() > scores[i].rank():
+                    seen_hashes.add(processed_hash)
+                    copies[i] = processed
+                    scores[i] = score
+            failed = [i for i in failed if not scores[i].passed]
+    except Exception as e:
+        logger.warning(f"Quality gate stopped: {e}")
+        return copies
 
+    if failed:
+        logger.warning(
+            f"{len(failed)} of {len(copies)} copies still fail the quality gate "
+            f"({method_str}): {scores[failed[0]].reason}"
+        )
     return copies
 
 
+async def generate_and_send_archive(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    image_bytes: bytes,
+    count: int,
+    uniqueizer,
+    original_filename: str,
+    method_str: str,
+    cancel: Optional[CancelToken] = None,
+) -> int:
+    """
+    Generate copies straight into a ZIP archive and send it.
+
+    Finished copies flow through a bounded queue into the archive writer
+    while later copies are still being generated; the upload starts as
+    soon as the last copy is written and the archive is sealed.
+
+    Args:
+        context: Bot context
+        chat_id: Chat ID
+        image_bytes: Original image bytes
+        count: Number of copies to generate
+        uniqueizer: Uniqueizer instance
+        original_filename: Original filename
+        method_str: Method key
+        cancel: Cancel token with the job deadline (see iter_copies)
+
+    Returns:
+        Number of copies sent (fewer than count after a deadline)
+
+    Raises:
+        ValueError: If no copies could be generated
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    writer = ArchiveWriter()
+
+    async def produce() -> None:
+        try:
+            async for chunk in iter_copies(image_bytes, count, uniqueizer, original_filename, method_str, cancel):
+                for copy in chunk:
+                    await queue.put(copy)
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            copy = await queue.get()
+            if copy is None:
+                break
+            writer.add(*copy)
+        # Surface generation errors
+        await producer
+    except BaseException:
+        producer.cancel()
+        writer.discard()
+        raise
+
+    if cancel is not None and cancel.reason == "cancelled":
+        # The user moved on: nothing to send
+        writer.discard()
+        return 0
+    if writer.count == 0:
+        writer.discard()
+        raise ValueError("Failed to generate any copies!")
+    if writer.count != count:
+        import logging
+        logging.getLogger(__name__).warning(f"Generated {writer.count} copies but {count} were requested!")
+
+    await _send_archive(context, chat_id, writer.close(), writer.count, method_str, original_filename)
+    return writer.count
+
+
 async def send_result(
     context: ContextTypes.DEFAULT_TYPE,
     chat_id: int,
@@ -458,7 +835,7 @@ async def send_result(
     Args:
         context: Bot context
         chat_id: Chat ID
-        copies: List of (image_bytes, filename) tuples
+        copies: List (or CopySet) of (image_bytes, filename) tuples
         method: Method used
         original_filename: Original filename
     """
@@ -474,20 +851,51 @@ async def send_result(
             caption=f"Уникализированное изображение\nМетод: {method_name}",
         )
     else:
-        # Send as ZIP archive
-        archive = create_zip_archive(copies)
-        name, _ = os.path.splitext(original_filename)
-        archive_name = f"{name}_unique_{len(copies)}.zip"
+        # Send as ZIP archive; spilled copies are streamed from disk
+        images = copies.iter_files() if isinstance(copies, CopySet) else copies
+        await _send_archive(context, chat_id, create_zip_archive(images), len(copies), method, original_filename)
+
+
+async def _send_archive(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    archive,
+    count: int,
+    method: str,
+    original_filename: str,
+) -> None:
+    """
+    Upload a sealed ZIP archive (streamed from its spooled temp file) and close it.
+
+    Args:
+        context: Bot context
+        chat_id: Chat ID
+        archive: Archive file object positioned at the start
+        count: Number of copies in the archive
+        method: Method used
+        original_filename: Original filename
+    """
+    method_name = METHOD_NAMES.get(method, method)
+    name, _ = os.path.splitext(original_filename)
+    archive_name = f"{name}_unique_{count}.zip"
+    try:
         await context.bot.send_document(
             chat_id=chat_id,
-            document=archive,
+            document=_stream_file(archive, archive_name),
             filename=archive_name,
-            caption=f"Архив с {len(copies)} уникальными копиями\nМетод: {method_name}",
+            caption=f"Архив с {count} уникальными копиями\nМетод: {method_name}",
         )
+    finally:
+        archive.close()
+
+
+def _stream_file(file_obj, filename: str):
+    """Wrap a file object for upload without reading it into memory first."""
+    return InputFile(file_obj, filename=filename, read_file_handle=False)
 
 
 async def send_full_result(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, session: Dict[str, Any]
+    update: Update, context: ContextTypes.DEFAULT_TYPE, session: Session
 ) -> None:
     """
     Send full result after preview confirmation.
@@ -500,18 +908,18 @@ async def send_full_result(
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
 
-    if "processed_copies" in session:
-        await send_result(
-            context,
-            chat_id,
-            session["processed_copies"],
-            session.get("method", DEFAULT_METHOD),
-            session.get("original_filename", "image.jpg"),
-        )
-
-    # Clear session
-    if user_id in context.bot_data["sessions"]:
-        del context.bot_data["sessions"][user_id]
+    try:
+        if session.processed_copies is not None:
+            await send_result(
+                context,
+                chat_id,
+                session.processed_copies,
+                session.method or DEFAULT_METHOD,
+                session.original_filename,
+            )
+    finally:
+        # Clear session and release the stored copies
+        get_session_store().discard(user_id, session)
 
 
 # ============================================================================
@@ -562,15 +970,13 @@ async def handle_media_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
     try:
         if update.message.photo:
             photo = update.message.photo[-1]
-            file = await context.bot.get_file(photo.file_id)
-            file_bytes = await file.download_as_bytearray()
+            file_bytes = await _download_media(context, photo)
             filename = generate_random_filename(f"photo_{len(group['images']) + 1}.jpg", prefix="photo")
         elif update.message.document:
             doc = update.message.document
             if doc.mime_type not in SUPPORTED_MIME_TYPES:
                 return
-            file = await context.bot.get_file(doc.file_id)
-            file_bytes = await file.download_as_bytearray()
+            file_bytes = await _download_media(context, doc)
             base_filename = doc.file_name or f"image_{len(group['images']) + 1}.jpg"
             normalized = normalize_to_photo(base_filename)
             filename = generate_random_filename(normalized, prefix="photo")
@@ -578,7 +984,7 @@ async def handle_media_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
 
         group["images"].append({
-            "bytes": bytes(file_bytes),
+            "bytes": file_bytes,
             "filename": filename,
         })
 
@@ -622,15 +1028,16 @@ async def _collect_media_group(
         return
 
     # Initialize batch session
-    if "sessions" not in context.bot_data:
-        context.bot_data["sessions"] = {}
-
-    context.bot_data["sessions"][user_id] = {
-        "batch_images": images,
-        "method": None,
-        "state": "batch_method_select",
-        "chat_id": chat_id,
-    }
+    try:
+        session = get_session_store().put(
+            Session(user_id, chat_id, state="batch_method_select", batch_images=images)
+        )
+    except QuotaExceededError:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="Слишком большой общий объём изображений. Отправьте меньше файлов.",
+        )
+        return
 
     # Show method selection for batch
     msg = await context.bot.send_message(
@@ -639,8 +1046,7 @@ async def _collect_media_group(
         reply_markup=get_method_keyboard(),
     )
 
-    session = context.bot_data["sessions"][user_id]
-    session["selection_message_id"] = msg.message_id
+    session.selection_message_id = msg.message_id
 
     # Set timeout
     asyncio.create_task(
@@ -658,15 +1064,11 @@ async def _batch_method_selection_timeout(
     """Handle timeout for batch method selection."""
     await asyncio.sleep(METHOD_SELECTION_TIMEOUT)
 
-    if "sessions" not in context.bot_data:
-        return
-
-    session = context.bot_data["sessions"].get(user_id, {})
+    session = get_session_store().peek(user_id)
 
-    if session.get("state") == "batch_method_select":
-        session["method"] = DEFAULT_METHOD
-        session["state"] = "batch_processing"
-        context.bot_data["sessions"][user_id] = session
+    if session is not None and session.state == "batch_method_select":
+        session.method = DEFAULT_METHOD
+        session.state = "batch_processing"
 
         try:
             method_name = METHOD_NAMES.get(DEFAULT_METHOD, DEFAULT_METHOD)
@@ -698,69 +1100,147 @@ async def process_batch(
         images: List of image dicts with 'bytes' and 'filename'
         method_str: Method to use
     """
-    try:
-        method = UniqueizationMethod(method_str)
-        uniqueizer = get_uniqueizer(method)
-        method_name = METHOD_NAMES.get(method_str, method_str)
-
-        total = len(images)
-        processed = 0
-        errors = []
+    # Queue for a fair share of the workers; the update loop moves on
+    scheduler = get_scheduler()
+    job = scheduler.submit(
+        user_id,
+        scheduler.cost(method_str, len(images)),
+        lambda: _process_batch(context, user_id, chat_id, images, method_str),
+        on_position=_queue_position_reporter(context, chat_id),
+    )
+    session = get_session_store().peek(user_id)
+    if session is not None and session.batch_images is images:
+        # The session cancels the job if it is replaced or discarded
+        session.job = job
 
-        # Send progress message
-        if total > 3:
-            progress_msg = await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"Обрабатываю изображения: 0/{total}..."
-            )
-        else:
-            progress_msg = None
 
-        for i, img_data in enumerate(images):
-            try:
-                image_bytes = img_data["bytes"]
-                filename = img_data["filename"]
+async def _process_batch(
+    context: ContextTypes.DEFAULT_TYPE,
+    user_id: int,
+    chat_id: int,
+    images: List[Dict[str, Any]],
+    method_str: str,
+) -> None:
+    """
+    Process a batch of images (runs as a scheduler job).
 
-                # Process image
-                processed_bytes = uniqueizer.process(image_bytes)
+    Images are processed concurrently, one per worker. Results are uploaded
+    in album order as document groups of up to MEDIA_GROUP_MAX_SIZE, each
+    group as soon as its images are done, with at most
+    BATCH_UPLOAD_CONCURRENCY uploads in flight.
+    """
+    session = get_session_store().peek(user_id)
+    loop = asyncio.get_running_loop()
+    pool = get_worker_pool()
+    total = len(images)
+    # Live progress: images counted here, stages reported by the workers
+    progress = ProgressReporter(context.bot, chat_id, total, title="Обработка изображений")
+    tasks: List[asyncio.Task] = []
 
-                # Generate random output filename
-                output_filename = generate_random_filename(filename, prefix="photo")
+    try:
+        UniqueizationMethod(method_str)  # Validate method key
+        method_name = METHOD_NAMES.get(method_str, method_str)
 
-                # Send result
-                await context.bot.send_document(
-                    chat_id=chat_id,
-                    document=io.BytesIO(processed_bytes),
-                    filename=output_filename,
-                    caption=f"Изображение {i + 1}/{total}\nМетод: {method_name}",
-                )
+        # Per-image result (bytes, filename) or error text, by album index
+        results: List[Optional[Tuple[bytes, str]]] = [None] * total
+        errors: Dict[int, str] = {}
+        workers = asyncio.Semaphore(pool.max_workers)
+        uploads = asyncio.Semaphore(BATCH_UPLOAD_CONCURRENCY)
 
-                processed += 1
+        # Deadline: per image, capped per batch
+        batch_deadline = loop.time() + min(PROCESSING_TIMEOUT_PER_COPY * total, PROCESSING_TIMEOUT_MAX)
 
-                # Update progress
-                if progress_msg and (i + 1) % 3 == 0:
+        async def process_image(i: int, img_data: Dict[str, Any]) -> None:
+            try:
+                async with workers:
+                    if loop.time() >= batch_deadline:
+                        errors[i] = "не обработано, время истекло"
+                        return
+                    # A timed-out image is stopped through its own cancel token
+                    cancel = CancelToken(deadline=min(loop.time() + PROCESSING_TIMEOUT_PER_COPY, batch_deadline))
+                    try:
+                        with get_progress_hub().subscription(cancel.path, progress.on_stage):
+                            processed_bytes = await asyncio.wait_for(
+                                pool.process(method_str, img_data["bytes"], cancel.path),
+                                cancel.remaining(loop.time()),
+                            )
+                    except asyncio.TimeoutError:
+                        cancel.cancel("deadline")
+                        errors[i] = "превышено время обработки"
+                        return
+                    except asyncio.CancelledError:
+                        # The batch was cancelled (session replaced or discarded)
+                        cancel.cancel()
+                        raise
+                    finally:
+                        cancel.close()
+                if processed_bytes is None:
+                    errors[i] = "обработка отменена"
+                    return
+                results[i] = (processed_bytes, generate_random_filename(img_data["filename"], prefix="photo"))
+            except Exception:
+                errors[i] = "ошибка обработки"
+            finally:
+                progress.advance()
+
+        async def upload_group(indices: List[int]) -> int:
+            await asyncio.gather(*(tasks[i] for i in indices))
+            ready = [i for i in indices if results[i] is not None]
+            if not ready:
+                return 0
+            documents = [
+                (results[i][0], results[i][1], f"Изображение {i + 1}/{total}\nМетод: {method_name}")
+                for i in ready
+            ]
+            for i in ready:
+                results[i] = None
+            import logging
+            logger = logging.getLogger(__name__)
+            async with uploads:
+                try:
+                    await _send_document_group(context, chat_id, documents)
+                    return len(ready)
+                except BadRequest as e:
+                    # Rejected up front, nothing was delivered: one bad file
+                    # fails the whole group, so retry the files individually
+                    if len(documents) == 1:
+                        errors[ready[0]] = "ошибка отправки"
+                        return 0
+                    logger.warning("Batch group rejected, sending one by one: {}".format(e))
+                except Exception as e:
+                    # Timeouts and network errors may come after Telegram
+                    # accepted the group; resending could deliver it twice
+                    logger.warning("Batch group upload failed: {}".format(e))
+                    for i in ready:
+                        errors[i] = "ошибка отправки"
+                    return 0
+                sent = 0
+                for i, document in zip(ready, documents):
                     try:
-                        await progress_msg.edit_text(
-                            f"Обрабатываю изображения: {i + 1}/{total}..."
-                        )
+                        await _send_document_group(context, chat_id, [document])
+                        sent += 1
                     except Exception:
-                        pass
+                        errors[i] = "ошибка отправки"
+                return sent
 
-            except Exception as e:
-                errors.append(f"Изображение {i + 1}: ошибка обработки")
+        tasks.extend(asyncio.ensure_future(process_image(i, img_data)) for i, img_data in enumerate(images))
+        sent = await asyncio.gather(*[
+            upload_group(list(range(start, min(start + MEDIA_GROUP_MAX_SIZE, total))))
+            for start in range(0, total, MEDIA_GROUP_MAX_SIZE)
+        ])
+        processed = sum(sent)
+
+        await progress.close()
 
         # Send completion message
         if errors:
-            error_text = "\n".join(errors)
+            error_text = "\n".join(f"Изображение {i + 1}: {errors[i]}" for i in sorted(errors))
             await context.bot.send_message(
                 chat_id=chat_id,
                 text=f"Обработано {processed}/{total} изображений.\n\nОшибки:\n{error_text}"
             )
-        elif progress_msg:
-            try:
-                await progress_msg.edit_text(f"Готово! Обработано {total} изображений.")
-            except Exception:
-                pass
+        elif total > 3:
+            await context.bot.send_message(chat_id=chat_id, text=f"Готово! Обработано {total} изображений.")
 
     except Exception as e:
         await context.bot.send_message(
@@ -768,6 +1248,35 @@ async def process_batch(
             text="Произошла ошибка при обработке. Попробуйте ещё раз.",
         )
     finally:
-        # Clear session
-        if user_id in context.bot_data.get("sessions", {}):
-            del context.bot_data["sessions"][user_id]
+        for task in tasks:
+            task.cancel()
+        await progress.close()
+        # Clear session (a newer upload's session is left alone)
+        if session is not None:
+            get_session_store().discard(user_id, session)
+
+
+async def _send_document_group(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, documents: List[Tuple[bytes, str, str]]
+) -> None:
+    """
+    Send documents as one media group (a single document is sent on its own).
+
+    Args:
+        context: Bot context
+        chat_id: Chat ID
+        documents: (bytes, filename, caption), at most MEDIA_GROUP_MAX_SIZE
+    """
+    if len(documents) == 1:
+        data, filename, caption = documents[0]
+        await context.bot.send_document(
+            chat_id=chat_id, document=io.BytesIO(data), filename=filename, caption=caption,
+        )
+        return
+    await context.bot.send_media_group(
+        chat_id=chat_id,
+        media=[
+            InputMediaDocument(media=data, filename=filename, caption=caption)
+            for data, filename, caption in documents
+        ],
+    )
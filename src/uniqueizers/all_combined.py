@@ -10,6 +10,8 @@ All Combined: Combines all uniqueization methods
 """
 
 from .base import BaseUniqueizer
+from src.utils.image import DecodedImage
+from src.utils.progress import checkpoint
 from .metadata import MetadataUniqueizer
 from .micro import MicroUniqueizer
 from .lsb import LSBUniqueizer
@@ -56,6 +58,8 @@ class AllCombinedUniqueizer(BaseUniqueizer):
     5. Method3 final touch
     """
 
+    preserves_geometry = False
+
     def __init__(self):
         """Initialize all combined uniqueizer."""
         # Standard methods
@@ -99,40 +103,70 @@ class AllCombinedUniqueizer(BaseUniqueizer):
         Returns:
             Fully uniqueized image
         """
-        result = image_bytes
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """
+        Stage API version of process().
+        
+        All steps work on the same decoded image; nothing is encoded until
+        the caller asks for bytes. After each step a progress event is
+        reported and the job's cancel token is checked, so a cancelled job
+        stops within one step.
+        
+        Args:
+            decoded: Decoded image (left unchanged)
+            
+        Returns:
+            Fully uniqueized decoded image
+
+        Raises:
+            JobCancelled: If the job was cancelled
+        """
+        result = decoded.copy()
         
         # Step 1: Apply combined (metadata + micro + lsb)
-        result = self.combined.process(result)
+        result = self.combined.process_image(result)
         
+        checkpoint("combined")
+
         # Step 2: Apply ICC profile (color space change)
         try:
-            result = self.icc_profile.process(result)
+            result = self.icc_profile.process_image(result)
         except Exception as e:
             import logging
             logging.warning("ICC profile step failed: {}".format(e))
         
+        checkpoint("icc_profile")
+
         # Step 3: Apply method1 (simple enhancements)
-        result = self.method1.process(result)
+        result = self.method1.process_image(result)
         
+        checkpoint("method1")
+
         # Step 4: Apply method2 (advanced processing)
         # Get first variant from method2
         try:
-            method2_variants = self.method2.process_variants(result, count=1)
+            method2_variants = self.method2.process_image_variants(result, count=1)
             if method2_variants and len(method2_variants) > 0:
                 result = method2_variants[0]
         except Exception as e:
             import logging
             logging.warning("Method2 step failed: {}".format(e))
         
+        checkpoint("method2")
+
         # Step 5: Apply method3 (final combined touch)
         try:
-            method3_variants = self.method3.process_variants(result, count=1)
+            method3_variants = self.method3.process_image_variants(result, count=1)
             if method3_variants and len(method3_variants) > 0:
                 result = method3_variants[0]
         except Exception as e:
             import logging
             logging.warning("Method3 step failed: {}".format(e))
         
+        checkpoint("method3")
+
         # Step 6: Apply new modular uniqueizers (random order for uniqueness)
         import random
         modular_methods = [
@@ -167,16 +201,17 @@ class AllCombinedUniqueizer(BaseUniqueizer):
         
         for method_name, method_uniqueizer in selected_methods:
             try:
-                result = method_uniqueizer.process(result)
+                result = method_uniqueizer.process_image(result)
             except Exception as e:
                 import logging
                 logging.warning("{} step failed: {}".format(method_name, e))
+            checkpoint(method_name)
         
         return result
 
     def process_variants(self, image_bytes: bytes, count: int = None) -> list:
         """
-        Generate multiple unique variants by calling process() count times.
+        Generate multiple unique variants by calling process_image() count times.
         
         Args:
             image_bytes: Original image bytes
@@ -192,14 +227,23 @@ class AllCombinedUniqueizer(BaseUniqueizer):
         logger = logging.getLogger(__name__)
         logger.info(f"=== AllCombinedUniqueizer.process_variants START ===")
         logger.info(f"Requested count: {count}")
-        logger.info(f"Will call process() {count} times - each call generates unique result")
+        logger.info(f"Will call process_image() {count} times - each call generates unique result")
         
         variants = []
         
+        # Decode once, every variant starts from the same decoded source
+        source = None
+        try:
+            source = DecodedImage.from_source(image_bytes)
+        except Exception as e:
+            logger.error(f"Failed to decode source image: {e}", exc_info=True)
+        
         for i in range(count):
             try:
-                logger.info(f"[{i+1}/{count}] Calling process()...")
-                variant = self.process(image_bytes)
+                if source is None:
+                    raise ValueError("source image could not be decoded")
+                logger.info(f"[{i+1}/{count}] Calling process_image()...")
+                variant = self.process_image(source).to_bytes()
                 variants.append(variant)
                 logger.info(f"[{i+1}/{count}] SUCCESS: variant added, total={len(variants)}")
             except Exception as e:
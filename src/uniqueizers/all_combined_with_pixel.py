@@ -10,6 +10,8 @@ Returns 1 variant with alpha 10.
 """
 
 from .base import BaseUniqueizer
+from src.utils.image import DecodedImage
+from src.utils.progress import checkpoint
 from .all_combined import AllCombinedUniqueizer
 from .pixel_pattern import PixelPatternUniqueizer
 # New modular uniqueizers (also used in all_combined)
@@ -48,6 +50,8 @@ class AllCombinedWithPixelUniqueizer(BaseUniqueizer):
     
     Returns 1 variant with alpha 10.
     """
+
+    preserves_geometry = False
     
     def __init__(self):
         """Initialize all combined with pixel uniqueizer."""
@@ -67,7 +71,8 @@ class AllCombinedWithPixelUniqueizer(BaseUniqueizer):
         Process image with all methods + pixel pattern.
         Generates multiple unique variants.
         
-        Optimized: Process base image once, then apply variations.
+        Optimized: Decode the source once, then run every variant through
+        the in-memory stage pipeline and encode it once.
         
         Args:
             image_bytes: Original image bytes
@@ -83,31 +88,37 @@ class AllCombinedWithPixelUniqueizer(BaseUniqueizer):
         
         variants = []
         
+        # Decode once, every variant starts from the same decoded source
+        source = None
+        try:
+            source = DecodedImage.from_source(image_bytes)
+        except Exception as e:
+            logger.error(f"Failed to decode source image: {e}", exc_info=True)
+        
         # For each variant, process independently to ensure uniqueness
         # This ensures each copy is truly unique
         for i in range(count):
             logger.info(f"[{i+1}/{count}] Processing variant...")
             try:
+                if source is None:
+                    raise ValueError("source image could not be decoded")
                 # Process base image (each call generates unique result due to randomness in methods)
-                logger.info(f"[{i+1}/{count}] Calling all_combined.process()...")
-                base_result = self.all_combined.process(image_bytes)
-                logger.info(f"[{i+1}/{count}] all_combined.process() complete, size: {len(base_result)} bytes")
+                logger.info(f"[{i+1}/{count}] Calling all_combined.process_image()...")
+                base_result = self.all_combined.process_image(source)
+                logger.info(f"[{i+1}/{count}] all_combined.process_image() complete, size: {base_result.img.size}")
                 
-                # Apply pixel pattern overlay
+                checkpoint("all_combined")
+
+                # Apply pixel pattern overlay (decoded result goes straight in, no re-encode)
                 try:
-                    logger.info(f"[{i+1}/{count}] Calling pixel_pattern.process_variants()...")
-                    pixel_variants = self.pixel_pattern.process_variants(base_result, count=1)
-                    if pixel_variants and len(pixel_variants) > 0:
-                        logger.info(f"[{i+1}/{count}] pixel_pattern returned variant, size: {len(pixel_variants[0])} bytes")
-                        variants.append(pixel_variants[0])
-                    else:
-                        logger.warning(f"[{i+1}/{count}] pixel_pattern returned empty, using base result")
-                        # If pixel pattern fails, use base result
-                        variants.append(base_result)
+                    logger.info(f"[{i+1}/{count}] Calling pixel_pattern.process_image()...")
+                    variant_bytes = self.pixel_pattern.process_image(base_result.copy()).to_bytes()
+                    logger.info(f"[{i+1}/{count}] pixel_pattern returned variant, size: {len(variant_bytes)} bytes")
+                    variants.append(variant_bytes)
                 except Exception as e:
                     logger.warning(f"[{i+1}/{count}] Pixel pattern step failed: {e}")
                     # Fallback: use base result
-                    variants.append(base_result)
+                    variants.append(base_result.to_bytes())
                 
                 logger.info(f"[{i+1}/{count}] SUCCESS: variant added, total={len(variants)}")
                     
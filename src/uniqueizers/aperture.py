@@ -6,7 +6,8 @@ Modifies EXIF aperture parameter (f/1.8, f/2.8, etc.)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
 from src.utils.metadata import generate_random_metadata
 import piexif
 import random
@@ -19,6 +20,18 @@ class ApertureUniqueizer(BaseUniqueizer):
     Changes aperture parameter in EXIF metadata
     """
     
+    # Random aperture values (f/1.8, f/2.8, f/4.0, f/5.6, f/8.0, etc.)
+    # Stored as (numerator, denominator) in EXIF
+    APERTURES = [
+        (18, 10),  # f/1.8
+        (28, 10),  # f/2.8
+        (40, 10),  # f/4.0
+        (56, 10),  # f/5.6
+        (80, 10),  # f/8.0
+        (110, 10), # f/11
+        (160, 10), # f/16
+    ]
+    
     def process(self, image_bytes: bytes) -> bytes:
         """
         Process image by modifying aperture in EXIF.
@@ -29,26 +42,27 @@ class ApertureUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified aperture
         """
-        img, original_format = load_image(image_bytes)
-        
+        if is_jpeg(image_bytes):
+            # EXIF-only change: splice APP1, image data stays untouched
+            try:
+                return replace_exif(image_bytes, self._build_exif(random.choice(self.APERTURES)))
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Convert to RGB if needed
-        if img.mode != "RGB":
-            img = img.convert("RGB")
+        if decoded.img.mode != "RGB":
+            decoded.img = decoded.img.convert("RGB")
         
-        # Random aperture values (f/1.8, f/2.8, f/4.0, f/5.6, f/8.0, etc.)
-        # Stored as (numerator, denominator) in EXIF
-        apertures = [
-            (18, 10),  # f/1.8
-            (28, 10),  # f/2.8
-            (40, 10),  # f/4.0
-            (56, 10),  # f/5.6
-            (80, 10),  # f/8.0
-            (110, 10), # f/11
-            (160, 10), # f/16
-        ]
-        aperture = random.choice(apertures)
+        if not decoded.is_png:
+            decoded.exif = self._build_exif(random.choice(self.APERTURES))
         
-        # Add EXIF with aperture
+        return decoded
+
+    def _build_exif(self, aperture: tuple) -> bytes:
+        """Build EXIF bytes carrying the F-number."""
         try:
             exif_dict = {
                 "Exif": {
@@ -58,12 +72,4 @@ class ApertureUniqueizer(BaseUniqueizer):
             exif_bytes = piexif.dump(exif_dict)
         except:
             exif_bytes = generate_random_metadata()
-        
-        # Save
-        if original_format.upper() == "PNG":
-            return save_image(img, "PNG", preserve_alpha=True)
-        else:
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
-
+        return exif_bytes
@@ -8,12 +8,18 @@ from typing import Tuple, Optional
 
 from PIL import Image
 
-from src.config import MIN_SSIM, MAX_SIZE_RATIO
+from src.utils.image import DecodedImage
+from src.utils.quality import QualityGate
 
 
 class BaseUniqueizer(ABC):
     """Abstract base class for all uniqueization methods."""
 
+    # False for methods that crop, resize or mirror: a pixel-aligned SSIM
+    # against the original is meaningless for them, so the quality gate
+    # only checks the size ratio
+    preserves_geometry = True
+
     @abstractmethod
     def process(self, image_bytes: bytes) -> bytes:
         """
@@ -27,6 +33,22 @@ class BaseUniqueizer(ABC):
         """
         pass
 
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """
+        Process an already decoded image (stage API).
+
+        Lets chains such as AllCombinedUniqueizer decode once and encode once.
+        The default implementation round-trips through process(); uniqueizers
+        override it to work on the decoded pixels directly.
+
+        Args:
+            decoded: Decoded image shared between stages
+
+        Returns:
+            Processed decoded image
+        """
+        return DecodedImage.from_bytes(self.process(decoded.to_bytes()))
+
     def validate_quality(
         self, original_bytes: bytes, processed_bytes: bytes
     ) -> Tuple[bool, Optional[str]]:
@@ -40,19 +62,9 @@ class BaseUniqueizer(ABC):
         Returns:
             Tuple of (is_valid, error_message)
         """
-        from src.utils.image import calculate_ssim
-
-        # Check SSIM
-        ssim_value = calculate_ssim(original_bytes, processed_bytes)
-        if ssim_value < MIN_SSIM:
-            return False, "SSIM {:.4f} below threshold {}".format(ssim_value, MIN_SSIM)
-
-        # Check size ratio
-        size_ratio = len(processed_bytes) / len(original_bytes)
-        if size_ratio > MAX_SIZE_RATIO:
-            return False, "Size ratio {:.2f} exceeds maximum {}".format(size_ratio, MAX_SIZE_RATIO)
-
-        return True, None
+        gate = QualityGate(original_bytes, check_ssim=self.preserves_geometry)
+        score = gate.score(processed_bytes)
+        return score.passed, score.reason
 
     def _load_image(self, image_bytes: bytes) -> Tuple[Image.Image, str]:
         """
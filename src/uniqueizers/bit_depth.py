@@ -6,7 +6,7 @@ Modifies PNG bit depth parameter (8, 16, etc.)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
 import random
 
@@ -28,24 +28,24 @@ class BitDepthUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified bit depth
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Only process PNG images
-        if original_format.upper() != "PNG":
+        if not decoded.is_png:
             # Convert to PNG if not already
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            decoded.format = "PNG"
+            return decoded
         
         # Random bit depth: 8 or 16
         bit_depth = random.choice([8, 16])
         
         # Save with specific bit depth
         # Note: PIL doesn't directly control bit depth, but we can ensure it's saved correctly
-        if img.mode not in ("RGB", "RGBA"):
-            img = img.convert("RGBA")
+        if decoded.img.mode not in ("RGB", "RGBA"):
+            decoded.img = decoded.img.convert("RGBA")
         
-        return save_image(img, "PNG", preserve_alpha=True)
-
-
-
+        return decoded
@@ -6,7 +6,7 @@ Modifies Make and Model fields in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 import piexif
 import random
 
@@ -62,27 +62,27 @@ class CameraMakeModelUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified camera info
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random camera
         make, model = random.choice(self.CAMERAS)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("Make", make)
-            pnginfo.add_text("Model", model)
-            pnginfo.add_text("Camera", f"{make} {model}")
-            
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
+            decoded.update_png_text({
+                "Make": make,
+                "Model": model,
+                "Camera": f"{make} {model}",
+            })
             
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 exif_dict = {
@@ -95,6 +95,6 @@ class CameraMakeModelUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
+            decoded.exif = exif_bytes
+        
+        return decoded
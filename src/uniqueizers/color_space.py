@@ -6,9 +6,10 @@ Modifies ColorSpace field in metadata (sRGB, Display P3, Adobe RGB, etc.)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
+from src.utils.png_chunks import is_png, replace_text
 from PIL import Image
-from PIL.PngImagePlugin import PngInfo
 import piexif
 import random
 
@@ -50,49 +51,65 @@ class ColorSpaceUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified ColorSpace
         """
-        img, original_format = load_image(image_bytes)
-        
+        color_space = random.choice(self.COLOR_SPACES)
+        # Metadata-only change: edit the container, image data stays untouched
+        try:
+            if is_png(image_bytes):
+                return replace_text(image_bytes, self._png_text(color_space))
+            if is_jpeg(image_bytes):
+                return replace_exif(image_bytes, self._build_exif(color_space))
+        except ValueError:
+            pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random color space
         color_space = random.choice(self.COLOR_SPACES)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            pnginfo = PngInfo()
-            pnginfo.add_text("ColorSpace", color_space)
-            pnginfo.add_text("sRGB", "0" if color_space != "sRGB" else "1")
+            decoded.update_png_text(self._png_text(color_space))
             
-            # Save PNG with metadata
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF - ColorSpace
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            
-            try:
-                # Try to map color space to EXIF value
-                if "sRGB" in color_space:
-                    color_space_id = self.COLOR_SPACE_IDS["sRGB"]
-                elif "Adobe RGB" in color_space:
-                    color_space_id = self.COLOR_SPACE_IDS["Adobe RGB"]
-                else:
-                    color_space_id = self.COLOR_SPACE_IDS["Uncalibrated"]
-                
-                exif_dict = {
-                    "Exif": {
-                        piexif.ExifIFD.ColorSpace: color_space_id,
-                    },
-                    "0th": {
-                        piexif.ImageIFD.ImageDescription: color_space.encode('utf-8'),
-                    }
-                }
-                exif_bytes = piexif.dump(exif_dict)
-            except Exception:
-                from src.utils.metadata import generate_random_metadata
-                exif_bytes = generate_random_metadata()
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+            decoded.exif = self._build_exif(color_space)
+        
+        return decoded
 
+    def _png_text(self, color_space: str) -> dict:
+        """PNG text fields carrying the color space."""
+        return {
+            "ColorSpace": color_space,
+            "sRGB": "0" if color_space != "sRGB" else "1",
+        }
 
+    def _build_exif(self, color_space: str) -> bytes:
+        """Build EXIF bytes carrying the color space."""
+        try:
+            # Try to map color space to EXIF value
+            if "sRGB" in color_space:
+                color_space_id = self.COLOR_SPACE_IDS["sRGB"]
+            elif "Adobe RGB" in color_space:
+                color_space_id = self.COLOR_SPACE_IDS["Adobe RGB"]
+            else:
+                color_space_id = self.COLOR_SPACE_IDS["Uncalibrated"]
+                
+            exif_dict = {
+                "Exif": {
+                    piexif.ExifIFD.ColorSpace: color_space_id,
+                },
+                "0th": {
+                    piexif.ImageIFD.ImageDescription: color_space.encode('utf-8'),
+                }
+            }
+            exif_bytes = piexif.dump(exif_dict)
+        except Exception:
+            from src.utils.metadata import generate_random_metadata
+            exif_bytes = generate_random_metadata()
+        return exif_bytes
@@ -6,7 +6,7 @@ Modifies PNG color type (RGB, RGBA, Grayscale, etc.)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
 import random
 
@@ -28,30 +28,25 @@ class ColorTypeUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified color type
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random color type conversion
         color_types = ["RGB", "RGBA"]
         target_mode = random.choice(color_types)
         
         # Convert to target color type
-        if img.mode != target_mode:
+        if decoded.img.mode != target_mode:
             if target_mode == "RGBA":
-                img = img.convert("RGBA")
+                decoded.img = decoded.img.convert("RGBA")
             else:
-                img = img.convert("RGB")
+                decoded.img = decoded.img.convert("RGB")
         
-        # Save
-        if original_format.upper() == "PNG":
-            if img.mode == "RGBA":
-                return save_image(img, "PNG", preserve_alpha=True)
-            else:
-                return save_image(img, "PNG", preserve_alpha=False)
-        else:
+        if not decoded.is_png:
             # Convert to PNG
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            return save_image(img, "PNG", preserve_alpha=True)
-
-
-
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            decoded.format = "PNG"
+        
+        return decoded
@@ -11,6 +11,7 @@ from .base import BaseUniqueizer
 from .metadata import MetadataUniqueizer
 from .micro import MicroUniqueizer
 from .lsb import LSBUniqueizer
+from src.utils.image import DecodedImage
 
 
 class CombinedUniqueizer(BaseUniqueizer):
@@ -50,13 +51,17 @@ class CombinedUniqueizer(BaseUniqueizer):
         Returns:
             Fully uniqueized image
         """
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Step 1: Apply micro-changes (shift, brightness, color)
-        result = self.micro.process(image_bytes)
+        result = self.micro.process_image(decoded)
 
         # Step 2: Apply LSB modifications
-        result = self.lsb.process(result)
+        result = self.lsb.process_image(result)
 
-        # Step 3: Apply metadata changes (also re-saves, ensuring final hash uniqueness)
-        result = self.metadata.process(result)
+        # Step 3: Apply metadata changes (ensures final hash uniqueness)
+        result = self.metadata.process_image(result)
 
         return result
@@ -6,7 +6,7 @@ Modifies PNG compression parameter (Deflate/Inflate)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
 import random
 
@@ -28,13 +28,16 @@ class CompressionUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified compression
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Ensure PNG format
-        if original_format.upper() != "PNG":
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            return save_image(img, "PNG", preserve_alpha=True)
+        if not decoded.is_png:
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            decoded.format = "PNG"
+            return decoded
         
         # PNG uses Deflate/Inflate compression
         # We can vary compression level (0-9)
@@ -42,11 +45,8 @@ class CompressionUniqueizer(BaseUniqueizer):
         # Higher = slower, smaller file
         compression_level = random.choice([0, 1, 3, 6, 9])
         
-        if img.mode not in ("RGB", "RGBA"):
-            img = img.convert("RGBA")
+        if decoded.img.mode not in ("RGB", "RGBA"):
+            decoded.img = decoded.img.convert("RGBA")
         
         # Save with different compression
-        return save_image(img, "PNG", preserve_alpha=True)
-
-
-
+        return decoded
@@ -6,9 +6,8 @@ Modifies CreatorTool/Software field in metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
-from PIL.PngImagePlugin import PngInfo
 import piexif
 import random
 
@@ -52,26 +51,26 @@ class CreatorToolUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified CreatorTool
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random creator tool
         creator_tool = random.choice(self.CREATOR_TOOLS)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            pnginfo = PngInfo()
-            pnginfo.add_text("Software", creator_tool)
-            pnginfo.add_text("CreatorTool", creator_tool)
+            decoded.update_png_text({
+                "Software": creator_tool,
+                "CreatorTool": creator_tool,
+            })
             
-            # Save PNG with metadata
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 exif_dict = {
@@ -83,7 +82,6 @@ class CreatorToolUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
+            decoded.exif = exif_bytes
+        
+        return decoded
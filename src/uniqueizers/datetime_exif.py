@@ -6,7 +6,8 @@ Modifies DateTime, DateTimeOriginal, DateTimeDigitized in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
 from datetime import datetime, timedelta
 import piexif
 import random
@@ -29,9 +30,39 @@ class DateTimeEXIFUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified date/time
         """
-        img, original_format = load_image(image_bytes)
+        if is_jpeg(image_bytes):
+            # EXIF-only change: splice APP1, image data stays untouched
+            try:
+                return replace_exif(image_bytes, self._build_exif(self._random_datetime()))
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        dt_str = self._random_datetime()
+        
+        if decoded.is_png:
+            # PNG metadata
+            decoded.update_png_text({
+                "DateTime": dt_str,
+                "DateTimeOriginal": dt_str,
+                "DateTimeDigitized": dt_str,
+            })
+            
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
+        else:
+            # JPEG EXIF
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
+            
+            decoded.exif = self._build_exif(dt_str)
         
-        # Random datetime within last 2 years
+        return decoded
+
+    def _random_datetime(self) -> str:
+        """Random EXIF datetime string within last 2 years."""
         days_ago = random.randint(1, 730)
         hours_offset = random.randint(0, 23)
         minutes_offset = random.randint(0, 59)
@@ -43,39 +74,22 @@ class DateTimeEXIFUniqueizer(BaseUniqueizer):
             minutes=minutes_offset,
             seconds=seconds_offset
         )
-        dt_str = dt.strftime("%Y:%m:%d %H:%M:%S")
-        
-        if original_format.upper() == "PNG":
-            # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("DateTime", dt_str)
-            pnginfo.add_text("DateTimeOriginal", dt_str)
-            pnginfo.add_text("DateTimeDigitized", dt_str)
-            
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
-        else:
-            # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            
-            try:
-                exif_dict = {
-                    "0th": {
-                        piexif.ImageIFD.DateTime: dt_str.encode('utf-8'),
-                    },
-                    "Exif": {
-                        piexif.ExifIFD.DateTimeOriginal: dt_str.encode('utf-8'),
-                        piexif.ExifIFD.DateTimeDigitized: dt_str.encode('utf-8'),
-                    }
-                }
-                exif_bytes = piexif.dump(exif_dict)
-            except Exception:
-                from src.utils.metadata import generate_random_metadata
-                exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+        return dt.strftime("%Y:%m:%d %H:%M:%S")
 
+    def _build_exif(self, dt_str: str) -> bytes:
+        """Build EXIF bytes carrying the date/time fields."""
+        try:
+            exif_dict = {
+                "0th": {
+                    piexif.ImageIFD.DateTime: dt_str.encode('utf-8'),
+                },
+                "Exif": {
+                    piexif.ExifIFD.DateTimeOriginal: dt_str.encode('utf-8'),
+                    piexif.ExifIFD.DateTimeDigitized: dt_str.encode('utf-8'),
+                }
+            }
+            exif_bytes = piexif.dump(exif_dict)
+        except Exception:
+            from src.utils.metadata import generate_random_metadata
+            exif_bytes = generate_random_metadata()
+        return exif_bytes
@@ -6,7 +6,7 @@ Modifies ExposureMode field in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 import piexif
 import random
 
@@ -35,26 +35,26 @@ class ExposureModeUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified exposure mode
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random exposure mode
         exposure_mode = random.choice(list(self.EXPOSURE_MODES.keys()))
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("ExposureMode", str(exposure_mode))
-            pnginfo.add_text("ExposureModeDesc", self.EXPOSURE_MODES[exposure_mode])
-            
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
+            decoded.update_png_text({
+                "ExposureMode": str(exposure_mode),
+                "ExposureModeDesc": self.EXPOSURE_MODES[exposure_mode],
+            })
             
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 exif_dict = {
@@ -66,6 +66,6 @@ class ExposureModeUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
+            decoded.exif = exif_bytes
+        
+        return decoded
@@ -6,7 +6,8 @@ Modifies ExposureTime (shutter speed) field in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
 import piexif
 import random
 from fractions import Fraction
@@ -52,16 +53,33 @@ class ExposureTimeUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified ExposureTime
         """
-        img, original_format = load_image(image_bytes)
-        
+        if is_jpeg(image_bytes):
+            # EXIF-only change: splice APP1, image data stays untouched
+            try:
+                return replace_exif(image_bytes, self._build_exif(random.choice(self.EXPOSURE_TIMES)))
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Convert to RGB if needed
-        if img.mode not in ("RGB", "RGBA"):
-            img = img.convert("RGB")
+        if decoded.img.mode not in ("RGB", "RGBA"):
+            decoded.img = decoded.img.convert("RGB")
         
         # Random exposure time
         exposure_time = random.choice(self.EXPOSURE_TIMES)
         
-        # Add EXIF with exposure time
+        # PNG doesn't directly support EXIF, only JPEG carries it
+        if not decoded.is_png:
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
+            decoded.exif = self._build_exif(exposure_time)
+        
+        return decoded
+
+    def _build_exif(self, exposure_time: tuple) -> bytes:
+        """Build EXIF bytes carrying the exposure time."""
         try:
             exif_dict = {
                 "Exif": {
@@ -86,18 +104,4 @@ class ExposureTimeUniqueizer(BaseUniqueizer):
             except:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-        
-        # Save
-        if original_format.upper() == "PNG":
-            # PNG doesn't directly support EXIF, but we can still modify it
-            if img.mode == "RGBA":
-                return save_image(img, "PNG", preserve_alpha=True)
-            else:
-                return save_image(img, "PNG", preserve_alpha=False)
-        else:
-            # JPEG with EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
+        return exif_bytes
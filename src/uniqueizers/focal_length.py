@@ -6,7 +6,7 @@ Modifies FocalLength and FocalLengthIn35mmFilm in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 import piexif
 import random
 
@@ -35,26 +35,26 @@ class FocalLengthUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified focal length
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random focal length
         focal_length = random.choice(self.FOCAL_LENGTHS)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("FocalLength", str(focal_length))
-            pnginfo.add_text("FocalLength35mm", str(focal_length))
-            
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
+            decoded.update_png_text({
+                "FocalLength": str(focal_length),
+                "FocalLength35mm": str(focal_length),
+            })
             
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 exif_dict = {
@@ -67,6 +67,6 @@ class FocalLengthUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
+            decoded.exif = exif_bytes
+        
+        return decoded
@@ -8,13 +8,20 @@ Uses compact ICC profiles from: https://github.com/saucecontrol/Compact-ICC-Prof
 
 import random
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image, get_icc_profile
+from src.utils.image import DecodedImage
 from src.utils.icc_profiles import (
     get_random_profile,
     get_profile_by_type,
-    apply_icc_profile_to_image,
 )
 from src.utils.metadata import generate_random_metadata
+from src.utils.png_metadata import generate_png_text
+from src.utils.png_chunks import (
+    is_png,
+    replace_chunks,
+    make_text_chunk,
+    make_iccp_chunk,
+    TEXT_CHUNKS,
+)
 
 
 class ICCProfileUniqueizer(BaseUniqueizer):
@@ -51,54 +58,54 @@ class ICCProfileUniqueizer(BaseUniqueizer):
         Returns:
             Image with new ICC profile
         """
-        try:
-            img, original_format = load_image(image_bytes)
-            original_icc = get_icc_profile(image_bytes)
-            
-            # Get new ICC profile
-            new_icc = None
-            try:
-                if self.profile_type == "random":
-                    new_icc = get_random_profile()
-                else:
-                    new_icc = get_profile_by_type(self.profile_type)
-                
-                # If download failed, try random
-                if not new_icc:
-                    new_icc = get_random_profile()
-            except Exception:
-                # If profile download fails, continue without it
-                pass
-            
-            # If still no profile, use original or skip
-            if not new_icc:
-                if original_icc:
-                    new_icc = original_icc
-                else:
-                    # Fallback: return with new metadata only (no ICC change)
-                    exif_bytes = generate_random_metadata()
-                    return save_image(img, original_format, quality=95, exif_bytes=exif_bytes)
-            
-            # Apply new ICC profile
+        if is_png(image_bytes):
+            # Chunk-level edit: new iCCP and text chunks, IDAT untouched
+            new_icc = self._select_profile()
+            new_chunks = [make_text_chunk(key, value) for key, value in generate_png_text().items()]
+            if new_icc:
+                new_chunks.insert(0, make_iccp_chunk(new_icc))
             try:
-                apply_icc_profile_to_image(img, new_icc)
-            except Exception:
-                # If applying profile fails, continue without it
+                return replace_chunks(image_bytes, new_chunks, drop_types=TEXT_CHUNKS)
+            except ValueError:
                 pass
-            
-            # Save with new profile
-            if original_format.upper() == "PNG":
-                return save_image(img, "PNG", preserve_alpha=(img.mode == "RGBA"))
-            else:
-                exif_bytes = generate_random_metadata()
-                return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+        try:
+            return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
         except Exception as e:
             # If anything fails, return original with new metadata
             try:
-                img, original_format = load_image(image_bytes)
-                exif_bytes = generate_random_metadata()
-                return save_image(img, original_format, quality=95, exif_bytes=exif_bytes)
+                decoded = DecodedImage.from_source(image_bytes)
+                decoded.exif = generate_random_metadata()
+                return decoded.to_bytes()
             except Exception:
                 # Last resort: return original
                 return image_bytes
 
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        new_icc = self._select_profile()
+        
+        # If still no profile, keep the original one (or none)
+        if new_icc:
+            decoded.icc_profile = new_icc
+        
+        # New metadata (JPEG only; PNG gets fresh text chunks on encode)
+        if not decoded.is_png:
+            decoded.exif = generate_random_metadata()
+        return decoded
+
+    def _select_profile(self):
+        """Pick the new ICC profile, or None if none is available."""
+        new_icc = None
+        try:
+            if self.profile_type == "random":
+                new_icc = get_random_profile()
+            else:
+                new_icc = get_profile_by_type(self.profile_type)
+            
+            # If download failed, try random
+            if not new_icc:
+                new_icc = get_random_profile()
+        except Exception:
+            # If profile download fails, continue without it
+            pass
+        return new_icc
@@ -6,7 +6,7 @@ Modifies PNG interlace parameter (None/Progressive)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
 import random
 
@@ -28,20 +28,20 @@ class InterlaceUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified interlace
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Ensure PNG format
-        if original_format.upper() != "PNG":
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            return save_image(img, "PNG", preserve_alpha=True)
+        if not decoded.is_png:
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            decoded.format = "PNG"
+            return decoded
         
         # Random interlace: None (non-interlaced) or Progressive (interlaced)
         # PIL's save doesn't directly control interlace, but we can vary parameters
-        if img.mode not in ("RGB", "RGBA"):
-            img = img.convert("RGBA")
+        if decoded.img.mode not in ("RGB", "RGBA"):
+            decoded.img = decoded.img.convert("RGBA")
         
-        return save_image(img, "PNG", preserve_alpha=True)
-
-
-
+        return decoded
@@ -5,14 +5,11 @@ Modifies the least significant bits of pixel values.
 Changes are mathematically guaranteed but visually imperceptible.
 """
 
-import random
-import io
-
 from PIL import Image
 import numpy as np
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image, get_icc_profile, apply_icc_profile
+from src.utils.image import DecodedImage
 from src.utils.metadata import generate_random_metadata
 
 
@@ -50,72 +47,115 @@ class LSBUniqueizer(BaseUniqueizer):
         Returns:
             Image with LSB modifications
         """
-        img, original_format = load_image(image_bytes)
-        icc_profile = get_icc_profile(image_bytes)
-
-        # Handle different modes
-        has_alpha = img.mode == "RGBA"
-        original_mode = img.mode
-
-        # Convert to numpy array
-        img_array = np.array(img)
-
-        # Calculate number of pixels to modify
-        if len(img_array.shape) == 3:
-            total_pixels = img_array.shape[0] * img_array.shape[1]
-            channels = img_array.shape[2]
-            # Don't modify alpha channel
-            channels_to_modify = min(channels, 3)
-        else:
-            total_pixels = img_array.shape[0] * img_array.shape[1]
-            channels_to_modify = 1
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        return self.process_image_variants(decoded, count=1)[0]
+
+    def process_variants(self, image_bytes: bytes, count: int = None) -> list:
+        """
+        Generate multiple LSB variants from a single decode.
+
+        Args:
+            image_bytes: Original image as bytes
+            count: Number of variants to generate
+
+        Returns:
+            List of image bytes with independent LSB modifications
+        """
+        decoded = DecodedImage.from_source(image_bytes)
+        return [variant.to_bytes() for variant in self.process_image_variants(decoded, count or 1)]
+
+    def process_image_variants(self, decoded: DecodedImage, count: int) -> list:
+        """
+        Generate LSB variants that share one decoded pixel array.
+
+        Args:
+            decoded: Decoded source image
+            count: Number of variants
+
+        Returns:
+            List of DecodedImage variants
+        """
+        img = decoded.img
+
+        # Read-only view of the pixels, each variant works on its own copy
+        img_array = np.asarray(img)
 
+        # Don't modify alpha channel
+        bands = img.getbands()
+        channels_to_modify = min(len(bands) - (1 if "A" in bands else 0), 3)
+
+        variants = []
+        for _ in range(count):
+            modified = self._flip_bits(img_array, channels_to_modify)
+
+            variant = decoded.copy()
+            variant.img = self._to_image(img, modified)
+            if not variant.is_png:
+                variant.exif = generate_random_metadata()
+                variant.quality = 95
+            variants.append(variant)
+
+        return variants
+
+    def _to_image(self, img: Image.Image, modified: np.ndarray) -> Image.Image:
+        """
+        Image with the modified pixels and the source's mode.
+
+        Args:
+            img: Source image (not modified)
+            modified: Pixels returned by _flip_bits
+
+        Returns:
+            New image (palette and transparency of "P" images are kept)
+        """
+        if modified.dtype == np.bool_:
+            # 1-bit pixels: fromarray packs the bits
+            return Image.fromarray(modified)
+        variant_img = img.copy()
+        variant_img.frombytes(modified.tobytes())
+        return variant_img
+
+    def _flip_bits(self, img_array: np.ndarray, channels_to_modify: int) -> np.ndarray:
+        """
+        Flip low bits of random pixels.
+
+        The ±1 toggle (even +1, odd -1) is exactly an XOR with 1, and the
+        optional second-bit ±2 toggle is an XOR with 2, so no clamping is
+        needed. Each selected pixel is toggled once.
+
+        Args:
+            img_array: Source pixels (not modified)
+            channels_to_modify: Number of leading color channels to touch
+
+        Returns:
+            Modified copy of the pixels
+        """
+        height, width = img_array.shape[:2]
+        total_pixels = height * width
         pixels_to_modify = max(1, int(total_pixels * self.modification_percent / 100))
 
-        # Generate random positions to modify
-        y_positions = np.random.randint(0, img_array.shape[0], pixels_to_modify)
-        x_positions = np.random.randint(0, img_array.shape[1], pixels_to_modify)
-
-        # Generate random modifications (+1 or -1 for LSB)
-        for i in range(pixels_to_modify):
-            y, x = y_positions[i], x_positions[i]
-
-            if len(img_array.shape) == 3:
-                # Modify each color channel independently
-                for c in range(channels_to_modify):
-                    current_value = int(img_array[y, x, c])
-                    # Flip LSB: if even, add 1; if odd, subtract 1
-                    if current_value % 2 == 0:
-                        new_value = min(255, current_value + 1)
-                    else:
-                        new_value = max(0, current_value - 1)
-
-                    # For more modification, also flip second bit sometimes
-                    if self.bits_to_modify > 1 and random.random() < 0.3:
-                        if (new_value >> 1) % 2 == 0:
-                            new_value = min(255, new_value + 2)
-                        else:
-                            new_value = max(0, new_value - 2)
-
-                    img_array[y, x, c] = new_value
-            else:
-                # Grayscale image
-                current_value = int(img_array[y, x])
-                if current_value % 2 == 0:
-                    new_value = min(255, current_value + 1)
-                else:
-                    new_value = max(0, current_value - 1)
-                img_array[y, x] = new_value
-
-        # Convert back to PIL Image
-        modified_img = Image.fromarray(img_array.astype(np.uint8), mode=original_mode)
-
-        # Apply ICC profile
-        modified_img = apply_icc_profile(modified_img, icc_profile)
-
-        # Save with appropriate format
-        if original_format.upper() == "PNG":
-            return save_image(modified_img, "PNG", preserve_alpha=has_alpha)
+        # Random pixel positions
+        positions = np.unique(np.random.randint(0, total_pixels, pixels_to_modify))
+        y_positions, x_positions = np.divmod(positions, width)
+
+        modified = img_array.copy()
+
+        if img_array.ndim == 3:
+            # Modify each color channel independently
+            masks = np.ones((len(positions), channels_to_modify), dtype=img_array.dtype)
+            if self.bits_to_modify > 1:
+                # For more modification, also flip second bit sometimes
+                second_bit = np.random.random(masks.shape) < 0.3
+                masks |= second_bit.astype(img_array.dtype) << 1
+            modified[y_positions, x_positions, :channels_to_modify] ^= masks
+        elif img_array.dtype == np.bool_:
+            # 1-bit image: the only bit is toggled
+            modified[y_positions, x_positions] = ~modified[y_positions, x_positions]
         else:
-            exif_bytes = generate_random_metadata()
-            return save_image(modified_img, "JPEG", quality=95, exif_bytes=exif_bytes)
+            # Grayscale image
+            modified[y_positions, x_positions] ^= 1
+
+        return modified
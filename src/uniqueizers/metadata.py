@@ -5,13 +5,12 @@ Replaces EXIF/IPTC/XMP metadata with random values.
 Does not modify pixel data.
 """
 
-import io
-import io
 from .base import BaseUniqueizer
-from src.utils.metadata import generate_random_metadata, apply_metadata
-from src.utils.image import load_image, save_image, get_icc_profile, apply_icc_profile
-from PIL import PngImagePlugin
-from PIL import PngImagePlugin
+from src.utils.metadata import generate_random_metadata
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
+from src.utils.png_metadata import generate_png_text
+from src.utils.png_chunks import is_png, replace_chunks, make_text_chunk, TEXT_CHUNKS
 
 
 class MetadataUniqueizer(BaseUniqueizer):
@@ -37,43 +36,36 @@ class MetadataUniqueizer(BaseUniqueizer):
         Returns:
             Image with new random metadata
         """
-        # Load and detect format
-        img, original_format = load_image(image_bytes)
+        if is_png(image_bytes):
+            # Metadata-only change: swap text/time/EXIF chunks, IDAT and
+            # iCCP stay untouched
+            try:
+                return replace_chunks(
+                    image_bytes,
+                    [make_text_chunk(key, value) for key, value in generate_png_text().items()],
+                    drop_types=TEXT_CHUNKS | {b"tIME", b"eXIf"},
+                )
+            except ValueError:
+                pass
+        elif is_jpeg(image_bytes):
+            # Metadata-only change: swap EXIF and drop XMP/IPTC/comments in
+            # the container, image data and ICC (APP2) stay untouched
+            try:
+                return replace_exif(image_bytes, generate_random_metadata())
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
 
-        # Preserve ICC profile
-        icc_profile = get_icc_profile(image_bytes)
-
-        if original_format.upper() == "PNG":
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        # ICC profile is carried by the decoded image and preserved on encode
+        if decoded.is_png:
             # PNG: add text metadata chunks (tEXt, iTXt)
-            from src.utils.png_metadata import add_png_metadata
-            img = add_png_metadata(img)
-            img = apply_icc_profile(img, icc_profile)
-            
-            # Save with PNG metadata
-            output = io.BytesIO()
-            pnginfo = None
-            if hasattr(img, 'info'):
-                if isinstance(img.info, PngImagePlugin.PngInfo):
-                    pnginfo = img.info
-                elif isinstance(img.info, dict) and 'pnginfo' in img.info:
-                    pnginfo = img.info['pnginfo']
-            
-            if pnginfo:
-                img.save(output, format="PNG", pnginfo=pnginfo, optimize=False)
-            else:
-                img.save(output, format="PNG", optimize=False)
-            output.seek(0)
-            return output.getvalue()
+            decoded.png_text = generate_png_text()
         else:
             # JPEG: generate new metadata and apply it (don't remove, just replace)
-            new_exif = generate_random_metadata()
-            
-            # Apply new metadata directly to image
-            output = io.BytesIO()
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            
-            img = apply_icc_profile(img, icc_profile)
-            img.save(output, format="JPEG", quality=95, exif=new_exif)
-            output.seek(0)
-            return output.getvalue()
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
+            decoded.exif = generate_random_metadata()
+        
+        return decoded
@@ -6,7 +6,7 @@ Modifies MeteringMode field in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 import piexif
 import random
 
@@ -40,26 +40,26 @@ class MeteringModeUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified metering mode
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random metering mode
         metering_mode = random.choice(list(self.METERING_MODES.keys()))
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("MeteringMode", str(metering_mode))
-            pnginfo.add_text("MeteringModeDesc", self.METERING_MODES[metering_mode])
-            
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
+            decoded.update_png_text({
+                "MeteringMode": str(metering_mode),
+                "MeteringModeDesc": self.METERING_MODES[metering_mode],
+            })
             
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 exif_dict = {
@@ -71,6 +71,6 @@ class MeteringModeUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
+            decoded.exif = exif_bytes
+        
+        return decoded
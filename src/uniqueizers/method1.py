@@ -8,13 +8,11 @@ Method 1: Simple uniqueization (from bot.py)
 """
 
 import random
-import io
 import string
-from PIL import Image, ImageEnhance
 import piexif
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image, get_icc_profile, apply_icc_profile
+from src.utils.image import DecodedImage, adjust_color
 from src.utils.metadata import generate_random_metadata
 
 
@@ -35,14 +33,20 @@ class Method1Uniqueizer(BaseUniqueizer):
     - EXIF metadata replacement
     """
 
+    preserves_geometry = False
+
     def process(self, image_bytes: bytes) -> bytes:
         """Process image with method 1."""
         try:
-            input_buffer = io.BytesIO(image_bytes)
-            img = Image.open(input_buffer)
-            original_format = img.format or "JPEG"
-            icc_profile = get_icc_profile(image_bytes)
+            return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+        except Exception:
+            # Fallback: return original
+            return image_bytes
 
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        try:
+            img = decoded.img
             if img.mode != 'RGB':
                 img = img.convert('RGB')
 
@@ -58,16 +62,14 @@ class Method1Uniqueizer(BaseUniqueizer):
                 ))
 
             # Color and brightness enhancement
-            img = ImageEnhance.Color(img).enhance(random.uniform(0.98, 1.02))
-            img = ImageEnhance.Brightness(img).enhance(random.uniform(0.98, 1.02))
+            saturation = random.uniform(0.98, 1.02)
+            brightness = random.uniform(0.98, 1.02)
+            img = adjust_color(img, brightness=brightness, saturation=saturation)
 
-            # Apply ICC profile
-            img = apply_icc_profile(img, icc_profile)
+            decoded.img = img
 
-            # Save with metadata
-            if original_format == 'PNG':
-                return save_image(img, "PNG", preserve_alpha=False)
-            else:
+            # Replace metadata
+            if decoded.format != 'PNG':
                 # Generate EXIF metadata
                 try:
                     exif_dict = {
@@ -83,9 +85,11 @@ class Method1Uniqueizer(BaseUniqueizer):
                 except:
                     exif_bytes = generate_random_metadata()
                 
-                return save_image(img, "JPEG", quality=100, exif_bytes=exif_bytes)
+                decoded.exif = exif_bytes
+                decoded.quality = 100
+            return decoded
 
         except Exception as e:
-            # Fallback: return original with new metadata
-            return image_bytes
+            # Fallback: return original unchanged
+            return decoded
 
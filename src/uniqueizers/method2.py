@@ -2,7 +2,7 @@
 """
 Method 2: Advanced uniqueization (from main.py)
 - Edge crop (sides: 2-2.5%, top/bottom: 2-2.5%)
-- Scale jitter (±3%)
+- Scale jitter (±3%, merged with the edge crop into one resample)
 - Gamma and contrast tweaks
 - Mirroring (for some variants)
 - Rounded corners (for some variants)
@@ -13,12 +13,14 @@ Method 2: Advanced uniqueization (from main.py)
 import random
 import string
 import io
+from functools import lru_cache
+
 import numpy as np
 from PIL import Image, ImageEnhance, ImageOps, ImageDraw, ImageFilter
-import pytesseract
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image, get_icc_profile, apply_icc_profile
+from src.utils.image import DecodedImage
+from src.utils.logo_detection import detect_text
 
 # Parameters
 # Edge crop: sides 2-2.5%, top/bottom 2-2.5%
@@ -38,16 +40,11 @@ ADJ = ["misty", "brave", "silent", "swift", "fuzzy", "vivid", "amber", "frosty",
 NOUN = ["lynx", "falcon", "fox", "wolf", "otter", "sparrow", "orca", "panda",
         "tiger", "eagle", "koala", "gecko", "owl", "yak", "marten", "ibis"]
 
-# Setup Tesseract if available
-try:
-    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-except:
-    pass
-
-
-def exif_correct(img):
-    """Correct EXIF orientation."""
+def exif_correct(img, exif_bytes=None):
+    """Correct EXIF orientation (optionally from EXIF carried outside img.info)."""
     try:
+        if exif_bytes is not None:
+            img.info["exif"] = exif_bytes
         return ImageOps.exif_transpose(img)
     except Exception:
         return img
@@ -90,24 +87,76 @@ def apply_gamma(img, gamma):
     return Image.merge("RGB", (r, g, b))
 
 
+def compile_tone_lut(img, gamma, blend_alpha, c_factor):
+    """
+    Fold gamma, blend and contrast into one 256-entry table.
+    
+    Equivalent to Image.blend(img, apply_gamma(img, gamma), blend_alpha)
+    followed by ImageEnhance.Contrast(...).enhance(c_factor). The contrast
+    pivot (mean luminance of the blended image) is derived from the
+    source histogram pushed through the blend table, so no intermediate
+    image is needed.
+    
+    Args:
+        img: RGB image
+        gamma: Gamma exponent
+        blend_alpha: Weight of the gamma-corrected image
+        c_factor: Contrast factor
+        
+    Returns:
+        Per-channel lookup table (768 entries) for Image.point()
+    """
+    levels = np.arange(256, dtype=np.float32)
+    
+    # Gamma (same rounding as apply_gamma)
+    gamma_lut = np.clip(np.floor((levels / 255.0) ** gamma * 255 + 0.5), 0, 255).astype(np.float32)
+    
+    # Image.blend truncates: in1 + alpha * (in2 - in1)
+    blended = np.floor(levels + np.float32(blend_alpha) * (gamma_lut - levels))
+    
+    # Mean luminance of the blended image (ImageEnhance.Contrast pivot)
+    hist = np.asarray(img.histogram(), dtype=np.float64).reshape(3, 256)
+    pixel_count = max(1.0, hist[0].sum())
+    channel_means = (hist * blended).sum(axis=1) / pixel_count
+    mean = int(0.299 * channel_means[0] + 0.587 * channel_means[1] + 0.114 * channel_means[2] + 0.5)
+    
+    # Contrast: blend from the flat mean image, truncated and clipped
+    contrasted = np.clip(np.floor(mean + np.float32(c_factor) * (blended - mean)), 0, 255)
+    
+    return contrasted.astype(np.uint8).tolist() * 3
+
+
 def tweak_shadows_and_contrast(img):
-    """Tweak shadows and contrast."""
+    """Tweak shadows and contrast (single LUT pass)."""
     gamma = 1.0 + random.uniform(-GAMMA_DELTA, GAMMA_DELTA)
-    g_img = apply_gamma(img, gamma)
-    img = Image.blend(img.convert("RGB"), g_img.convert("RGB"), 0.7)
     c_factor = 1.0 + random.uniform(-CONTRAST_DELTA, CONTRAST_DELTA)
-    img = ImageEnhance.Contrast(img).enhance(c_factor)
-    return img
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.point(compile_tone_lut(img, gamma, 0.7, c_factor))
 
 
-def slight_scale(img):
-    """Apply slight scale jitter."""
-    w, h = img.size
+def scale_jitter_box(box, w, h):
+    """Apply slight scale jitter to a crop box.
+
+    Scales the box about its centre by 1/(1 ± SCALE_JITTER), so resampling
+    it back to the crop size zooms in or out slightly. The box is shifted
+    (and if needed shrunk) to stay inside the w x h image.
+    """
     factor = 1.0 + random.uniform(-SCALE_JITTER, SCALE_JITTER)
-    nw = max(1, int(round(w * factor)))
-    nh = max(1, int(round(h * factor)))
-    scaled = img.resize((nw, nh), Image.Resampling.LANCZOS)
-    return scaled.resize((w, h), Image.Resampling.LANCZOS)
+    left, top, right, bottom = box
+    half_w = min((right - left) / (2 * factor), w / 2)
+    half_h = min((bottom - top) / (2 * factor), h / 2)
+    cx = min(max((left + right) / 2, half_w), w - half_w)
+    cy = min(max((top + bottom) / 2, half_h), h - half_h)
+    return cx - half_w, cy - half_h, cx + half_w, cy + half_h
+
+
+def crop_and_scale(img):
+    """Edge crop plus scale jitter in a single LANCZOS resample."""
+    w, h = img.size
+    left, top, right, bottom = random_edge_crop_box(w, h)
+    source_box = scale_jitter_box((left, top, right, bottom), w, h)
+    return img.resize((right - left, bottom - top), Image.Resampling.LANCZOS, box=source_box)
 
 
 def apply_rounded_corners(img, radius_frac, keep_alpha):
@@ -136,13 +185,9 @@ def random_slug():
     return "{}-{}-{}".format(a, n, tail)
 
 
-def is_logo(img):
-    """Detect if image contains text/logo."""
-    try:
-        text = pytesseract.image_to_string(img)
-        return len(text.strip()) > 3
-    except:
-        return False
+def is_logo(img, key=None):
+    """Detect if image contains text/logo (pre-filtered and memoized by key)."""
+    return detect_text(img, key)
 
 
 def transform_logo(img):
@@ -150,10 +195,14 @@ def transform_logo(img):
     img = ImageEnhance.Brightness(img).enhance(random.uniform(0.9, 1.1))
     img = ImageEnhance.Contrast(img).enhance(random.uniform(0.9, 1.1))
     
-    arr = np.array(img)
-    noise = np.random.normal(0, 8, arr.shape).astype(np.int16)
-    arr = np.clip(arr.astype(np.int16) + noise, 0, 255).astype(np.uint8)
-    img = Image.fromarray(arr)
+    # Gaussian noise (sigma 8, truncated to integers) in one float32 buffer
+    arr = np.asarray(img)
+    noisy = np.random.default_rng().standard_normal(arr.shape, dtype=np.float32)
+    noisy *= 8
+    np.trunc(noisy, out=noisy)
+    noisy += arr
+    np.clip(noisy, 0, 255, out=noisy)
+    img = Image.fromarray(noisy.astype(np.uint8))
     
     if random.random() < 0.5:
         img = img.filter(ImageFilter.GaussianBlur(radius=random.uniform(0.3, 0.8)))
@@ -166,14 +215,34 @@ def transform_logo(img):
     return img
 
 
+@lru_cache(maxsize=8)
+def _wave_row_groups(h, w):
+    """
+    Row-shift map for the wave, cached per (h, w).
+    
+    Row y is rolled right by int(5 * sin(2*pi*y / 60)) pixels. Only 11
+    distinct shifts exist, so rows are grouped by shift and each group is
+    remapped with one vectorized roll.
+    
+    Returns:
+        Tuple of (shift, row indices) pairs
+    """
+    shifts = (5.0 * np.sin(2 * np.pi * np.arange(h) / 60.0)).astype(np.int32)
+    groups = []
+    for shift in np.unique(shifts):
+        rows = np.flatnonzero(shifts == shift)
+        rows.flags.writeable = False
+        groups.append((int(shift) % w, rows))
+    return tuple(groups)
+
+
 def _wave_distort(img):
     """Apply wave distortion for text."""
     w, h = img.size
-    arr = np.array(img)
-    result = np.zeros_like(arr)
-    for y in range(h):
-        shift = int(5.0 * np.sin(2 * np.pi * y / 60.0))
-        result[y] = np.roll(arr[y], shift, axis=0)
+    arr = np.asarray(img)
+    result = np.empty_like(arr)
+    for shift, rows in _wave_row_groups(h, w):
+        result[rows] = np.roll(arr[rows], shift, axis=1)
     return Image.fromarray(result)
 
 
@@ -190,6 +259,8 @@ class Method2Uniqueizer(BaseUniqueizer):
     - PNG/JPEG format mix (3 PNG, 3 JPEG)
     """
 
+    preserves_geometry = False
+
     def __init__(self, variants=6, mirrored_count=2, rounded_count=2, png_count=3):
         """
         Initialize method 2 uniqueizer.
@@ -212,6 +283,10 @@ class Method2Uniqueizer(BaseUniqueizer):
         """
         return self.process_variants(image_bytes, count=1)[0]
 
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        return self.process_image_variants(decoded, count=1)[0]
+
     def process_variants(self, image_bytes: bytes, count: int = None) -> list:
         """
         Process image and return multiple variants.
@@ -223,14 +298,31 @@ class Method2Uniqueizer(BaseUniqueizer):
         Returns:
             List of processed image bytes
         """
+        variants = self.process_image_variants(DecodedImage.from_source(image_bytes), count)
+        return [variant.to_bytes() for variant in variants]
+
+    def process_image_variants(self, decoded: DecodedImage, count: int = None) -> list:
+        """
+        Stage API version of process_variants().
+        
+        Args:
+            decoded: Decoded source image (left unchanged)
+            count: Number of variants (default: self.variants)
+            
+        Returns:
+            List of DecodedImage variants
+        """
         if count is None:
             count = self.variants
             
-        img, original_format = load_image(image_bytes)
-        img = exif_correct(img.convert("RGB"))
-        icc_profile = get_icc_profile(image_bytes)
-        
-        w, h = img.size
+        source = decoded.source
+        if source is not None and decoded.img is source.img:
+            # Orientation-corrected RGB view, shared by every call on this upload
+            img = source.oriented("RGB")
+            logo_key = source.digest
+        else:
+            img = exif_correct(decoded.img.convert("RGB"), decoded.exif)
+            logo_key = None
         
         # Random selection for variants
         mirror_idx = set(random.sample(range(count), min(self.mirrored_count, count)))
@@ -239,16 +331,12 @@ class Method2Uniqueizer(BaseUniqueizer):
         
         variants = []
         
+        # Logo detection runs at most once per source, on first mirrored variant
+        source_is_logo = None
+        
         for i in range(count):
-            # Create a copy for this variant
-            variant_img = img.copy()
-            
-            # Edge crop
-            box = random_edge_crop_box(w, h)
-            variant_img = variant_img.crop(box)
-            
-            # Scale jitter
-            variant_img = slight_scale(variant_img)
+            # Edge crop and scale jitter (new image, source is untouched)
+            variant_img = crop_and_scale(img)
             
             # Gamma and contrast
             variant_img = tweak_shadows_and_contrast(variant_img)
@@ -256,7 +344,9 @@ class Method2Uniqueizer(BaseUniqueizer):
             # Mirroring
             do_mirror = i in mirror_idx
             if do_mirror:
-                if is_logo(variant_img):
+                if source_is_logo is None:
+                    source_is_logo = is_logo(img, logo_key)
+                if source_is_logo:
                     variant_img = transform_logo(variant_img)
                 else:
                     variant_img = ImageOps.mirror(variant_img)
@@ -268,21 +358,21 @@ class Method2Uniqueizer(BaseUniqueizer):
                 keep_alpha = (fmt.lower() == "png")
                 variant_img = apply_rounded_corners(variant_img, RADIUS_FRAC, keep_alpha)
             
-            # Apply ICC profile
-            variant_img = apply_icc_profile(variant_img, icc_profile)
-            
-            # Save
+            # Output format (ICC profile is carried over from the source)
+            variant = decoded.copy()
             if fmt.lower() == "png":
                 if variant_img.mode not in ("RGB", "RGBA"):
                     variant_img = variant_img.convert("RGBA")
-                variant_bytes = save_image(variant_img, "PNG", preserve_alpha=True)
+                variant.format = "PNG"
+                variant.png_text = None
             else:
                 if variant_img.mode != "RGB":
                     variant_img = variant_img.convert("RGB")
-                q = random.randint(JPEG_Q_MIN, JPEG_Q_MAX)
-                variant_bytes = save_image(variant_img, "JPEG", quality=q)
+                variant.format = "JPEG"
+                variant.exif = None
+                variant.quality = random.randint(JPEG_Q_MIN, JPEG_Q_MAX)
+            variant.img = variant_img
             
-            variants.append(variant_bytes)
+            variants.append(variant)
         
         return variants
-
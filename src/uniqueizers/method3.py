@@ -9,7 +9,7 @@ Method 3: Combined method1 and method2
 from .base import BaseUniqueizer
 from .method1 import Method1Uniqueizer
 from .method2 import Method2Uniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage, adjust_color
 from src.utils.metadata import generate_random_metadata
 import piexif
 import random
@@ -30,6 +30,8 @@ class Method3Uniqueizer(BaseUniqueizer):
     Generates 6 variants with all features combined.
     """
 
+    preserves_geometry = False
+
     def __init__(self, variants=6, mirrored_count=2, rounded_count=2, png_count=3):
         """Initialize method 3 uniqueizer."""
         self.method2 = Method2Uniqueizer(variants, mirrored_count, rounded_count, png_count)
@@ -39,6 +41,10 @@ class Method3Uniqueizer(BaseUniqueizer):
         """Process image - returns first variant."""
         return self.process_variants(image_bytes, count=1)[0]
 
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        return self.process_image_variants(decoded, count=1)[0]
+
     def process_variants(self, image_bytes: bytes, count: int = None) -> list:
         """
         Process image with combined methods.
@@ -50,34 +56,43 @@ class Method3Uniqueizer(BaseUniqueizer):
         Returns:
             List of processed image bytes
         """
+        variants = self.process_image_variants(DecodedImage.from_source(image_bytes), count)
+        return [variant.to_bytes() for variant in variants]
+
+    def process_image_variants(self, decoded: DecodedImage, count: int = None) -> list:
+        """
+        Stage API version of process_variants().
+        
+        Args:
+            decoded: Decoded source image (left unchanged)
+            count: Number of variants (default: self.variants)
+            
+        Returns:
+            List of DecodedImage variants
+        """
         if count is None:
             count = self.variants
         
         # First apply method2 processing (get variants)
-        method2_variants = self.method2.process_variants(image_bytes, count)
+        method2_variants = self.method2.process_image_variants(decoded, count)
         
         # Then apply method1 enhancements to each variant
-        from PIL import ImageEnhance
-        
         combined_variants = []
-        for variant_bytes in method2_variants:
+        for variant in method2_variants:
             try:
-                # Load variant
-                img, original_format = load_image(variant_bytes)
+                img = variant.img
                 
                 # Apply method1 enhancements
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
                 
                 # Additional color and brightness (method1)
-                img = ImageEnhance.Color(img).enhance(random.uniform(0.98, 1.02))
-                img = ImageEnhance.Brightness(img).enhance(random.uniform(0.98, 1.02))
+                saturation = random.uniform(0.98, 1.02)
+                brightness = random.uniform(0.98, 1.02)
+                img = adjust_color(img, brightness=brightness, saturation=saturation)
                 
-                # Save with EXIF (method1)
-                if original_format.upper() == "PNG":
-                    combined_bytes = save_image(img, "PNG", preserve_alpha=True)
-                else:
-                    # Add EXIF metadata
+                # Replace EXIF (method1)
+                if not variant.is_png:
                     try:
                         exif_dict = {
                             "0th": {
@@ -92,12 +107,13 @@ class Method3Uniqueizer(BaseUniqueizer):
                     except:
                         exif_bytes = generate_random_metadata()
                     
-                    combined_bytes = save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+                    variant.exif = exif_bytes
+                    variant.quality = 95
                 
-                combined_variants.append(combined_bytes)
+                variant.img = img
             except Exception:
                 # Fallback to original variant
-                combined_variants.append(variant_bytes)
+                pass
+            combined_variants.append(variant)
         
         return combined_variants
-
@@ -9,10 +9,8 @@ Applies imperceptible pixel modifications:
 
 import random
 
-from PIL import ImageEnhance
-
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image, get_icc_profile, apply_icc_profile, preserve_transparency
+from src.utils.image import DecodedImage, adjust_color, preserve_transparency
 from src.utils.metadata import generate_random_metadata
 
 
@@ -30,6 +28,8 @@ class MicroUniqueizer(BaseUniqueizer):
     SSIM typically >= 0.995
     """
 
+    preserves_geometry = False
+
     def __init__(
         self,
         max_shift: int = 2,
@@ -58,15 +58,14 @@ class MicroUniqueizer(BaseUniqueizer):
         Returns:
             Image with micro-modifications
         """
-        img, original_format = load_image(image_bytes)
-        icc_profile = get_icc_profile(image_bytes)
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        img = decoded.img
 
         # Preserve transparency for PNG
-        has_alpha = img.mode == "RGBA"
-        alpha_channel = None
-        if has_alpha:
-            alpha_channel = img.split()[3]
-            img = preserve_transparency(img)
+        img = preserve_transparency(img)
 
         # Apply subpixel shift (random crop from edges)
         width, height = img.size
@@ -83,43 +82,14 @@ class MicroUniqueizer(BaseUniqueizer):
                 height - (shift - y_offset)
             ))
 
-        # Apply micro brightness adjustment
+        # Apply micro brightness and color adjustment (alpha is kept as is)
         if img.mode in ("RGBA", "RGB", "L"):
-            # For RGBA, we need to handle alpha separately
-            if img.mode == "RGBA":
-                rgb_img = img.convert("RGB")
-                rgb_img = ImageEnhance.Brightness(rgb_img).enhance(
-                    random.uniform(*self.brightness_range)
-                )
-                rgb_img = ImageEnhance.Color(rgb_img).enhance(
-                    random.uniform(*self.color_range)
-                )
-                # Merge back with alpha
-                r, g, b = rgb_img.split()
-                if alpha_channel:
-                    # Resize alpha to match new size
-                    alpha_resized = alpha_channel.resize(img.size)
-                    img = Image.merge("RGBA", (r, g, b, alpha_resized))
-                else:
-                    img = rgb_img.convert("RGBA")
-            else:
-                img = ImageEnhance.Brightness(img).enhance(
-                    random.uniform(*self.brightness_range)
-                )
-                img = ImageEnhance.Color(img).enhance(
-                    random.uniform(*self.color_range)
-                )
-
-        # Apply ICC profile
-        img = apply_icc_profile(img, icc_profile)
-
-        # Save with appropriate format
-        if original_format.upper() == "PNG":
-            return save_image(img, "PNG", preserve_alpha=has_alpha)
-        else:
-            exif_bytes = generate_random_metadata()
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
-# Import Image at module level for merge operation
-from PIL import Image
+            brightness = random.uniform(*self.brightness_range)
+            saturation = random.uniform(*self.color_range)
+            img = adjust_color(img, brightness=brightness, saturation=saturation)
+
+        decoded.img = img
+        if not decoded.is_png:
+            decoded.exif = generate_random_metadata()
+            decoded.quality = 95
+        return decoded
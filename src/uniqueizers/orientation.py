@@ -6,7 +6,8 @@ Modifies Orientation field in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
 import piexif
 import random
 
@@ -38,36 +39,46 @@ class OrientationUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified orientation metadata
         """
-        img, original_format = load_image(image_bytes)
-        
+        if is_jpeg(image_bytes):
+            # EXIF-only change: splice APP1, image data stays untouched
+            try:
+                return replace_exif(image_bytes, self._build_exif(random.choice(list(self.ORIENTATIONS.keys()))))
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random orientation
         orientation = random.choice(list(self.ORIENTATIONS.keys()))
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
-            pnginfo.add_text("Orientation", str(orientation))
+            decoded.update_png_text({
+                "Orientation": str(orientation),
+            })
             
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
-            try:
-                exif_dict = {
-                    "0th": {
-                        piexif.ImageIFD.Orientation: orientation,
-                    }
-                }
-                exif_bytes = piexif.dump(exif_dict)
-            except Exception:
-                from src.utils.metadata import generate_random_metadata
-                exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+            decoded.exif = self._build_exif(orientation)
+        
+        return decoded
 
+    def _build_exif(self, orientation: int) -> bytes:
+        """Build EXIF bytes carrying the orientation."""
+        try:
+            exif_dict = {
+                "0th": {
+                    piexif.ImageIFD.Orientation: orientation,
+                }
+            }
+            exif_bytes = piexif.dump(exif_dict)
+        except Exception:
+            from src.utils.metadata import generate_random_metadata
+            exif_bytes = generate_random_metadata()
+        return exif_bytes
@@ -10,114 +10,209 @@ Based on pixel_bot.py functionality:
 """
 
 import random
-import copy
-import io
+from functools import lru_cache
+
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+
+# Rows blended per step (bounds temporary 16-bit buffers)
+_BLEND_BAND_ROWS = 256
+
+# Pattern font, tried in order (falls back to Pillow's default font)
+FONT_CANDIDATES = ("arial.ttf", "C:/Windows/Fonts/arial.ttf")
+
+# Max number of (font, letter size) glyph atlases kept per process
+GLYPH_ATLAS_CACHE_SIZE = 16
+
+# All symbols
+ALL_SYMBOLS = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "0123456789"
+    "!@#$%^&*()_+-=[]{}|;:,.<>?/~`"
+)
 
 
 def image_to_pixel_array(img):
-    """Convert image to pixel array (colors)."""
+    """Convert image to pixel array (H x W x 3 uint8)."""
     if img.mode != "RGB":
         img = img.convert("RGB")
     
     width, height = img.size
-    pixels = []
-    pixel_data = img.load()
-    
-    for y in range(height):
-        row = []
-        for x in range(width):
-            r, g, b = pixel_data[x, y]
-            row.append([r, g, b])
-        pixels.append(row)
+    pixels = np.asarray(img)
     
     return pixels, width, height
 
 
 def pixel_array_to_image(pixels, width, height):
     """Convert pixel array back to image."""
-    img = Image.new("RGB", (width, height))
-    pixel_data = img.load()
+    return Image.fromarray(np.ascontiguousarray(pixels[:height, :width], dtype=np.uint8), "RGB")
+
+
+class GlyphAtlas:
+    """
+    Pre-rendered coverage masks for every pattern symbol in one font.
     
-    for y in range(height):
-        for x in range(width):
-            if y < len(pixels) and x < len(pixels[y]):
-                r, g, b = pixels[y][x]
-                pixel_data[x, y] = (int(r), int(g), int(b))
+    All masks share one tile size; offset_x/offset_y give the tile origin
+    relative to the ImageDraw.text() anchor.
+    """
     
-    return img
+    def __init__(self, font):
+        probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+        
+        # Get symbol size
+        bbox = probe.textbbox((0, 0), "a", font=font)
+        self.letter_w = bbox[2] - bbox[0]
+        self.letter_h = bbox[3] - bbox[1]
+        
+        # Union of all glyph boxes (+1 px for antialiasing)
+        boxes = [probe.textbbox((0, 0), symbol, font=font) for symbol in ALL_SYMBOLS]
+        left = min(box[0] for box in boxes) - 1
+        top = min(box[1] for box in boxes) - 1
+        right = max(box[2] for box in boxes) + 1
+        bottom = max(box[3] for box in boxes) + 1
+        
+        self.offset_x = left
+        self.offset_y = top
+        self.tile_w = right - left
+        self.tile_h = bottom - top
+        
+        self.masks = np.zeros((len(ALL_SYMBOLS), self.tile_h, self.tile_w), dtype=np.uint8)
+        for i, symbol in enumerate(ALL_SYMBOLS):
+            tile = Image.new("L", (self.tile_w, self.tile_h), 0)
+            ImageDraw.Draw(tile).text((-left, -top), symbol, font=font, fill=255)
+            self.masks[i] = np.asarray(tile)
 
 
-def create_colored_letter_pattern_on_pixels(pixels, width, height, letter_size=8, alpha=255):
-    """Create pattern of random symbols colored to match pixel colors."""
-    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Try to load small font
-    try:
-        font = ImageFont.truetype("arial.ttf", letter_size)
-    except:
+@lru_cache(maxsize=32)
+def _load_font(letter_size):
+    """Resolve the pattern font once per size. Returns (font, font name)."""
+    for path in FONT_CANDIDATES:
         try:
-            font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", letter_size)
-        except:
-            font = ImageFont.load_default()
-            letter_size = 8
-    
-    # All symbols
-    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    digits = "0123456789"
-    special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?/~`"
-    all_symbols = alphabet + digits + special_chars
-    
-    # Get symbol size
-    bbox = draw.textbbox((0, 0), "a", font=font)
-    letter_w = bbox[2] - bbox[0]
-    letter_h = bbox[3] - bbox[1]
-    
-    spacing_x = letter_w + 2
-    spacing_y = letter_h + 2
-    
-    for y in range(0, height, spacing_y):
-        for x in range(0, width, spacing_x):
-            pixel_y = min(y + letter_h // 2, height - 1)
-            pixel_x = min(x + letter_w // 2, width - 1)
+            return ImageFont.truetype(path, letter_size), path
+        except OSError:
+            continue
+    return ImageFont.load_default(), "default"
+
+
+@lru_cache(maxsize=GLYPH_ATLAS_CACHE_SIZE)
+def _build_glyph_atlas(font_name, letter_size):
+    """Build (and cache) the atlas for a font and letter size."""
+    font, _ = _load_font(letter_size)
+    return GlyphAtlas(font)
+
+
+def get_glyph_atlas(letter_size):
+    """Get the cached glyph atlas for a letter size."""
+    _, font_name = _load_font(letter_size)
+    return _build_glyph_atlas(font_name, letter_size)
+
+
+def create_colored_letter_pattern_on_pixels(pixels, width, height, letter_size=8, alpha=255):
+    """
+    Create pattern of random symbols colored to match pixel colors.
+    
+    Symbols are stamped from the glyph atlas with array operations. Cells
+    are split into lattice groups whose tiles can't overlap, so each group
+    is one vectorized stamp. Compositing matches ImageDraw.text() on a
+    transparent RGBA canvas: RGB takes the ink color, alpha is blended by
+    glyph coverage.
+    """
+    atlas = get_glyph_atlas(letter_size)
+    pattern = np.zeros((height, width, 4), dtype=np.uint8)
+    
+    spacing_x = atlas.letter_w + 2
+    spacing_y = atlas.letter_h + 2
+    
+    cell_ys = np.arange(0, height, spacing_y)
+    cell_xs = np.arange(0, width, spacing_x)
+    
+    # Color of each cell: pixel at the symbol center
+    sample_ys = np.minimum(cell_ys + atlas.letter_h // 2, height - 1)
+    sample_xs = np.minimum(cell_xs + atlas.letter_w // 2, width - 1)
+    cell_colors = np.asarray(pixels)[sample_ys[:, None], sample_xs[None, :]]
+    
+    # Random symbol per cell
+    cell_count = len(cell_ys) * len(cell_xs)
+    cell_symbols = np.array(
+        random.choices(range(len(ALL_SYMBOLS)), k=cell_count)
+    ).reshape(len(cell_ys), len(cell_xs))
+    
+    # Lattice step (in cells) so tiles within a group never overlap
+    step_y = -(-atlas.tile_h // spacing_y)
+    step_x = -(-atlas.tile_w // spacing_x)
+    block_h = step_y * spacing_y
+    block_w = step_x * spacing_x
+    
+    for group_y in range(min(step_y, len(cell_ys))):
+        for group_x in range(min(step_x, len(cell_xs))):
+            symbols = cell_symbols[group_y::step_y, group_x::step_x]
+            colors = cell_colors[group_y::step_y, group_x::step_x]
+            rows, cols = symbols.shape
+            
+            # Lay tiles out on a (rows x block_h) x (cols x block_w) canvas
+            canvas = np.zeros((rows, block_h, cols, block_w), dtype=np.uint8)
+            canvas[:, :atlas.tile_h, :, :atlas.tile_w] = atlas.masks[symbols].transpose(0, 2, 1, 3)
+            coverage = canvas.reshape(rows * block_h, cols * block_w)
+            
+            # Canvas origin in image coordinates, clipped to the image
+            origin_y = int(cell_ys[group_y]) + atlas.offset_y
+            origin_x = int(cell_xs[group_x]) + atlas.offset_x
+            y0, y1 = max(0, origin_y), min(height, origin_y + coverage.shape[0])
+            x0, x1 = max(0, origin_x), min(width, origin_x + coverage.shape[1])
+            if y0 >= y1 or x0 >= x1:
+                continue
             
-            r, g, b = pixels[pixel_y][pixel_x]
-            random_symbol = random.choice(all_symbols)
+            mask = coverage[y0 - origin_y:y1 - origin_y, x0 - origin_x:x1 - origin_x]
+            hit = mask > 0
+            if not hit.any():
+                continue
             
-            draw.text((x, y), random_symbol, font=font, fill=(r, g, b, alpha))
+            # Cell color for every canvas pixel
+            color_rows = (np.arange(y0, y1) - origin_y) // block_h
+            color_cols = (np.arange(x0, x1) - origin_x) // block_w
+            region = pattern[y0:y1, x0:x1]
+            region[..., :3][hit] = colors[color_rows[:, None], color_cols[None, :]][hit]
+            
+            # alpha += (ink_alpha - alpha) * coverage / 255, rounded like PIL
+            current = region[..., 3].astype(np.int32)
+            blend = (alpha - current) * mask + 128
+            region[..., 3] = current + ((blend + (blend >> 8)) >> 8)
     
-    return img
+    return Image.fromarray(pattern, "RGBA")
 
 
 def blend_pattern_on_pixels(pixels, width, height, pattern_img):
-    """Blend pattern overlay on pixel array."""
+    """
+    Blend pattern overlay on pixel array (alpha compositing).
+    
+    Works in horizontal bands with 16-bit integer math so peak memory stays
+    a small multiple of the image size. Returns a new array.
+    """
     if pattern_img.mode != "RGBA":
         pattern_img = pattern_img.convert("RGBA")
     
-    pattern_w, pattern_h = pattern_img.size
-    pattern_data = pattern_img.load()
+    pattern = np.asarray(pattern_img)
+    result = np.array(pixels, dtype=np.uint8, copy=True)
     
-    for py in range(min(pattern_h, height)):
-        for px in range(min(pattern_w, width)):
-            pattern_r, pattern_g, pattern_b, pattern_a = pattern_data[px, py]
-            
-            if pattern_a > 0:
-                bg_r, bg_g, bg_b = pixels[py][px]
-                
-                alpha = pattern_a / 255.0
-                inv_alpha = 1.0 - alpha
-                
-                new_r = int(pattern_r * alpha + bg_r * inv_alpha)
-                new_g = int(pattern_g * alpha + bg_g * inv_alpha)
-                new_b = int(pattern_b * alpha + bg_b * inv_alpha)
-                
-                pixels[py][px] = [new_r, new_g, new_b]
+    blend_h = min(pattern.shape[0], height)
+    blend_w = min(pattern.shape[1], width)
+    
+    for y0 in range(0, blend_h, _BLEND_BAND_ROWS):
+        y1 = min(y0 + _BLEND_BAND_ROWS, blend_h)
+        band = pattern[y0:y1, :blend_w]
+        alpha = band[..., 3:4].astype(np.uint16)
+        if not alpha.any():
+            continue
+        bg = result[y0:y1, :blend_w].astype(np.uint16)
+        
+        # pattern * a + bg * (1 - a), truncated like int() on the float result
+        blended = (band[..., :3] * alpha + bg * (255 - alpha)) // 255
+        result[y0:y1, :blend_w] = blended.astype(np.uint8)
     
-    return pixels
+    return result
 
 
 class PixelPatternUniqueizer(BaseUniqueizer):
@@ -134,19 +229,10 @@ class PixelPatternUniqueizer(BaseUniqueizer):
         """Process image - returns alpha 10 version."""
         variants = self.process_variants(image_bytes, count=1)
         return variants[0] if variants else image_bytes
-    
-    def process_variants(self, image_bytes: bytes, count: int = 1) -> list:
-        """
-        Process image and return variant with alpha 10.
-        
-        Args:
-            image_bytes: Original image bytes
-            count: Number of variants (always returns 1 with alpha 10)
-            
-        Returns:
-            List with single processed image bytes (alpha 10)
-        """
-        img, original_format = load_image(image_bytes)
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        img = decoded.img
         
         # Convert to pixel array
         pixels, width, height = image_to_pixel_array(img)
@@ -164,7 +250,7 @@ class PixelPatternUniqueizer(BaseUniqueizer):
         
         # Blend pattern on pixels
         pixels_blended = blend_pattern_on_pixels(
-            copy.deepcopy(pixels), width, height, pattern_img
+            pixels, width, height, pattern_img
         )
         
         # Convert back to image
@@ -175,11 +261,21 @@ class PixelPatternUniqueizer(BaseUniqueizer):
         result_img = enhancer.enhance(1.5)
         result_img = result_img.filter(ImageFilter.SHARPEN)
         
-        # Save
-        if original_format.upper() == "PNG":
-            variant_bytes = save_image(result_img, "PNG", preserve_alpha=True)
-        else:
-            variant_bytes = save_image(result_img, "JPEG", quality=95)
+        decoded.img = result_img
+        if not decoded.is_png:
+            decoded.exif = None
+            decoded.quality = 95
+        return decoded
+    
+    def process_variants(self, image_bytes: bytes, count: int = 1) -> list:
+        """
+        Process image and return variant with alpha 10.
         
-        return [variant_bytes]
-
+        Args:
+            image_bytes: Original image bytes
+            count: Number of variants (always returns 1 with alpha 10)
+            
+        Returns:
+            List with single processed image bytes (alpha 10)
+        """
+        return [self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()]
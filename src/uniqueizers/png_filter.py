@@ -6,7 +6,7 @@ Modifies PNG filter parameter (None, Sub, Up, Average, Paeth, Adaptive)
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
 import random
 
@@ -28,24 +28,24 @@ class PNGFilterUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified PNG filter
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Ensure PNG format
-        if original_format.upper() != "PNG":
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            return save_image(img, "PNG", preserve_alpha=True)
+        if not decoded.is_png:
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            decoded.format = "PNG"
+            return decoded
         
         # PNG filters: None, Sub, Up, Average, Paeth, Adaptive
         # PIL uses adaptive by default, but we can vary the compression
-        if img.mode not in ("RGB", "RGBA"):
-            img = img.convert("RGBA")
+        if decoded.img.mode not in ("RGB", "RGBA"):
+            decoded.img = decoded.img.convert("RGBA")
         
         # Save with different compression levels to simulate filter changes
         # Note: PIL doesn't directly control filter, but compression affects it
         compression_level = random.choice([0, 1, 6, 9])  # Different compression = different filter behavior
         
-        return save_image(img, "PNG", preserve_alpha=True)
-
-
-
+        return decoded
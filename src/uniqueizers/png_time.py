@@ -6,10 +6,10 @@ Modifies tIME chunk (modification time) in PNG metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.png_chunks import is_png, replace_chunks, make_text_chunk, make_time_chunk
 from datetime import datetime, timedelta
 import random
-from PIL.PngImagePlugin import PngInfo
 
 
 class PNGTimeUniqueizer(BaseUniqueizer):
@@ -29,21 +29,56 @@ class PNGTimeUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified tIME chunk
         """
-        img, original_format = load_image(image_bytes)
+        if is_png(image_bytes):
+            # Chunk-level edit: real tIME chunk plus text mirror, IDAT untouched
+            dt = self._random_datetime()
+            text_chunks = [make_text_chunk(key, value) for key, value in self._time_text(dt).items()]
+            try:
+                return replace_chunks(image_bytes, [make_time_chunk(dt)] + text_chunks)
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
+        dt = self._random_datetime()
+        
+        if decoded.is_png:
+            # PNG tIME chunk
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
+            
+            # Note: PIL doesn't directly support tIME chunk modification
+            # This is handled via PNG metadata text chunks as workaround
+            decoded.png_text = dict(decoded.png_text or {})
+            decoded.png_text.update(self._time_text(dt))
+        else:
+            # Convert to PNG first
+            if decoded.img.mode != "RGBA":
+                decoded.img = decoded.img.convert("RGBA")
+            
+            decoded.png_text = dict(decoded.png_text or {})
+            decoded.png_text["tIME"] = f"{dt.year}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+            decoded.format = "PNG"
         
-        # Random datetime within last 2 years
+        return decoded
+
+    def _random_datetime(self) -> datetime:
+        """Random modification time within last 2 years."""
         days_ago = random.randint(1, 730)
         hours_offset = random.randint(0, 23)
         minutes_offset = random.randint(0, 59)
         seconds_offset = random.randint(0, 59)
         
-        dt = datetime.now() - timedelta(
+        return datetime.now() - timedelta(
             days=days_ago,
             hours=hours_offset,
             minutes=minutes_offset,
             seconds=seconds_offset
         )
-        
+
+    def _time_text(self, dt: datetime) -> dict:
+        """Text fields mirroring the tIME chunk."""
         # PNG tIME format: (year, month, day, hour, minute, second)
         time_tuple = (
             dt.year,
@@ -53,35 +88,7 @@ class PNGTimeUniqueizer(BaseUniqueizer):
             dt.minute,
             dt.second
         )
-        
-        if original_format.upper() == "PNG":
-            # PNG tIME chunk
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            # Note: PIL doesn't directly support tIME chunk modification
-            # This is handled via PNG metadata text chunks as workaround
-            pnginfo = PngInfo()
-            pnginfo.add_text("tIME", f"{dt.year}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
-            pnginfo.add_text("ModificationTime", str(time_tuple))
-            
-            # Save with metadata
-            import io
-            output_buffer = io.BytesIO()
-            img.save(output_buffer, format="PNG", pnginfo=pnginfo, optimize=False)
-            output_buffer.seek(0)
-            return output_buffer.getvalue()
-        else:
-            # Convert to PNG first
-            if img.mode != "RGBA":
-                img = img.convert("RGBA")
-            
-            pnginfo = PngInfo()
-            pnginfo.add_text("tIME", f"{dt.year}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
-            
-            import io
-            output_buffer = io.BytesIO()
-            img.save(output_buffer, format="PNG", pnginfo=pnginfo, optimize=False)
-            output_buffer.seek(0)
-            return output_buffer.getvalue()
-
+        return {
+            "tIME": f"{dt.year}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}",
+            "ModificationTime": str(time_tuple),
+        }
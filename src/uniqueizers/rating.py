@@ -6,9 +6,8 @@ Modifies Rating field in XMP/EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from PIL import Image
-from PIL.PngImagePlugin import PngInfo
 import piexif
 import random
 
@@ -30,26 +29,26 @@ class RatingUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified Rating
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random rating: 0-5 stars
         rating = random.randint(0, 5)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            pnginfo = PngInfo()
-            pnginfo.add_text("Rating", str(rating))
-            pnginfo.add_text("XMP:Rating", str(rating))
+            decoded.update_png_text({
+                "Rating": str(rating),
+                "XMP:Rating": str(rating),
+            })
             
-            # Save PNG with metadata
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF - Rating in EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
             try:
                 # Rating is typically stored in UserComment or ImageDescription
@@ -65,7 +64,6 @@ class RatingUniqueizer(BaseUniqueizer):
             except Exception:
                 from src.utils.metadata import generate_random_metadata
                 exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
+            decoded.exif = exif_bytes
+        
+        return decoded
@@ -6,7 +6,9 @@ Modifies image resolution in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
+from src.utils.png_chunks import is_png, replace_chunks, make_phys_chunk
 from src.utils.metadata import generate_random_metadata
 import piexif
 import random
@@ -18,6 +20,9 @@ class ResolutionUniqueizer(BaseUniqueizer):
     
     Changes resolution parameter in EXIF metadata
     """
+
+    # Resolution values in DPI
+    RESOLUTIONS = [72, 96, 150, 200, 300]
     
     def process(self, image_bytes: bytes) -> bytes:
         """
@@ -29,21 +34,46 @@ class ResolutionUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified resolution
         """
-        img, original_format = load_image(image_bytes)
-        
+        # Metadata-only change: edit the container, image data stays untouched.
+        # A value equal to the source's would return the original bytes, so
+        # values are tried in random order until the output differs.
+        resolutions = self.RESOLUTIONS[:]
+        random.shuffle(resolutions)
+        try:
+            for resolution in resolutions:
+                if is_png(image_bytes):
+                    result = replace_chunks(image_bytes, [make_phys_chunk(resolution, resolution)])
+                elif is_jpeg(image_bytes):
+                    result = replace_exif(image_bytes, self._build_exif(resolution, resolution))
+                else:
+                    break
+                if result != image_bytes:
+                    return result
+        except ValueError:
+            pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Convert to RGB if needed
-        if img.mode != "RGB":
-            img = img.convert("RGB")
+        if decoded.img.mode != "RGB":
+            decoded.img = decoded.img.convert("RGB")
         
-        # Random resolution values (72, 96, 150, 200, 300 DPI)
-        resolutions = [72, 96, 150, 200, 300]
-        x_resolution = random.choice(resolutions)
-        y_resolution = x_resolution  # Usually same
+        x_resolution, y_resolution = self._random_resolution()
         
-        # Set DPI in image
-        img.info['dpi'] = (x_resolution, y_resolution)
+        if not decoded.is_png:
+            decoded.exif = self._build_exif(x_resolution, y_resolution)
         
-        # Add EXIF with resolution
+        return decoded
+
+    def _random_resolution(self) -> tuple:
+        """Random (x, y) resolution in DPI."""
+        x_resolution = random.choice(self.RESOLUTIONS)
+        y_resolution = x_resolution  # Usually same
+        return x_resolution, y_resolution
+
+    def _build_exif(self, x_resolution: int, y_resolution: int) -> bytes:
+        """Build EXIF bytes carrying the resolution."""
         try:
             exif_dict = {
                 "0th": {
@@ -55,12 +85,4 @@ class ResolutionUniqueizer(BaseUniqueizer):
             exif_bytes = piexif.dump(exif_dict)
         except:
             exif_bytes = generate_random_metadata()
-        
-        # Save
-        if original_format.upper() == "PNG":
-            return save_image(img, "PNG", preserve_alpha=True)
-        else:
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
-
+        return exif_bytes
@@ -6,7 +6,8 @@ Modifies SubjectDistance field in EXIF metadata
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
+from src.utils.jpeg_segments import is_jpeg, replace_exif
 import piexif
 import random
 from fractions import Fraction
@@ -49,38 +50,48 @@ class SubjectDistanceUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified subject distance
         """
-        img, original_format = load_image(image_bytes)
-        
+        if is_jpeg(image_bytes):
+            # EXIF-only change: splice APP1, image data stays untouched
+            try:
+                return replace_exif(image_bytes, self._build_exif(random.choice(self.SUBJECT_DISTANCES)))
+            except ValueError:
+                pass
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Random subject distance
         distance = random.choice(self.SUBJECT_DISTANCES)
         
-        if original_format.upper() == "PNG":
+        if decoded.is_png:
             # PNG metadata
-            from PIL.PngImagePlugin import PngInfo
-            pnginfo = PngInfo()
             distance_str = f"{distance[0]}/{distance[1]}" if distance[1] != 1 else str(distance[0])
-            pnginfo.add_text("SubjectDistance", distance_str)
+            decoded.update_png_text({
+                "SubjectDistance": distance_str,
+            })
             
-            if img.mode not in ("RGB", "RGBA"):
-                img = img.convert("RGBA")
-            
-            return save_image(img, "PNG", preserve_alpha=True)
+            if decoded.img.mode not in ("RGB", "RGBA"):
+                decoded.img = decoded.img.convert("RGBA")
         else:
             # JPEG EXIF
-            if img.mode != "RGB":
-                img = img.convert("RGB")
+            if decoded.img.mode != "RGB":
+                decoded.img = decoded.img.convert("RGB")
             
-            try:
-                # SubjectDistance tag is 37382 (0x9206)
-                exif_dict = {
-                    "Exif": {
-                        37382: distance,  # SubjectDistance
-                    }
-                }
-                exif_bytes = piexif.dump(exif_dict)
-            except Exception:
-                from src.utils.metadata import generate_random_metadata
-                exif_bytes = generate_random_metadata()
-            
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
+            decoded.exif = self._build_exif(distance)
+        
+        return decoded
 
+    def _build_exif(self, distance: tuple) -> bytes:
+        """Build EXIF bytes carrying the subject distance."""
+        try:
+            # SubjectDistance tag is 37382 (0x9206)
+            exif_dict = {
+                "Exif": {
+                    37382: distance,  # SubjectDistance
+                }
+            }
+            exif_bytes = piexif.dump(exif_dict)
+        except Exception:
+            from src.utils.metadata import generate_random_metadata
+            exif_bytes = generate_random_metadata()
+        return exif_bytes
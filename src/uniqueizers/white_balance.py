@@ -6,7 +6,7 @@ Modifies EXIF white balance parameter
 """
 
 from .base import BaseUniqueizer
-from src.utils.image import load_image, save_image
+from src.utils.image import DecodedImage
 from src.utils.metadata import generate_random_metadata
 import piexif
 import random
@@ -29,11 +29,13 @@ class WhiteBalanceUniqueizer(BaseUniqueizer):
         Returns:
             Processed image with modified white balance
         """
-        img, original_format = load_image(image_bytes)
-        
+        return self.process_image(DecodedImage.from_source(image_bytes)).to_bytes()
+
+    def process_image(self, decoded: DecodedImage) -> DecodedImage:
+        """Stage API version of process()."""
         # Convert to RGB if needed
-        if img.mode != "RGB":
-            img = img.convert("RGB")
+        if decoded.img.mode != "RGB":
+            decoded.img = decoded.img.convert("RGB")
         
         # Random white balance value (0 = Auto, 1 = Manual, etc.)
         white_balance = random.choice([0, 1])
@@ -49,11 +51,7 @@ class WhiteBalanceUniqueizer(BaseUniqueizer):
         except:
             exif_bytes = generate_random_metadata()
         
-        # Save
-        if original_format.upper() == "PNG":
-            return save_image(img, "PNG", preserve_alpha=True)
-        else:
-            return save_image(img, "JPEG", quality=95, exif_bytes=exif_bytes)
-
-
-
+        if not decoded.is_png:
+            decoded.exif = exif_bytes
+        
+        return decoded
@@ -4,27 +4,34 @@ Utility functions package.
 
 from .image import (
     load_image,
+    load_image_reduced,
     save_image,
     get_image_format,
     calculate_ssim,
     create_preview,
     preserve_transparency,
+    DecodedImage,
 )
 from .metadata import (
     remove_metadata,
     generate_random_metadata,
     apply_metadata,
 )
+from .source import SourceAnalysis, get_source
 from .archive import create_zip_archive
 from .filename import generate_random_filename, generate_numbered_filename, normalize_to_photo
 
 __all__ = [
     "load_image",
+    "load_image_reduced",
     "save_image",
     "get_image_format",
     "calculate_ssim",
     "create_preview",
     "preserve_transparency",
+    "DecodedImage",
+    "SourceAnalysis",
+    "get_source",
     "remove_metadata",
     "generate_random_metadata",
     "apply_metadata",
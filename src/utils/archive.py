@@ -3,44 +3,127 @@ ZIP archive utilities for multiple image copies.
 """
 
 import io
+import logging
+import os
+import shutil
+import tempfile
+import time
 import zipfile
-from typing import List, Tuple
+from typing import IO, Iterable, List, Tuple, Union
 
+from src.config import ARCHIVE_SPOOL_MAX_BYTES
 
-def create_zip_archive(images: List[Tuple[bytes, str]]) -> io.BytesIO:
+logger = logging.getLogger(__name__)
+
+# Already-compressed formats, stored without deflate
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+class ArchiveWriter:
+    """
+    Streaming ZIP writer for result archives.
+
+    Entries are written into a spooled temporary file as they are added
+    (kept in memory up to ARCHIVE_SPOOL_MAX_BYTES, then moved to disk), so
+    the archive never needs a second in-memory copy of every output.
+    JPEG and PNG data is already compressed and is stored as is; other
+    files are deflated.
+
+    Example:
+        writer = ArchiveWriter()
+        for image_bytes, filename in copies:
+            writer.add(image_bytes, filename)
+        archive = writer.close()
+    """
+
+    def __init__(self, spool_max_size: int = ARCHIVE_SPOOL_MAX_BYTES):
+        """
+        Initialize archive writer.
+
+        Args:
+            spool_max_size: Archive size kept in memory before spilling to disk
+        """
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_max_size, mode="w+b")
+        self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        self._seen_names = set()
+        self.count = 0
+
+    def add(self, image_bytes: Union[bytes, IO[bytes]], filename: str) -> str:
+        """
+        Add a file to the archive.
+
+        Args:
+            image_bytes: File bytes, or a binary file object that is copied
+                into the archive in chunks (the caller closes it)
+            filename: Name inside the archive (made unique if needed)
+
+        Returns:
+            Name actually used in the archive
+        """
+        # Ensure unique filename in ZIP (zipfile may rename duplicates)
+        original_filename = filename
+        counter = 0
+        while filename in self._seen_names:
+            name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
+            counter += 1
+            filename = f"{name}_{counter}.{ext}" if ext else f"{name}_{counter}"
+            logger.warning(f"Filename collision in ZIP: {original_filename} -> {filename}")
+
+        self._seen_names.add(filename)
+        ext = os.path.splitext(filename)[1].lower()
+        compress_type = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        logger.info(f"Adding to ZIP: {filename} (original: {original_filename})")
+        if isinstance(image_bytes, bytes):
+            self._zip.writestr(filename, image_bytes, compress_type=compress_type)
+        else:
+            info = zipfile.ZipInfo(filename, date_time=time.localtime(time.time())[:6])
+            info.compress_type = compress_type
+            info.external_attr = 0o600 << 16
+            with self._zip.open(info, "w") as entry:
+                shutil.copyfileobj(image_bytes, entry)
+        self.count += 1
+        return filename
+
+    def close(self) -> IO[bytes]:
+        """
+        Finish the archive.
+
+        Returns:
+            File object positioned at the start of the archive
+        """
+        self._zip.close()
+        self._file.seek(0)
+        logger.info(f"ZIP archive created with {self.count} files")
+        return self._file
+
+    def discard(self) -> None:
+        """Abandon the archive and release its storage."""
+        self._zip.close()
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+
+
+def create_zip_archive(images: Iterable[Tuple[Union[bytes, IO[bytes]], str]]) -> IO[bytes]:
     """
     Create a ZIP archive containing multiple images.
 
     Args:
-        images: List of tuples (image_bytes, filename)
+        images: Tuples (image_bytes, filename); image_bytes may be an open
+            binary file (e.g. from CopySet.iter_files())
 
     Returns:
-        BytesIO buffer containing the ZIP archive
+        File object containing the ZIP archive (spooled to disk when large)
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    buffer = io.BytesIO()
-
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        seen_names = set()
-        for image_bytes, filename in images:
-            # Ensure unique filename in ZIP (zipfile may rename duplicates)
-            original_filename = filename
-            counter = 0
-            while filename in seen_names:
-                name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
-                counter += 1
-                filename = f"{name}_{counter}.{ext}" if ext else f"{name}_{counter}"
-                logger.warning(f"Filename collision in ZIP: {original_filename} -> {filename}")
-            
-            seen_names.add(filename)
-            logger.info(f"Adding to ZIP: {filename} (original: {original_filename})")
-            zf.writestr(filename, image_bytes)
-
-    buffer.seek(0)
-    logger.info(f"ZIP archive created with {len(images)} files")
-    return buffer
+    writer = ArchiveWriter()
+    for image_bytes, filename in images:
+        writer.add(image_bytes, filename)
+    return writer.close()
 
 
 def extract_zip_archive(archive_bytes: bytes) -> List[Tuple[bytes, str]]:
@@ -0,0 +1,145 @@
+"""
+Cooperative cancellation for processing jobs.
+
+Cancelling the asyncio side of a job doesn't stop a worker process that
+is already running it, so jobs also carry a CancelToken. The token is a
+marker file: cancel() creates it, and worker code polls for it between
+stages with check_cancelled(), which costs a single stat() call.
+
+Inside a worker, the token of the current job is installed with
+cancel_scope(). check_cancelled() raises JobCancelled, a BaseException,
+so the uniqueizers' broad `except Exception` fallbacks let it through.
+
+A token also carries the job's deadline. When the deadline passes, the
+handler cancels the token with reason "deadline" and keeps the copies that
+finished.
+"""
+
+import asyncio
+import os
+import secrets
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.config import PROCESSING_CANCEL_GRACE
+
+# Marker file of the job running in this (worker) process
+_active_path: Optional[str] = None
+
+
+class JobCancelled(BaseException):
+    """The current job was cancelled (raised inside worker processes)."""
+
+
+class CancelToken:
+    """
+    Cancellation flag shared between the event loop and worker processes.
+
+    Example:
+        token = CancelToken(deadline=loop.time() + 60)
+        await pool.process(method_str, image_bytes, token.path)
+        ...
+        token.cancel()
+        token.close()
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Initialize token.
+
+        Args:
+            deadline: Event loop time after which the job should stop
+                (None = no deadline)
+        """
+        self.path = os.path.join(tempfile.gettempdir(), "cancel_{}".format(secrets.token_hex(8)))
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self._closed = False
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self.reason is not None
+
+    def remaining(self, now: float) -> Optional[float]:
+        """Seconds left until the deadline (None = no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - now)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Signal workers to stop (idempotent; the first reason is kept).
+
+        Args:
+            reason: "cancelled" (the user gave up) or "deadline"
+        """
+        if self.reason is not None:
+            return
+        self.reason = reason
+        if self._closed:
+            # The job is over: no worker is watching the marker
+            return
+        try:
+            with open(self.path, "wb"):
+                pass
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """
+        Remove the marker file (the token can't signal workers afterwards).
+
+        A cancelled job's worker may still be running until its next stage,
+        so the marker of a cancelled token is kept for PROCESSING_CANCEL_GRACE
+        seconds when an event loop is running.
+        """
+        self._closed = True
+        if self.cancelled:
+            try:
+                asyncio.get_running_loop().call_later(PROCESSING_CANCEL_GRACE, _remove, self.path)
+                return
+            except RuntimeError:
+                pass
+        _remove(self.path)
+
+
+def _remove(path: str) -> None:
+    """Delete a marker file if it exists."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def cancel_scope(path: Optional[str]) -> Iterator[None]:
+    """
+    Make check_cancelled() watch a token while a worker job runs.
+
+    Args:
+        path: CancelToken.path of the job (None = not cancellable)
+    """
+    global _active_path
+    previous, _active_path = _active_path, path
+    try:
+        yield
+    finally:
+        _active_path = previous
+
+
+def is_cancelled() -> bool:
+    """Whether the current job's token has been cancelled."""
+    return _active_path is not None and os.path.exists(_active_path)
+
+
+def check_cancelled() -> None:
+    """
+    Stop the current job if its token has been cancelled.
+
+    Raises:
+        JobCancelled: If the token has been cancelled
+    """
+    if is_cancelled():
+        raise JobCancelled()
@@ -0,0 +1,264 @@
+"""
+Storage for generated copies waiting on a preview confirmation.
+
+A preview session can hold up to MAX_COPY_COUNT copies of a large image
+until the user confirms. Keeping them all as bytes pins gigabytes of RAM,
+so copies live in a CopySet instead:
+
+- Small copies stay in memory while the session and global memory quotas
+  allow it.
+- Everything else is spilled to a per-set temporary directory and
+  streamed from there (iter_files()) when the result is sent.
+- Total bytes per set and spilled bytes across all sets are capped; a copy
+  that would exceed a cap raises QuotaExceededError.
+
+Sets are released deterministically with close() (confirm, cancel, expiry);
+if a set is garbage collected without it, a finalizer releases its quota
+and removes the spill directory.
+"""
+
+import io
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+from src.config import (
+    COPY_STORE_INLINE_MAX_BYTES,
+    COPY_STORE_SESSION_MEMORY_MAX_BYTES,
+    COPY_STORE_MEMORY_MAX_BYTES,
+    COPY_STORE_SESSION_MAX_BYTES,
+    COPY_STORE_DISK_MAX_BYTES,
+    COPY_STORE_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(RuntimeError):
+    """A copy doesn't fit into the session or global quota."""
+
+
+def _release(store: "CopyStore", usage: dict) -> None:
+    """Return a set's bytes to the store and delete its spill directory."""
+    store.memory_bytes -= usage["memory"]
+    store.disk_bytes -= usage["disk"]
+    store.open_sets -= 1
+    usage["memory"] = usage["disk"] = 0
+    if usage["dir"]:
+        shutil.rmtree(usage["dir"], ignore_errors=True)
+        usage["dir"] = None
+
+
+class CopySet:
+    """
+    Copies of one session, in memory or spilled to disk.
+
+    Behaves like a read-only list of (image_bytes, filename) tuples, so it
+    can be passed wherever a list of copies is expected.
+
+    Example:
+        with get_copy_store().create() as copies:
+            copies.add(image_bytes, filename)
+            image_bytes, filename = copies[0]
+    """
+
+    def __init__(self, store: "CopyStore"):
+        """
+        Initialize an empty set.
+
+        Args:
+            store: Owning store (tracks global usage)
+        """
+        self._store = store
+        # (bytes, filename, size) in memory, or (path, filename, size) on disk
+        self._items: List[Tuple[Union[bytes, str], str, int]] = []
+        # Shared with the finalizer, which runs on close() or garbage collection
+        self._usage = {"memory": 0, "disk": 0, "dir": None}
+        self._finalizer = weakref.finalize(self, _release, store, self._usage)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the set has been released."""
+        return not self._finalizer.alive
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in memory."""
+        return self._usage["memory"]
+
+    @property
+    def disk_bytes(self) -> int:
+        """Bytes spilled to disk."""
+        return self._usage["disk"]
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the stored copies."""
+        return self.memory_bytes + self.disk_bytes
+
+    def add(self, image_bytes: bytes, filename: str) -> None:
+        """
+        Store a copy.
+
+        Args:
+            image_bytes: Copy bytes
+            filename: Copy filename
+
+        Raises:
+            QuotaExceededError: If the copy exceeds the session or global quota
+            ValueError: If the set is closed
+        """
+        if self.closed:
+            raise ValueError("Copy set is closed")
+
+        size = len(image_bytes)
+        store = self._store
+        if self.nbytes + size > store.session_max_bytes:
+            raise QuotaExceededError(
+                "Session copies exceed {} bytes".format(store.session_max_bytes)
+            )
+
+        if (
+            size <= store.inline_max_bytes
+            and self.memory_bytes + size <= store.session_memory_max_bytes
+            and store.memory_bytes + size <= store.memory_max_bytes
+        ):
+            self._items.append((image_bytes, filename, size))
+            self._usage["memory"] += size
+            store.memory_bytes += size
+            return
+
+        if store.disk_bytes + size > store.disk_max_bytes:
+            raise QuotaExceededError(
+                "Spilled copies exceed {} bytes".format(store.disk_max_bytes)
+            )
+        path = os.path.join(self._spill_dir(), str(len(self._items)))
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+        self._items.append((path, filename, size))
+        self._usage["disk"] += size
+        store.disk_bytes += size
+
+    def _spill_dir(self) -> str:
+        """Temporary directory for this set, created on first spill."""
+        if self._usage["dir"] is None:
+            self._usage["dir"] = tempfile.mkdtemp(prefix="copies_", dir=self._store.spill_dir)
+            logger.info("Spilling copies to %s", self._usage["dir"])
+        return self._usage["dir"]
+
+    def open(self, index: int) -> IO[bytes]:
+        """
+        Open a copy for streaming (a spilled copy is not read into memory).
+
+        Args:
+            index: Copy index
+
+        Returns:
+            Binary file object; the caller closes it
+        """
+        data, _, _ = self._items[index]
+        if isinstance(data, str):
+            return open(data, "rb")
+        return io.BytesIO(data)
+
+    def iter_files(self) -> Iterator[Tuple[IO[bytes], str]]:
+        """
+        Iterate over copies as open files, for streaming into an archive.
+
+        Each file is closed when the next one is requested.
+
+        Yields:
+            (binary file object, filename)
+        """
+        for index in range(len(self._items)):
+            with self.open(index) as f:
+                yield f, self._items[index][1]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index: int) -> Tuple[bytes, str]:
+        data, filename, _ = self._items[index]
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                data = f.read()
+        return data, filename
+
+    def __iter__(self) -> Iterator[Tuple[bytes, str]]:
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def close(self) -> None:
+        """Release memory and delete spilled files (idempotent)."""
+        self._items.clear()
+        self._finalizer()
+
+    def __enter__(self) -> "CopySet":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class CopyStore:
+    """
+    Creates copy sets and enforces the global quotas across them.
+
+    Example:
+        copies = get_copy_store().create()
+        ...
+        copies.close()
+    """
+
+    def __init__(
+        self,
+        inline_max_bytes: int = COPY_STORE_INLINE_MAX_BYTES,
+        session_memory_max_bytes: int = COPY_STORE_SESSION_MEMORY_MAX_BYTES,
+        memory_max_bytes: int = COPY_STORE_MEMORY_MAX_BYTES,
+        session_max_bytes: int = COPY_STORE_SESSION_MAX_BYTES,
+        disk_max_bytes: int = COPY_STORE_DISK_MAX_BYTES,
+        spill_dir: Optional[str] = COPY_STORE_DIR or None,
+    ):
+        """
+        Initialize copy store.
+
+        Args:
+            inline_max_bytes: Largest copy kept in memory
+            session_memory_max_bytes: Memory per set
+            memory_max_bytes: Memory across all sets
+            session_max_bytes: Total bytes (memory + disk) per set
+            disk_max_bytes: Spilled bytes across all sets
+            spill_dir: Parent directory for spill files (None = system temp)
+        """
+        self.inline_max_bytes = inline_max_bytes
+        self.session_memory_max_bytes = session_memory_max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self.session_max_bytes = session_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.spill_dir = spill_dir
+
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.open_sets = 0
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def create(self) -> CopySet:
+        """Create an empty copy set."""
+        self.open_sets += 1
+        return CopySet(self)
+
+
+_store: Optional[CopyStore] = None
+
+
+def get_copy_store() -> CopyStore:
+    """Get the shared copy store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = CopyStore()
+    return _store
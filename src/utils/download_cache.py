@@ -0,0 +1,201 @@
+"""
+Download cache for Telegram media.
+
+Users often re-send the same photo to try another method. Telegram gives
+every file a stable file_unique_id, so downloaded bytes are cached under
+it and a re-upload skips get_file/download entirely. The bytes are
+identical, so workers also hit their decoded-source cache.
+
+Two tiers:
+- Memory: LRU bounded by total bytes.
+- Disk (optional, DOWNLOAD_CACHE_DIR): entries evicted from memory are
+  written here, bounded by total bytes with oldest-first eviction.
+"""
+
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Optional
+
+from src.config import (
+    DOWNLOAD_CACHE_MAX_BYTES,
+    DOWNLOAD_CACHE_DIR,
+    DOWNLOAD_CACHE_DISK_MAX_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# file_unique_id is URL-safe base64; anything else is not used as a filename
+_VALID_KEY = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class DownloadCache:
+    """
+    Byte-bounded LRU of downloaded files keyed by file_unique_id.
+
+    Example:
+        data = cache.get(photo.file_unique_id)
+        if data is None:
+            data = await download(...)
+            cache.put(photo.file_unique_id, data)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DOWNLOAD_CACHE_MAX_BYTES,
+        disk_dir: Optional[str] = DOWNLOAD_CACHE_DIR or None,
+        disk_max_bytes: int = DOWNLOAD_CACHE_DISK_MAX_BYTES,
+    ):
+        """
+        Initialize download cache.
+
+        Args:
+            max_bytes: Memory tier size limit
+            disk_dir: Directory for the disk tier (None = memory only)
+            disk_max_bytes: Disk tier size limit
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        """Index files already in the disk tier, oldest first."""
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.disk_dir):
+                path = os.path.join(self.disk_dir, name)
+                if _VALID_KEY.match(name) and os.path.isfile(path):
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, name, stat.st_size))
+            for _, name, size in sorted(entries):
+                self._disk[name] = size
+                self._disk_bytes += size
+            self._trim_disk()
+        except OSError as e:
+            logger.warning("Download cache disk tier disabled: %s", e)
+            self.disk_dir = None
+
+    def _disk_path(self, key: str) -> str:
+        """Disk tier file for a key."""
+        return os.path.join(self.disk_dir, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up cached bytes.
+
+        Args:
+            key: Telegram file_unique_id
+
+        Returns:
+            File bytes, or None on a miss
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        if self.disk_dir and key in self._disk:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                self._drop_disk(key)
+            else:
+                self.hits += 1
+                self._drop_disk(key)
+                self._put_memory(key, data)
+                return data
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store downloaded bytes.
+
+        Args:
+            key: Telegram file_unique_id
+            data: File bytes
+        """
+        if not key or not _VALID_KEY.match(key) or len(data) > self.max_bytes:
+            return
+        self._put_memory(key, data)
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        """Insert into the memory tier, spilling LRU entries to disk."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._put_disk(evicted_key, evicted)
+
+    def _put_disk(self, key: str, data: bytes) -> None:
+        """Write an entry to the disk tier (if enabled)."""
+        if not self.disk_dir or len(data) > self.disk_max_bytes:
+            return
+        try:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            logger.warning("Download cache write failed: %s", e)
+            return
+        self._drop_disk(key, remove=False)
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        self._trim_disk()
+
+    def _drop_disk(self, key: str, remove: bool = True) -> None:
+        """Forget (and optionally delete) a disk tier entry."""
+        size = self._disk.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        if remove:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _trim_disk(self) -> None:
+        """Delete the oldest disk entries beyond the size limit."""
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            self._drop_disk(next(iter(self._disk)))
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        for key in list(self._disk):
+            self._drop_disk(key)
+
+
+_cache: Optional[DownloadCache] = None
+
+
+def get_download_cache() -> DownloadCache:
+    """Get the shared download cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = DownloadCache()
+    return _cache
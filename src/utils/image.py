@@ -3,11 +3,13 @@ Image processing utilities.
 """
 
 import io
-from typing import Tuple, Optional
+import logging
+from typing import Dict, Tuple, Optional
 
 from PIL import Image
 from PIL import PngImagePlugin
-import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 def load_image(image_bytes: bytes) -> Tuple[Image.Image, str]:
@@ -26,12 +28,94 @@ def load_image(image_bytes: bytes) -> Tuple[Image.Image, str]:
     return img, original_format
 
 
+# Reduction factors supported by JPEG DCT scaling, largest first
+_REDUCTION_FACTORS = (8, 4, 2, 1)
+
+
+def reduction_factor(size: Tuple[int, int], target_size: int) -> int:
+    """
+    Pick the largest reduction (1/2, 1/4, 1/8) that keeps both sides >= target_size.
+
+    Uses the same rule as JPEG draft decoding, so decoded and already
+    decoded images are reduced by the same factor.
+
+    Args:
+        size: Image (width, height)
+        target_size: Minimum side length after reduction
+
+    Returns:
+        Reduction factor (1, 2, 4 or 8)
+    """
+    scale = min(size[0] // target_size, size[1] // target_size)
+    for factor in _REDUCTION_FACTORS:
+        if scale >= factor:
+            return factor
+    return 1
+
+
+def reduce_image(img: Image.Image, target_size: int) -> Image.Image:
+    """
+    Downscale an already decoded image by a power-of-two box reduction.
+
+    Args:
+        img: PIL Image
+        target_size: Minimum side length after reduction
+
+    Returns:
+        Reduced image (the original image if no reduction applies)
+    """
+    factor = reduction_factor(img.size, target_size)
+    if factor == 1:
+        return img
+    img = preserve_transparency(img)
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGB")
+    return img.reduce(factor)
+
+
+def load_image_reduced(
+    image_bytes: bytes,
+    target_size: int,
+    mode: Optional[str] = None,
+) -> Tuple[Image.Image, str, int]:
+    """
+    Load image at reduced resolution for previews and analysis.
+
+    JPEG is decoded with DCT scaling (1/2, 1/4 or 1/8), so the full-size
+    image is never materialized; other formats are decoded and then
+    box-reduced by the same factor.
+
+    Args:
+        image_bytes: Image as bytes
+        target_size: Minimum side length after reduction
+        mode: Optional target mode (e.g. "L"); JPEG decodes straight to it
+
+    Returns:
+        Tuple of (PIL Image, format string, reduction factor)
+    """
+    img, original_format = load_image(image_bytes)
+    factor = reduction_factor(img.size, target_size)
+
+    if img.format == "JPEG" and img.draft(mode, (target_size, target_size)) is not None:
+        img.load()
+    else:
+        if mode:
+            img = img.convert(mode)
+        img = reduce_image(img, target_size)
+
+    if mode and img.mode != mode:
+        img = img.convert(mode)
+    return img, original_format, factor
+
+
 def save_image(
     img: Image.Image,
     original_format: str,
     quality: int = 95,
     exif_bytes: Optional[bytes] = None,
     preserve_alpha: bool = True,
+    pnginfo: Optional[PngImagePlugin.PngInfo] = None,
+    icc_profile: Optional[bytes] = None,
 ) -> bytes:
     """
     Save image to bytes.
@@ -42,6 +126,9 @@ def save_image(
         quality: JPEG quality (ignored for PNG)
         exif_bytes: Optional EXIF data for JPEG
         preserve_alpha: Whether to preserve alpha channel for PNG
+        pnginfo: Optional PNG text chunks (overrides metadata stored in img.info)
+        icc_profile: ICC profile for PNG, overriding img.info without
+            modifying it (b"" = none; None = use img.info)
 
     Returns:
         Image as bytes
@@ -51,8 +138,7 @@ def save_image(
     if original_format.upper() == "PNG":
         # Preserve RGBA mode for PNG
         # Check if PNG metadata is present
-        pnginfo = None
-        if hasattr(img, 'info'):
+        if pnginfo is None and hasattr(img, 'info'):
             if isinstance(img.info, PngImagePlugin.PngInfo):
                 pnginfo = img.info
             elif isinstance(img.info, dict) and 'pnginfo' in img.info:
@@ -70,16 +156,19 @@ def save_image(
                     pnginfo = img.info['pnginfo']
         
         # Save with metadata
+        save_kwargs = {"format": "PNG", "optimize": False}
+        if icc_profile is not None:
+            save_kwargs["icc_profile"] = icc_profile
         if preserve_alpha and img.mode == "RGBA":
             if pnginfo:
-                img.save(output, format="PNG", pnginfo=pnginfo, optimize=False)
+                img.save(output, pnginfo=pnginfo, **save_kwargs)
             else:
-                img.save(output, format="PNG", optimize=False)
+                img.save(output, **save_kwargs)
         else:
             if pnginfo:
-                img.save(output, format="PNG", pnginfo=pnginfo, optimize=False)
+                img.save(output, pnginfo=pnginfo, **save_kwargs)
             else:
-                img.save(output, format="PNG", optimize=False)
+                img.save(output, **save_kwargs)
     else:
         save_kwargs = {"format": "JPEG", "quality": quality}
         if exif_bytes:
@@ -112,42 +201,25 @@ def calculate_ssim(original_bytes: bytes, processed_bytes: bytes) -> float:
     """
     Calculate SSIM between original and processed images.
 
+    Both images are compared at reduced resolution (see load_image_reduced);
+    SSIM is a structural measure and is stable under downscaling. To score
+    several copies of one original, use QualityGate directly so the
+    original is only analyzed once.
+
     Args:
         original_bytes: Original image bytes
         processed_bytes: Processed image bytes
 
     Returns:
-        SSIM value (0.0 to 1.0)
+        SSIM value (0.0 to 1.0); 0.0 if the images can't be compared
     """
-    try:
-        from skimage.metrics import structural_similarity as ssim
-
-        # Load images
-        orig_img, _ = load_image(original_bytes)
-        proc_img, _ = load_image(processed_bytes)
-
-        # Convert to same size if needed (handle minor crop differences)
-        if orig_img.size != proc_img.size:
-            # Use the smaller dimensions
-            min_width = min(orig_img.width, proc_img.width)
-            min_height = min(orig_img.height, proc_img.height)
-            orig_img = orig_img.crop((0, 0, min_width, min_height))
-            proc_img = proc_img.crop((0, 0, min_width, min_height))
-
-        # Convert to grayscale arrays for SSIM
-        orig_gray = np.array(orig_img.convert("L"))
-        proc_gray = np.array(proc_img.convert("L"))
+    from src.utils.quality import QualityGate
 
-        # Calculate SSIM
-        ssim_value = ssim(orig_gray, proc_gray, data_range=255)
-        return float(ssim_value)
-
-    except ImportError:
-        # If scikit-image not available, return 1.0 (assume quality OK)
-        return 1.0
-    except Exception:
-        # On any error, return 1.0 to not block processing
-        return 1.0
+    try:
+        return QualityGate(original_bytes).ssim(processed_bytes)
+    except Exception as e:
+        logger.warning("SSIM calculation failed: %s", e)
+        return 0.0
 
 
 def create_preview(image_bytes: bytes, max_size: int = 300) -> bytes:
@@ -161,7 +233,7 @@ def create_preview(image_bytes: bytes, max_size: int = 300) -> bytes:
     Returns:
         Preview image as bytes
     """
-    img, original_format = load_image(image_bytes)
+    img, original_format, _ = load_image_reduced(image_bytes, max_size)
 
     # Calculate new size maintaining aspect ratio
     img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
@@ -188,6 +260,62 @@ def preserve_transparency(img: Image.Image) -> Image.Image:
     return img
 
 
+# ITU-R 601-2 luma weights, as used by Pillow's "L" conversion
+_LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def color_matrix(brightness: float = 1.0, saturation: float = 1.0) -> Tuple[float, ...]:
+    """
+    Build an RGB color matrix for a saturation then brightness change.
+
+    Equivalent to ImageEnhance.Color(saturation) followed by
+    ImageEnhance.Brightness(brightness), folded into one 3x3 matrix.
+
+    Args:
+        brightness: Brightness factor (1.0 = unchanged)
+        saturation: Saturation factor (1.0 = unchanged)
+
+    Returns:
+        12-tuple matrix for Image.convert("RGB", matrix)
+    """
+    matrix = []
+    for row in range(3):
+        for col in range(3):
+            value = (1.0 - saturation) * _LUMA_WEIGHTS[col]
+            if row == col:
+                value += saturation
+            matrix.append(brightness * value)
+        matrix.append(0.0)
+    return tuple(matrix)
+
+
+def adjust_color(img: Image.Image, brightness: float = 1.0, saturation: float = 1.0) -> Image.Image:
+    """
+    Apply brightness and saturation in a single color matrix pass.
+
+    The alpha channel, if any, is carried over untouched.
+
+    Args:
+        img: PIL Image (RGB, RGBA or L; other modes are converted to RGB)
+        brightness: Brightness factor (1.0 = unchanged)
+        saturation: Saturation factor (ignored for grayscale)
+
+    Returns:
+        Adjusted image in the same mode
+    """
+    if img.mode == "L":
+        return img.point([min(255, int(v * brightness + 0.5)) for v in range(256)])
+
+    matrix = color_matrix(brightness, saturation)
+    if img.mode == "RGBA":
+        result = img.convert("RGB").convert("RGB", matrix)
+        result.putalpha(img.getchannel("A"))
+        return result
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.convert("RGB", matrix)
+
+
 def get_icc_profile(image_bytes: bytes) -> Optional[bytes]:
     """
     Extract ICC color profile from image.
@@ -223,3 +351,145 @@ def apply_icc_profile(img: Image.Image, icc_profile: Optional[bytes]) -> Image.I
     if icc_profile:
         img.info["icc_profile"] = icc_profile
     return img
+
+
+class DecodedImage:
+    """
+    Decoded image shared between uniqueization stages.
+
+    Carries the pixels together with the container data that the bytes API
+    would otherwise re-read on every step (format, ICC profile, EXIF, PNG
+    text), so a chain of stages decodes once and encodes once.
+
+    Stages return a DecodedImage and may update its fields in place, but
+    must never modify ``img`` pixels in place: variants of one upload share
+    the same source pixels.
+    """
+
+    def __init__(
+        self,
+        img: Image.Image,
+        original_format: str,
+        icc_profile: Optional[bytes] = None,
+        exif: Optional[bytes] = None,
+        png_text: Optional[Dict[str, str]] = None,
+        quality: int = 95,
+        source=None,
+    ):
+        """
+        Initialize decoded image.
+
+        Args:
+            img: PIL Image with the pixel data
+            original_format: Output format (JPEG, PNG)
+            icc_profile: ICC profile bytes
+            exif: EXIF bytes written on JPEG encode
+            png_text: PNG text chunks; None generates random metadata on encode
+            quality: JPEG quality used on encode
+            source: SourceAnalysis the pixels came from, if any
+        """
+        self.img = img
+        self.format = original_format
+        self.icc_profile = icc_profile
+        self.exif = exif
+        self.png_text = png_text
+        self.quality = quality
+        self.source = source
+
+    @classmethod
+    def from_bytes(cls, image_bytes: bytes) -> "DecodedImage":
+        """
+        Decode image bytes.
+
+        Args:
+            image_bytes: Image as bytes
+
+        Returns:
+            DecodedImage holding the decoded pixels and container data
+        """
+        img, original_format = load_image(image_bytes)
+        img.load()
+        # EXIF lives on the DecodedImage so stale tags never leak through img.info
+        exif = img.info.pop("exif", None)
+        return cls(
+            img,
+            original_format,
+            icc_profile=img.info.get("icc_profile"),
+            exif=exif,
+        )
+
+    @classmethod
+    def from_source(cls, image_bytes: bytes) -> "DecodedImage":
+        """
+        Decode original upload bytes through the source analysis cache.
+
+        Use for the original image only; repeat calls with the same bytes
+        share one decode (see src.utils.source).
+
+        Args:
+            image_bytes: Original image bytes
+
+        Returns:
+            DecodedImage backed by the cached source pixels
+        """
+        from src.utils.source import get_source
+
+        return get_source(image_bytes).decoded()
+
+    @property
+    def is_png(self) -> bool:
+        """Whether the image will be encoded as PNG."""
+        return self.format.upper() == "PNG"
+
+    def copy(self) -> "DecodedImage":
+        """
+        Create a shallow copy sharing the same pixels.
+
+        Returns:
+            New DecodedImage with independent container fields
+        """
+        return DecodedImage(
+            self.img,
+            self.format,
+            icc_profile=self.icc_profile,
+            exif=self.exif,
+            png_text=dict(self.png_text) if self.png_text is not None else None,
+            quality=self.quality,
+            source=self.source,
+        )
+
+    def update_png_text(self, fields: Dict[str, str]) -> None:
+        """
+        Add PNG text fields on top of the current (or freshly generated) text.
+
+        Args:
+            fields: Keyword -> text pairs
+        """
+        from src.utils.png_metadata import generate_png_text
+
+        text = dict(self.png_text) if self.png_text is not None else generate_png_text()
+        text.update(fields)
+        self.png_text = text
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode image to bytes.
+
+        Returns:
+            Image as bytes
+        """
+        img = self.img
+        if self.is_png:
+            from src.utils.png_metadata import generate_png_text
+
+            text = self.png_text if self.png_text is not None else generate_png_text()
+            pnginfo = PngImagePlugin.PngInfo()
+            for key, value in text.items():
+                pnginfo.add_text(key, value)
+            # The ICC carried by this stage chain; img.info may belong to the
+            # shared source and is left untouched
+            return save_image(
+                img, "PNG", preserve_alpha=True, pnginfo=pnginfo, icc_profile=self.icc_profile or b"",
+            )
+
+        return save_image(img, "JPEG", quality=self.quality, exif_bytes=self.exif)
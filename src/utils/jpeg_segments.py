@@ -0,0 +1,184 @@
+"""
+JPEG container utilities.
+
+Edits metadata segments (APP1/EXIF etc.) directly in the JPEG byte stream.
+Everything from the SOS marker on (the entropy-coded image data) is copied
+through untouched, so metadata changes cost no decode, no re-encode and no
+generation loss.
+"""
+
+import struct
+from typing import List, Tuple, Iterable
+
+SOI = b"\xff\xd8"
+EXIF_HEADER = b"Exif\x00\x00"
+
+APP0 = 0xE0
+APP1 = 0xE1
+APP13 = 0xED
+COM = 0xFE
+SOS = 0xDA
+EOI = 0xD9
+
+# Metadata segments dropped when EXIF is replaced: XMP (APP1), IPTC (APP13)
+# and comments, so the source's metadata doesn't leak into the output
+METADATA_MARKERS = (APP1, APP13, COM)
+
+# Markers without a length field
+_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+
+# Segment length field is 16 bit and includes itself
+MAX_SEGMENT_PAYLOAD = 0xFFFF - 2
+
+
+def is_jpeg(image_bytes: bytes) -> bool:
+    """
+    Check whether bytes look like a JPEG stream.
+
+    Args:
+        image_bytes: Image bytes
+
+    Returns:
+        True if the data starts with a JPEG SOI marker
+    """
+    return image_bytes[:2] == SOI
+
+
+def split_segments(jpeg_bytes: bytes) -> Tuple[List[Tuple[int, bytes]], bytes]:
+    """
+    Split JPEG into header segments and image data.
+
+    Args:
+        jpeg_bytes: JPEG image bytes
+
+    Returns:
+        Tuple of ([(marker, payload), ...], tail) where tail starts at the
+        SOS (or EOI) marker and contains the entropy-coded data
+
+    Raises:
+        ValueError: If the stream is not a well-formed JPEG header
+    """
+    if not is_jpeg(jpeg_bytes):
+        raise ValueError("Not a JPEG stream")
+
+    segments = []
+    pos = 2
+    size = len(jpeg_bytes)
+
+    while pos < size:
+        if jpeg_bytes[pos] != 0xFF:
+            raise ValueError("Expected marker at offset {}".format(pos))
+        # Skip fill bytes
+        while pos < size and jpeg_bytes[pos] == 0xFF:
+            pos += 1
+        if pos >= size:
+            break
+        marker = jpeg_bytes[pos]
+        marker_start = pos - 1
+
+        if marker in (SOS, EOI):
+            return segments, jpeg_bytes[marker_start:]
+
+        pos += 1
+        if marker in _STANDALONE_MARKERS:
+            segments.append((marker, b""))
+            continue
+
+        if pos + 2 > size:
+            raise ValueError("Truncated segment length at offset {}".format(pos))
+        (length,) = struct.unpack(">H", jpeg_bytes[pos:pos + 2])
+        if length < 2 or pos + length > size:
+            raise ValueError("Invalid segment length {} at offset {}".format(length, pos))
+        segments.append((marker, jpeg_bytes[pos + 2:pos + length]))
+        pos += length
+
+    raise ValueError("No image data (SOS) found")
+
+
+def join_segments(segments: Iterable[Tuple[int, bytes]], tail: bytes) -> bytes:
+    """
+    Reassemble JPEG from header segments and image data.
+
+    Args:
+        segments: (marker, payload) pairs
+        tail: Image data starting at the SOS marker
+
+    Returns:
+        JPEG image bytes
+    """
+    parts = [SOI]
+    for marker, payload in segments:
+        if marker in _STANDALONE_MARKERS:
+            parts.append(bytes((0xFF, marker)))
+            continue
+        if len(payload) > MAX_SEGMENT_PAYLOAD:
+            raise ValueError("Segment payload too large: {} bytes".format(len(payload)))
+        parts.append(bytes((0xFF, marker)) + struct.pack(">H", len(payload) + 2))
+        parts.append(payload)
+    parts.append(tail)
+    return b"".join(parts)
+
+
+def is_exif_segment(marker: int, payload: bytes) -> bool:
+    """Check whether a segment is the APP1/EXIF segment."""
+    return marker == APP1 and payload.startswith(EXIF_HEADER)
+
+
+def replace_exif(
+    jpeg_bytes: bytes,
+    exif_bytes: bytes,
+    strip_markers: Iterable[int] = METADATA_MARKERS,
+) -> bytes:
+    """
+    Replace (or insert) the EXIF segment without touching image data.
+
+    Args:
+        jpeg_bytes: JPEG image bytes
+        exif_bytes: New EXIF data (with or without the "Exif\\0\\0" header)
+        strip_markers: Additional segment markers to drop, XMP/IPTC/COM by
+            default (pass () to keep them)
+
+    Returns:
+        JPEG image bytes with the new EXIF segment
+
+    Raises:
+        ValueError: If the JPEG header can't be parsed or EXIF is too large
+    """
+    if not exif_bytes.startswith(EXIF_HEADER):
+        exif_bytes = EXIF_HEADER + exif_bytes
+    if len(exif_bytes) > MAX_SEGMENT_PAYLOAD:
+        raise ValueError("EXIF data too large: {} bytes".format(len(exif_bytes)))
+
+    segments, tail = split_segments(jpeg_bytes)
+    strip_markers = set(strip_markers)
+
+    kept = [
+        (marker, payload) for marker, payload in segments
+        if not is_exif_segment(marker, payload) and marker not in strip_markers
+    ]
+
+    # EXIF goes right after SOI, or after the JFIF APP0 segment if present
+    insert_at = 1 if kept and kept[0][0] == APP0 else 0
+    kept.insert(insert_at, (APP1, exif_bytes))
+
+    return join_segments(kept, tail)
+
+
+def get_exif(jpeg_bytes: bytes) -> bytes:
+    """
+    Extract the raw EXIF segment payload.
+
+    Args:
+        jpeg_bytes: JPEG image bytes
+
+    Returns:
+        EXIF payload (starting with "Exif\\0\\0") or b"" if absent
+    """
+    try:
+        segments, _ = split_segments(jpeg_bytes)
+    except ValueError:
+        return b""
+    for marker, payload in segments:
+        if is_exif_segment(marker, payload):
+            return payload
+    return b""
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Logo/text detection for image transforms.
+
+Layers, cheapest first:
+- Edge-density pre-filter on a small grayscale thumbnail; images without
+  enough sharp edges can't contain legible text, so OCR is skipped.
+- Per-source memo keyed by the source digest (or a digest of the full
+  pixels), so all variants of one upload share a single result and
+  look-alike uploads never share one.
+- Tesseract OCR on a reduced copy, with the binary auto-detected; if it
+  (or pytesseract) is missing, detection degrades to "no text".
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from src.config import TESSERACT_CMD, LOGO_EDGE_DENSITY_MIN, LOGO_CACHE_SIZE, OCR_ANALYSIS_SIZE
+from src.utils.image import reduce_image
+
+try:
+    import pytesseract
+except ImportError:  # pragma: no cover - optional dependency
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+# Common install locations checked when tesseract isn't on PATH
+_TESSERACT_LOCATIONS = (
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+    "/usr/bin/tesseract",
+    "/usr/local/bin/tesseract",
+    "/opt/homebrew/bin/tesseract",
+)
+
+# Pre-filter thumbnail size and edge strength threshold
+_THUMBNAIL_SIZE = 256
+_EDGE_THRESHOLD = 48
+
+_results: "OrderedDict[str, bool]" = OrderedDict()
+
+
+@lru_cache(maxsize=1)
+def find_tesseract() -> Optional[str]:
+    """
+    Locate the tesseract binary and configure pytesseract with it.
+
+    Order: TESSERACT_CMD setting, PATH, common install locations.
+
+    Returns:
+        Path to tesseract, or None if OCR is unavailable
+    """
+    if pytesseract is None:
+        logger.warning("pytesseract not installed, logo detection disabled")
+        return None
+
+    candidates = [TESSERACT_CMD, shutil.which("tesseract")] + list(_TESSERACT_LOCATIONS)
+    for path in candidates:
+        if path and os.path.isfile(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            logger.info("Using tesseract at %s", path)
+            return path
+
+    logger.warning("tesseract binary not found, logo detection disabled")
+    return None
+
+
+def _thumbnail(img: Image.Image) -> Image.Image:
+    """Small grayscale copy for cheap analysis."""
+    thumb = reduce_image(img, _THUMBNAIL_SIZE).convert("L")
+    thumb.thumbnail((_THUMBNAIL_SIZE, _THUMBNAIL_SIZE), Image.Resampling.BILINEAR)
+    return thumb
+
+
+def edge_density(thumb: Image.Image) -> float:
+    """
+    Fraction of pixels with a strong horizontal or vertical gradient.
+
+    Args:
+        thumb: Grayscale thumbnail
+
+    Returns:
+        Edge density in [0, 1]
+    """
+    arr = np.asarray(thumb, dtype=np.int16)
+    if arr.shape[0] < 2 or arr.shape[1] < 2:
+        return 0.0
+    grad_x = np.abs(np.diff(arr, axis=1))[:-1, :]
+    grad_y = np.abs(np.diff(arr, axis=0))[:, :-1]
+    return float(np.mean(np.maximum(grad_x, grad_y) > _EDGE_THRESHOLD))
+
+
+def _fingerprint(img: Image.Image) -> str:
+    """Digest of the full-resolution pixels (memo key without a source digest)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("{}x{}:{}".format(img.width, img.height, img.mode).encode())
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def _run_ocr(img: Image.Image) -> bool:
+    """Run tesseract and report whether it found text."""
+    if find_tesseract() is None:
+        return False
+    try:
+        text = pytesseract.image_to_string(img)
+        return len(text.strip()) > 3
+    except Exception as e:
+        logger.warning("OCR failed: %s", e)
+        return False
+
+
+def detect_text(img: Image.Image, key: Optional[str] = None) -> bool:
+    """
+    Detect if image contains text/logo.
+
+    Args:
+        img: PIL Image
+        key: Memo key identifying the image, e.g. the source digest
+            (default: digest of the pixels)
+
+    Returns:
+        True if OCR found text
+    """
+    thumb = _thumbnail(img)
+
+    # Pre-filter: too few sharp edges for text
+    if edge_density(thumb) < LOGO_EDGE_DENSITY_MIN:
+        return False
+
+    if key is None:
+        key = _fingerprint(img)
+    if key in _results:
+        _results.move_to_end(key)
+        return _results[key]
+
+    result = _run_ocr(reduce_image(img, OCR_ANALYSIS_SIZE))
+
+    _results[key] = result
+    while len(_results) > LOGO_CACHE_SIZE:
+        _results.popitem(last=False)
+    return result
@@ -11,6 +11,9 @@ from typing import Optional, Dict, Any
 from PIL import Image, PngImagePlugin
 import piexif
 
+from src.utils.jpeg_segments import is_jpeg, replace_exif
+from src.utils.png_chunks import is_png
+
 
 def random_string(length: int) -> str:
     """Generate random alphanumeric string."""
@@ -184,6 +187,20 @@ def apply_metadata(image_bytes: bytes, exif_bytes: bytes) -> bytes:
     Returns:
         Image with new metadata
     """
+    if is_png(image_bytes):
+        # PNG doesn't support EXIF in the same way - add text chunks in place
+        from src.utils.png_metadata import add_png_metadata_bytes
+        try:
+            return add_png_metadata_bytes(image_bytes)
+        except ValueError:
+            pass
+    elif is_jpeg(image_bytes):
+        # Splice EXIF into the container, image data stays untouched
+        try:
+            return replace_exif(image_bytes, exif_bytes)
+        except ValueError:
+            pass
+
     buffer = io.BytesIO(image_bytes)
     img = Image.open(buffer)
 
@@ -0,0 +1,228 @@
+"""
+PNG container utilities.
+
+Reads and writes the PNG chunk list directly so ancillary chunks (tEXt,
+iTXt, tIME, pHYs, iCCP) can be replaced or inserted without decoding the
+image. IDAT chunks are copied through untouched, so there is no
+re-deflate cost and no change to pixel data.
+"""
+
+import struct
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+TEXT_CHUNKS = {b"tEXt", b"iTXt", b"zTXt"}
+
+# Pixels per inch -> pixels per meter
+_INCHES_PER_METER = 39.3701
+
+
+def is_png(image_bytes: bytes) -> bool:
+    """
+    Check whether bytes look like a PNG stream.
+
+    Args:
+        image_bytes: Image bytes
+
+    Returns:
+        True if the data starts with the PNG signature
+    """
+    return image_bytes[:8] == PNG_SIGNATURE
+
+
+def split_chunks(png_bytes: bytes) -> List[Tuple[bytes, bytes]]:
+    """
+    Split PNG into its chunk list.
+
+    Args:
+        png_bytes: PNG image bytes
+
+    Returns:
+        List of (chunk type, chunk data) pairs, IHDR first and IEND last
+
+    Raises:
+        ValueError: If the stream is not a well-formed PNG
+    """
+    if not is_png(png_bytes):
+        raise ValueError("Not a PNG stream")
+
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    size = len(png_bytes)
+
+    while pos + 8 <= size:
+        length, chunk_type = struct.unpack(">I4s", png_bytes[pos:pos + 8])
+        end = pos + 8 + length + 4
+        if end > size:
+            raise ValueError("Truncated {} chunk at offset {}".format(chunk_type, pos))
+        data = png_bytes[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", png_bytes[end - 4:end])
+        if zlib.crc32(chunk_type + data) != crc:
+            raise ValueError("CRC mismatch in {} chunk at offset {}".format(chunk_type, pos))
+        chunks.append((chunk_type, data))
+        pos = end
+        if chunk_type == b"IEND":
+            break
+
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[-1][0] != b"IEND":
+        raise ValueError("PNG stream missing IHDR or IEND")
+    return chunks
+
+
+def join_chunks(chunks: Iterable[Tuple[bytes, bytes]]) -> bytes:
+    """
+    Reassemble PNG from a chunk list, computing CRCs.
+
+    Args:
+        chunks: (chunk type, chunk data) pairs
+
+    Returns:
+        PNG image bytes
+    """
+    parts = [PNG_SIGNATURE]
+    for chunk_type, data in chunks:
+        parts.append(struct.pack(">I4s", len(data), chunk_type))
+        parts.append(data)
+        parts.append(struct.pack(">I", zlib.crc32(chunk_type + data)))
+    return b"".join(parts)
+
+
+def text_chunk_key(data: bytes) -> str:
+    """Return the keyword of a tEXt/iTXt/zTXt chunk."""
+    return data.split(b"\x00", 1)[0].decode("latin-1")
+
+
+def make_text_chunk(key: str, value: str) -> Tuple[bytes, bytes]:
+    """
+    Build a text chunk.
+
+    Uses tEXt for Latin-1 values and falls back to iTXt (UTF-8) otherwise.
+
+    Args:
+        key: Keyword (1-79 Latin-1 characters)
+        value: Text value
+
+    Returns:
+        (chunk type, chunk data) pair
+    """
+    keyword = key.encode("latin-1")[:79]
+    try:
+        return b"tEXt", keyword + b"\x00" + value.encode("latin-1")
+    except UnicodeEncodeError:
+        # iTXt: keyword, compression flag/method, language tag, translated keyword
+        return b"iTXt", keyword + b"\x00\x00\x00\x00\x00" + value.encode("utf-8")
+
+
+def make_time_chunk(dt: datetime) -> Tuple[bytes, bytes]:
+    """
+    Build a tIME (last modification time) chunk.
+
+    Args:
+        dt: Modification time
+
+    Returns:
+        (chunk type, chunk data) pair
+    """
+    return b"tIME", struct.pack(">HBBBBB", dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+
+
+def make_phys_chunk(x_dpi: int, y_dpi: int) -> Tuple[bytes, bytes]:
+    """
+    Build a pHYs (physical pixel dimensions) chunk.
+
+    Args:
+        x_dpi: Horizontal resolution in pixels per inch
+        y_dpi: Vertical resolution in pixels per inch
+
+    Returns:
+        (chunk type, chunk data) pair
+    """
+    return b"pHYs", struct.pack(
+        ">IIB",
+        int(round(x_dpi * _INCHES_PER_METER)),
+        int(round(y_dpi * _INCHES_PER_METER)),
+        1,  # Unit: meter
+    )
+
+
+def make_iccp_chunk(icc_profile: bytes, name: str = "ICC Profile") -> Tuple[bytes, bytes]:
+    """
+    Build an iCCP (embedded ICC profile) chunk.
+
+    Args:
+        icc_profile: Raw ICC profile bytes
+        name: Profile name
+
+    Returns:
+        (chunk type, chunk data) pair
+    """
+    return b"iCCP", name.encode("latin-1")[:79] + b"\x00\x00" + zlib.compress(icc_profile)
+
+
+def replace_chunks(
+    png_bytes: bytes,
+    new_chunks: Iterable[Tuple[bytes, bytes]],
+    drop_types: Iterable[bytes] = (),
+) -> bytes:
+    """
+    Replace (or insert) ancillary chunks without touching image data.
+
+    Existing chunks of the same type are removed; for text chunks only
+    those with the same keyword are removed. New chunks are inserted right
+    after IHDR, which is valid for every ancillary chunk type (including
+    iCCP and pHYs, which must precede PLTE/IDAT).
+
+    Args:
+        png_bytes: PNG image bytes
+        new_chunks: (chunk type, chunk data) pairs to write
+        drop_types: Additional chunk types to remove (e.g. all text chunks)
+
+    Returns:
+        PNG image bytes with the new chunks
+
+    Raises:
+        ValueError: If the PNG can't be parsed
+    """
+    new_chunks = list(new_chunks)
+    chunks = split_chunks(png_bytes)
+
+    drop = set(drop_types)
+    new_keys = set()
+    for chunk_type, data in new_chunks:
+        if chunk_type in TEXT_CHUNKS:
+            new_keys.add(text_chunk_key(data))
+        else:
+            drop.add(chunk_type)
+    if b"iCCP" in drop:
+        # iCCP and sRGB must not both be present
+        drop.add(b"sRGB")
+
+    kept = [
+        (chunk_type, data) for chunk_type, data in chunks
+        if chunk_type not in drop
+        and not (chunk_type in TEXT_CHUNKS and text_chunk_key(data) in new_keys)
+    ]
+
+    return join_chunks(kept[:1] + new_chunks + kept[1:])
+
+
+def replace_text(png_bytes: bytes, fields: Dict[str, str], drop_existing: bool = False) -> bytes:
+    """
+    Replace (or insert) text chunks without touching image data.
+
+    Args:
+        png_bytes: PNG image bytes
+        fields: Mapping of keyword -> text
+        drop_existing: Remove all existing text chunks first
+
+    Returns:
+        PNG image bytes with the new text chunks
+    """
+    return replace_chunks(
+        png_bytes,
+        [make_text_chunk(key, value) for key, value in fields.items()],
+        drop_types=TEXT_CHUNKS if drop_existing else (),
+    )
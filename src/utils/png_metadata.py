@@ -8,6 +8,7 @@ import random
 import string
 import time
 from datetime import datetime, timedelta
+from typing import Dict
 from PIL import Image, PngImagePlugin
 import io
 
@@ -28,15 +29,12 @@ def random_datetime() -> datetime:
     return dt
 
 
-def add_png_metadata(img: Image.Image) -> Image.Image:
+def generate_png_text() -> Dict[str, str]:
     """
-    Add metadata to PNG image using text chunks.
+    Generate random PNG text metadata.
     
-    Args:
-        img: PIL Image (PNG)
-        
     Returns:
-        Image with metadata chunks
+        Ordered mapping of keyword -> text for tEXt chunks
     """
     dt = random_datetime()
     
@@ -74,7 +72,7 @@ def add_png_metadata(img: Image.Image) -> Image.Image:
     ]
     
     # Create metadata dictionary for PNG
-    metadata = PngImagePlugin.PngInfo()
+    metadata = {}
     
     # Expanded ISO values
     iso_values = [50, 64, 80, 100, 125, 160, 200, 250, 320, 400, 500, 640, 800, 
@@ -86,37 +84,54 @@ def add_png_metadata(img: Image.Image) -> Image.Image:
     unique_id = "{}_{}".format(random_string(12), timestamp_ms)
     
     # Add text chunks (tEXt - Latin-1, iTXt - UTF-8)
-    metadata.add_text("Author", random_string(12))
-    metadata.add_text("Title", random_string(16))
-    metadata.add_text("Description", random_string(24))
-    metadata.add_text("Software", random.choice(software_list))
-    metadata.add_text("Camera", "{} {}".format(make, model))
-    metadata.add_text("Make", make)
-    metadata.add_text("Model", model)
-    metadata.add_text("DateTime", dt.strftime("%Y:%m:%d %H:%M:%S"))
-    metadata.add_text("DateTimeOriginal", dt.strftime("%Y:%m:%d %H:%M:%S"))
-    metadata.add_text("DateTimeDigitized", dt.strftime("%Y:%m:%d %H:%M:%S"))
-    metadata.add_text("ISO", str(random.choice(iso_values)))
-    metadata.add_text("FNumber", "f/{}".format(random.choice([1.4, 1.8, 2.0, 2.8, 4.0, 5.6, 8.0, 11, 16, 22])))
-    metadata.add_text("ExposureTime", "1/{}".format(random.choice([30, 60, 125, 250, 500, 1000, 2000, 4000, 8000])))
-    metadata.add_text("FocalLength", "{}mm".format(random.choice([24, 28, 35, 50, 85, 100, 135, 200, 300, 400])))
-    metadata.add_text("Copyright", "(c) {} {}".format(dt.year, random_string(8)))
-    metadata.add_text("Comment", random_string(32))
-    metadata.add_text("UserComment", random_string(40))
-    metadata.add_text("ExposureMode", str(random.choice([0, 1, 2, 3, 4, 5, 6, 7, 8])))
-    metadata.add_text("MeteringMode", str(random.choice([1, 2, 3, 4, 5, 6])))
-    metadata.add_text("WhiteBalance", str(random.choice([0, 1])))
-    metadata.add_text("Flash", str(random.choice([0, 1, 5, 7, 9, 13, 15, 16, 24, 25, 29, 31])))
+    metadata["Author"] = random_string(12)
+    metadata["Title"] = random_string(16)
+    metadata["Description"] = random_string(24)
+    metadata["Software"] = random.choice(software_list)
+    metadata["Camera"] = "{} {}".format(make, model)
+    metadata["Make"] = make
+    metadata["Model"] = model
+    metadata["DateTime"] = dt.strftime("%Y:%m:%d %H:%M:%S")
+    metadata["DateTimeOriginal"] = dt.strftime("%Y:%m:%d %H:%M:%S")
+    metadata["DateTimeDigitized"] = dt.strftime("%Y:%m:%d %H:%M:%S")
+    metadata["ISO"] = str(random.choice(iso_values))
+    metadata["FNumber"] = "f/{}".format(random.choice([1.4, 1.8, 2.0, 2.8, 4.0, 5.6, 8.0, 11, 16, 22]))
+    metadata["ExposureTime"] = "1/{}".format(random.choice([30, 60, 125, 250, 500, 1000, 2000, 4000, 8000]))
+    metadata["FocalLength"] = "{}mm".format(random.choice([24, 28, 35, 50, 85, 100, 135, 200, 300, 400]))
+    metadata["Copyright"] = "(c) {} {}".format(dt.year, random_string(8))
+    metadata["Comment"] = random_string(32)
+    metadata["UserComment"] = random_string(40)
+    metadata["ExposureMode"] = str(random.choice([0, 1, 2, 3, 4, 5, 6, 7, 8]))
+    metadata["MeteringMode"] = str(random.choice([1, 2, 3, 4, 5, 6]))
+    metadata["WhiteBalance"] = str(random.choice([0, 1]))
+    metadata["Flash"] = str(random.choice([0, 1, 5, 7, 9, 13, 15, 16, 24, 25, 29, 31]))
     # Add unique identifier and additional unique fields
-    metadata.add_text("UniqueID", unique_id)
-    metadata.add_text("ImageID", random_string(20))
-    metadata.add_text("DocumentID", random_string(24))
-    metadata.add_text("CreatorTool", random.choice(software_list))
-    metadata.add_text("Keywords", random_string(30))
-    metadata.add_text("Subject", random_string(28))
-    metadata.add_text("Rating", str(random.choice([0, 1, 2, 3, 4, 5])))
-    metadata.add_text("ColorSpace", random.choice(["sRGB", "AdobeRGB", "ProPhoto RGB", "Display P3"]))
-    metadata.add_text("ColorDepth", str(random.choice([8, 10, 12, 14, 16])))
+    metadata["UniqueID"] = unique_id
+    metadata["ImageID"] = random_string(20)
+    metadata["DocumentID"] = random_string(24)
+    metadata["CreatorTool"] = random.choice(software_list)
+    metadata["Keywords"] = random_string(30)
+    metadata["Subject"] = random_string(28)
+    metadata["Rating"] = str(random.choice([0, 1, 2, 3, 4, 5]))
+    metadata["ColorSpace"] = random.choice(["sRGB", "AdobeRGB", "ProPhoto RGB", "Display P3"])
+    metadata["ColorDepth"] = str(random.choice([8, 10, 12, 14, 16]))
+    
+    return metadata
+
+
+def add_png_metadata(img: Image.Image) -> Image.Image:
+    """
+    Add metadata to PNG image using text chunks.
+    
+    Args:
+        img: PIL Image (PNG)
+        
+    Returns:
+        Image with metadata chunks
+    """
+    metadata = PngImagePlugin.PngInfo()
+    for key, value in generate_png_text().items():
+        metadata.add_text(key, value)
     
     # Store metadata in image - preserve original info dict
     # Save original info if it's a dict (for ICC profile, etc.)
@@ -142,6 +157,23 @@ def add_png_metadata(img: Image.Image) -> Image.Image:
     return img
 
 
+def add_png_metadata_bytes(png_bytes: bytes) -> bytes:
+    """
+    Add random text metadata to encoded PNG without re-encoding.
+    
+    Args:
+        png_bytes: PNG image bytes
+        
+    Returns:
+        PNG bytes with new text chunks (IDAT copied through)
+        
+    Raises:
+        ValueError: If the PNG can't be parsed
+    """
+    from src.utils.png_chunks import replace_text
+    return replace_text(png_bytes, generate_png_text())
+
+
 def save_png_with_metadata(img: Image.Image, output: io.BytesIO) -> None:
     """
     Save PNG with metadata chunks.
@@ -0,0 +1,309 @@
+"""
+Progress events for processing jobs.
+
+Worker processes report a "stage" event after each pipeline stage and a
+"copy" event for each finished copy. Events travel over one queue shared
+by all workers (installed by the pool's initializer) and are published on
+the event loop by a ProgressHub:
+
+- Handlers subscribe to their job's key (the job's cancel token path) and
+  feed a ProgressReporter, which keeps one Telegram message up to date with
+  percentage and ETA, edited at most once per PROGRESS_EDIT_INTERVAL.
+- Listeners receive every event (e.g. for metrics); the hub also counts
+  events by kind and stage.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from src.config import PROGRESS_EDIT_INTERVAL, PROGRESS_SHOW_DELAY
+from src.utils.cancellation import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressEvent:
+    """One progress event of a job."""
+
+    __slots__ = ("job", "kind", "name", "count", "timestamp")
+
+    def __init__(self, job: str, kind: str, name: Optional[str] = None, count: int = 1, timestamp: Optional[float] = None):
+        """
+        Initialize event.
+
+        Args:
+            job: Job key
+            kind: "stage" or "copy"
+            name: Stage name (stage events)
+            count: Number of copies finished (copy events)
+            timestamp: time.time() of the event
+        """
+        self.job = job
+        self.kind = kind
+        self.name = name
+        self.count = count
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+
+# ============================================================================
+# Worker side
+# ============================================================================
+
+# Event queue shared with the parent, and the key of the job running here
+_queue = None
+_job: Optional[str] = None
+
+
+def init_worker(queue) -> None:
+    """Worker process initializer: install the event queue."""
+    global _queue
+    _queue = queue
+
+
+@contextmanager
+def progress_scope(job: Optional[str]) -> Iterator[None]:
+    """
+    Attribute events reported in this worker to a job.
+
+    Args:
+        job: Job key (None = don't report)
+    """
+    global _job
+    previous, _job = _job, job
+    try:
+        yield
+    finally:
+        _job = previous
+
+
+def _emit(kind: str, name: Optional[str] = None, count: int = 1) -> None:
+    """Send an event to the parent (no-op outside a job)."""
+    if _queue is None or _job is None:
+        return
+    try:
+        _queue.put((_job, kind, name, count, time.time()))
+    except Exception:
+        pass
+
+
+def report_copy(count: int = 1) -> None:
+    """Report finished copies of the current job."""
+    _emit("copy", count=count)
+
+
+def checkpoint(stage: str) -> None:
+    """
+    Report a finished stage, then stop if the job was cancelled.
+
+    Args:
+        stage: Stage name
+
+    Raises:
+        JobCancelled: If the job was cancelled
+    """
+    _emit("stage", name=stage)
+    check_cancelled()
+
+
+# ============================================================================
+# Event loop side
+# ============================================================================
+
+class ProgressHub:
+    """
+    Routes progress events to per-job subscribers and global listeners.
+
+    Example:
+        hub = get_progress_hub()
+        with hub.subscription(token.path, reporter.on_event):
+            ...
+    """
+
+    def __init__(self):
+        """Initialize hub."""
+        self._subscribers: Dict[str, List[Callable[[ProgressEvent], None]]] = {}
+        self._listeners: Set[Callable[[ProgressEvent], None]] = set()
+        self.counts: Counter = Counter()
+        self.stage_counts: Counter = Counter()
+
+    def add_listener(self, callback: Callable[[ProgressEvent], None]) -> None:
+        """Receive every event (e.g. for metrics)."""
+        self._listeners.add(callback)
+
+    def remove_listener(self, callback: Callable[[ProgressEvent], None]) -> None:
+        """Stop receiving events."""
+        self._listeners.discard(callback)
+
+    def subscribe(self, job: str, callback: Callable[[ProgressEvent], None]) -> None:
+        """Receive the events of one job."""
+        self._subscribers.setdefault(job, []).append(callback)
+
+    def unsubscribe(self, job: str, callback: Callable[[ProgressEvent], None]) -> None:
+        """Stop receiving a job's events."""
+        callbacks = self._subscribers.get(job)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._subscribers[job]
+
+    @contextmanager
+    def subscription(self, job: str, callback: Callable[[ProgressEvent], None]) -> Iterator[None]:
+        """Subscribe for the duration of a block."""
+        self.subscribe(job, callback)
+        try:
+            yield
+        finally:
+            self.unsubscribe(job, callback)
+
+    def publish(self, event: ProgressEvent) -> None:
+        """Deliver an event (call on the event loop)."""
+        self.counts[event.kind] += event.count if event.kind == "copy" else 1
+        if event.kind == "stage":
+            self.stage_counts[event.name] += 1
+        for callback in list(self._subscribers.get(event.job, ())) + list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning("Progress callback failed: %s", e)
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    """Get the shared progress hub, creating it on first use."""
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub()
+    return _hub
+
+
+class ProgressReporter:
+    """
+    Keeps one Telegram message updated with a job's progress.
+
+    The message is only sent once the job has run for PROGRESS_SHOW_DELAY
+    seconds (quick jobs show nothing) and is edited at most once per
+    PROGRESS_EDIT_INTERVAL, staying well under Telegram's edit limits.
+
+    Progress is measured in copies; once a copy has finished, stage events
+    refine it within the copies in flight.
+    """
+
+    def __init__(
+        self,
+        bot,
+        chat_id: int,
+        total: int,
+        title: str = "Обработка",
+        interval: float = PROGRESS_EDIT_INTERVAL,
+        delay: float = PROGRESS_SHOW_DELAY,
+    ):
+        """
+        Initialize reporter.
+
+        Args:
+            bot: Telegram bot
+            chat_id: Chat to report to
+            total: Number of copies (or images) in the job
+            title: Text before the numbers
+            interval: Minimum seconds between edits
+            delay: Seconds before the message is first shown
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.total = max(1, total)
+        self.title = title
+        self.interval = interval
+
+        self.done = 0
+        self.stages = 0
+        self._stages_at_last_copy = 0
+        self._started = time.monotonic()
+        self._next_update = self._started + delay
+        self._message = None
+        self._text: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def on_event(self, event: ProgressEvent) -> None:
+        """Hub callback: count the event and schedule an update."""
+        if event.kind == "copy":
+            self.advance(event.count)
+        else:
+            self.on_stage(event)
+
+    def on_stage(self, event: ProgressEvent) -> None:
+        """Hub callback counting stage events only (the caller counts items)."""
+        if event.kind == "stage":
+            self.stages += 1
+            self._schedule()
+
+    def advance(self, count: int = 1) -> None:
+        """Count finished copies (or skipped images)."""
+        self.done = min(self.total, self.done + count)
+        self._stages_at_last_copy = self.stages
+        self._schedule()
+
+    def fraction(self) -> float:
+        """Estimated share of the job that is done."""
+        fraction = self.done / self.total
+        if self.done and self._stages_at_last_copy:
+            # Stages per copy seen so far extrapolate the copies in flight
+            stages_per_copy = self._stages_at_last_copy / self.done
+            fraction = max(fraction, self.stages / (stages_per_copy * self.total))
+        return min(fraction, 0.99 if self.done < self.total else 1.0)
+
+    def text(self) -> str:
+        """Progress message text."""
+        fraction = self.fraction()
+        text = f"{self.title}: {self.done}/{self.total} ({int(fraction * 100)}%)"
+        if fraction > 0:
+            elapsed = time.monotonic() - self._started
+            remaining = int(elapsed * (1 - fraction) / fraction + 0.5)
+            text += f", осталось ~{remaining} с" if remaining < 120 else f", осталось ~{(remaining + 30) // 60} мин"
+        return text
+
+    def _schedule(self) -> None:
+        """Make sure an update is pending."""
+        if self._closed or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._update())
+
+    async def _update(self) -> None:
+        """Send or edit the message once the rate limit allows."""
+        await asyncio.sleep(max(0.0, self._next_update - time.monotonic()))
+        if self._closed:
+            return
+        text = self.text()
+        if text == self._text:
+            return
+        self._next_update = time.monotonic() + self.interval
+        try:
+            if self._message is None:
+                self._message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+            else:
+                await self._message.edit_text(text)
+            self._text = text
+        except Exception as e:
+            logger.warning("Progress update failed: %s", e)
+
+    async def close(self) -> None:
+        """Stop updating and delete the message."""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._message is not None:
+            try:
+                await self._message.delete()
+            except Exception:
+                pass
+            self._message = None
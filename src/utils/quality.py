@@ -0,0 +1,203 @@
+"""
+Quality gate for generated copies.
+
+Scores copies against the original with SSIM and a file size ratio.
+The original's grayscale statistics are computed once per gate and
+reused for every copy, so scoring N copies costs one decode of the
+original plus one decode of each copy.
+
+SSIM follows skimage.metrics.structural_similarity defaults (7x7 uniform
+window, sample covariance, K1=0.01, K2=0.03, mean over windows that lie
+fully inside the image). Copies are aligned to the original's top-left
+corner, as in calculate_ssim.
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.config import MIN_SSIM, MAX_SIZE_RATIO, SSIM_ANALYSIS_SIZE
+from src.utils.image import get_image_format, load_image_reduced
+
+logger = logging.getLogger(__name__)
+
+# SSIM constants (skimage defaults)
+_WIN_SIZE = 7
+_DATA_RANGE = 255.0
+_C1 = (0.01 * _DATA_RANGE) ** 2
+_C2 = (0.03 * _DATA_RANGE) ** 2
+_COV_NORM = _WIN_SIZE ** 2 / (_WIN_SIZE ** 2 - 1.0)
+
+
+def _window_mean(arr: np.ndarray) -> np.ndarray:
+    """Mean over every 7x7 window fully inside the array (integral image)."""
+    integral = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(arr, axis=0), axis=1, out=integral[1:, 1:])
+    k = _WIN_SIZE
+    total = integral[k:, k:] - integral[:-k, k:] - integral[k:, :-k] + integral[:-k, :-k]
+    return total / (k * k)
+
+
+class QualityScore:
+    """Quality of one copy relative to the original."""
+
+    __slots__ = ("ssim", "size_ratio", "passed", "reason")
+
+    def __init__(self, ssim: Optional[float], size_ratio: Optional[float], passed: bool, reason: Optional[str]):
+        """
+        Initialize score.
+
+        Args:
+            ssim: SSIM value (None if not checked)
+            size_ratio: Copy size / original size (None if not checked)
+            passed: Whether the copy meets all thresholds
+            reason: Why the copy failed (None if it passed)
+        """
+        self.ssim = ssim
+        self.size_ratio = size_ratio
+        self.passed = passed
+        self.reason = reason
+
+    def rank(self) -> Tuple[bool, float, float]:
+        """Sort key: passing first, then higher SSIM, then smaller size."""
+        return (
+            self.passed,
+            self.ssim if self.ssim is not None else 1.0,
+            -(self.size_ratio or 0.0),
+        )
+
+
+class QualityGate:
+    """
+    Scores copies of one original against MIN_SSIM and MAX_SIZE_RATIO.
+
+    Example:
+        gate = QualityGate(original_bytes)
+        scores = gate.score_batch(copies)
+    """
+
+    def __init__(
+        self,
+        original_bytes: bytes,
+        min_ssim: float = MIN_SSIM,
+        max_size_ratio: float = MAX_SIZE_RATIO,
+        fast: bool = True,
+        check_ssim: bool = True,
+    ):
+        """
+        Initialize gate and cache the original's statistics.
+
+        Args:
+            original_bytes: Original image bytes
+            min_ssim: Minimum SSIM
+            max_size_ratio: Maximum copy size / original size
+            fast: Compare at reduced resolution (SSIM_ANALYSIS_SIZE)
+                instead of full resolution
+            check_ssim: Check SSIM (disable for methods that crop or
+                resize, where a pixel-aligned SSIM is meaningless)
+        """
+        self.min_ssim = min_ssim
+        self.max_size_ratio = max_size_ratio
+        self.check_ssim = check_ssim
+        self._original_size = len(original_bytes)
+        self._original_format = get_image_format(original_bytes)
+        self._target_size = SSIM_ANALYSIS_SIZE if fast else 1 << 30
+
+        self._factor = 1
+        self._x = self._ux = self._vx = None
+        if check_ssim:
+            img, _, self._factor = load_image_reduced(original_bytes, self._target_size, "L")
+            self._x = np.asarray(img, dtype=np.float64)
+            self._ux = _window_mean(self._x)
+            self._vx = _COV_NORM * (_window_mean(self._x * self._x) - self._ux * self._ux)
+
+    def ssim(self, processed_bytes: bytes) -> float:
+        """
+        SSIM of a copy against the cached original.
+
+        Args:
+            processed_bytes: Copy bytes
+
+        Returns:
+            SSIM value (0.0 to 1.0)
+
+        Raises:
+            ValueError: If the copy can't be compared
+        """
+        img, _, factor = load_image_reduced(processed_bytes, self._target_size, "L")
+        if factor != self._factor:
+            # Size straddles a reduction boundary: rescale to the original's factor
+            img = img.resize(
+                (max(1, round(img.width * factor / self._factor)), max(1, round(img.height * factor / self._factor))),
+                Image.Resampling.BOX,
+            )
+
+        h = min(img.height, self._x.shape[0])
+        w = min(img.width, self._x.shape[1])
+        if h < _WIN_SIZE or w < _WIN_SIZE:
+            raise ValueError("Image too small for SSIM: {}x{}".format(w, h))
+
+        # Window statistics of the original are reused: windows fully inside
+        # the shared top-left region are identical to a fresh computation
+        x = self._x[:h, :w]
+        ux = self._ux[:h - _WIN_SIZE + 1, :w - _WIN_SIZE + 1]
+        vx = self._vx[:h - _WIN_SIZE + 1, :w - _WIN_SIZE + 1]
+
+        y = np.asarray(img, dtype=np.float64)[:h, :w]
+        uy = _window_mean(y)
+        vy = _COV_NORM * (_window_mean(y * y) - uy * uy)
+        vxy = _COV_NORM * (_window_mean(x * y) - ux * uy)
+
+        s = ((2 * ux * uy + _C1) * (2 * vxy + _C2)) / ((ux * ux + uy * uy + _C1) * (vx + vy + _C2))
+        return float(s.mean())
+
+    def score(self, processed_bytes: bytes) -> QualityScore:
+        """
+        Score one copy.
+
+        The size ratio is only checked when the copy keeps the original's
+        format (a JPEG -> PNG variant is expected to be larger).
+
+        Args:
+            processed_bytes: Copy bytes
+
+        Returns:
+            QualityScore (a copy that can't be decoded fails)
+        """
+        ssim_value = None
+        try:
+            processed_format = get_image_format(processed_bytes)
+            if self.check_ssim:
+                ssim_value = self.ssim(processed_bytes)
+        except Exception as e:
+            logger.warning("Quality check failed: %s", e)
+            return QualityScore(None, None, False, "Unreadable copy: {}".format(e))
+
+        if self.check_ssim and ssim_value < self.min_ssim:
+            return QualityScore(
+                ssim_value, None, False,
+                "SSIM {:.4f} below threshold {}".format(ssim_value, self.min_ssim),
+            )
+
+        size_ratio = len(processed_bytes) / self._original_size
+        if processed_format == self._original_format and size_ratio > self.max_size_ratio:
+            return QualityScore(
+                ssim_value, size_ratio, False,
+                "Size ratio {:.2f} exceeds maximum {}".format(size_ratio, self.max_size_ratio),
+            )
+
+        return QualityScore(ssim_value, size_ratio, True, None)
+
+    def score_batch(self, copies: Sequence[bytes]) -> List[QualityScore]:
+        """
+        Score several copies of the same original.
+
+        Args:
+            copies: Copy bytes
+
+        Returns:
+            One QualityScore per copy, in order
+        """
+        return [self.score(processed) for processed in copies]
@@ -0,0 +1,352 @@
+"""
+Per-user processing sessions.
+
+A session holds an upload (or album) between the user's button presses:
+the original bytes, the chosen method/count and, in preview mode, the
+generated copies. Sessions abandoned mid-dialog used to stay in bot_data
+until restart; SessionStore bounds them:
+
+- Session records are slotted objects, one per user.
+- Idle sessions expire after their TTL. A single background sweeper
+  checks all sessions instead of one timer task per session.
+- Resident bytes are limited per user (a larger session is rejected) and
+  globally (least recently used idle sessions are evicted).
+- Counters report live sessions, resident bytes, expiries and evictions.
+
+Sessions in an active state (being processed) are never expired or
+evicted; their handler removes them when it finishes. A session replaced
+by a new upload or discarded mid-job cancels its job (the asyncio task
+and, through its cancel token, the worker processes) and drops its data
+right away.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.config import (
+    SESSION_TTL,
+    SESSION_SWEEP_INTERVAL,
+    SESSION_USER_MAX_BYTES,
+    SESSION_MAX_BYTES,
+)
+from src.utils.copy_store import QuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+# States in which a handler is working on the session
+ACTIVE_STATES = {"processing", "batch_processing"}
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    """Task running this code (None outside the event loop)."""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class Session:
+    """One user's processing session."""
+
+    __slots__ = (
+        "user_id",
+        "chat_id",
+        "state",
+        "image_bytes",
+        "original_filename",
+        "method",
+        "count",
+        "batch_images",
+        "processed_copies",
+        "selection_message_id",
+        "preview_message_id",
+        "ttl",
+        "touched_at",
+        "job",
+        "cancel_token",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        chat_id: Optional[int] = None,
+        state: str = "method_select",
+        image_bytes: Optional[bytes] = None,
+        original_filename: str = "image.jpg",
+        batch_images: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Initialize session.
+
+        Args:
+            user_id: Telegram user ID
+            chat_id: Chat the dialog runs in
+            state: Dialog state
+            image_bytes: Uploaded image (single image sessions)
+            original_filename: Filename used for results
+            batch_images: Album images as dicts with 'bytes' and 'filename'
+        """
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.state = state
+        self.image_bytes = image_bytes
+        self.original_filename = original_filename
+        self.method: Optional[str] = None
+        self.count: Optional[int] = None
+        self.batch_images = batch_images
+        self.processed_copies = None
+        self.selection_message_id: Optional[int] = None
+        self.preview_message_id: Optional[int] = None
+        # Idle lifetime in seconds (None = store default)
+        self.ttl: Optional[float] = None
+        self.touched_at = time.monotonic()
+        # Scheduler task processing the session, and its cancel token
+        self.job: Optional[asyncio.Task] = None
+        self.cancel_token = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory by this session."""
+        total = len(self.image_bytes) if self.image_bytes else 0
+        if self.batch_images:
+            total += sum(len(image["bytes"]) for image in self.batch_images)
+        if self.processed_copies is not None:
+            total += getattr(self.processed_copies, "memory_bytes", 0)
+        return total
+
+    @property
+    def active(self) -> bool:
+        """Whether a handler is currently processing this session."""
+        return self.state in ACTIVE_STATES
+
+    def release(self) -> None:
+        """
+        Cancel the session's job, drop its data and close its stored copies.
+
+        A job releasing its own session (it finished) is not cancelled, so
+        its cancel token keeps the reason it had.
+        """
+        job, self.job = self.job, None
+        if job is not None and not job.done() and job is not _current_task():
+            if self.cancel_token is not None:
+                self.cancel_token.cancel()
+            job.cancel()
+
+        copies, self.processed_copies = self.processed_copies, None
+        if copies is not None and hasattr(copies, "close"):
+            copies.close()
+        self.image_bytes = None
+        self.batch_images = None
+
+
+class SessionStore:
+    """
+    Bounded store of sessions keyed by user ID, in LRU order.
+
+    Example:
+        store = get_session_store()
+        store.put(Session(user_id, chat_id, image_bytes=data))
+        session = store.get(user_id)
+        ...
+        store.discard(user_id, session)
+    """
+
+    def __init__(
+        self,
+        ttl: float = SESSION_TTL,
+        user_max_bytes: int = SESSION_USER_MAX_BYTES,
+        max_bytes: int = SESSION_MAX_BYTES,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL,
+    ):
+        """
+        Initialize session store.
+
+        Args:
+            ttl: Default idle lifetime in seconds
+            user_max_bytes: Largest session accepted
+            max_bytes: Resident bytes across all sessions
+            sweep_interval: Seconds between expiry sweeps
+        """
+        self.ttl = ttl
+        self.user_max_bytes = user_max_bytes
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+
+        self._sessions: "OrderedDict[int, Session]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._sessions
+
+    @property
+    def nbytes(self) -> int:
+        """Resident bytes across all sessions."""
+        return sum(session.nbytes for session in self._sessions.values())
+
+    def get(self, user_id: int) -> Optional[Session]:
+        """
+        Get a user's session and mark it as used.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Session, or None if there is none (or it expired)
+        """
+        session = self._sessions.get(user_id)
+        if session is not None:
+            session.touched_at = time.monotonic()
+            self._sessions.move_to_end(user_id)
+        return session
+
+    def peek(self, user_id: int) -> Optional[Session]:
+        """Get a user's session without marking it as used."""
+        return self._sessions.get(user_id)
+
+    def put(self, session: Session) -> Session:
+        """
+        Store a session, replacing (and releasing) the user's previous one.
+
+        Also call this after adding data to a stored session, so its bytes
+        are re-checked against the limits.
+
+        Args:
+            session: Session to store
+
+        Returns:
+            The stored session
+
+        Raises:
+            QuotaExceededError: If the session exceeds the per-user limit
+                (it is released and not stored)
+        """
+        if session.nbytes > self.user_max_bytes:
+            self.discard(session.user_id, session)
+            session.release()
+            raise QuotaExceededError(
+                "Session of user {} exceeds {} bytes".format(session.user_id, self.user_max_bytes)
+            )
+
+        previous = self._sessions.get(session.user_id)
+        if previous is not None and previous is not session:
+            previous.release()
+        self._sessions[session.user_id] = session
+        self._sessions.move_to_end(session.user_id)
+        session.touched_at = time.monotonic()
+        self._evict(keep=session)
+        return session
+
+    def discard(self, user_id: int, session: Optional[Session] = None) -> None:
+        """
+        Remove and release a user's session.
+
+        Args:
+            user_id: Telegram user ID
+            session: Only remove this session (leaves a newer one alone)
+        """
+        current = self._sessions.get(user_id)
+        if current is None or (session is not None and current is not session):
+            return
+        del self._sessions[user_id]
+        current.release()
+
+    def _evict(self, keep: Session) -> None:
+        """Evict least recently used idle sessions beyond the global limit."""
+        total = self.nbytes
+        if total <= self.max_bytes:
+            return
+        for user_id, session in list(self._sessions.items()):
+            if total <= self.max_bytes:
+                break
+            if session is keep or session.active:
+                continue
+            total -= session.nbytes
+            del self._sessions[user_id]
+            session.release()
+            self.evicted += 1
+            logger.info("Evicted session of user %s (resident bytes over limit)", user_id)
+        if total > self.max_bytes:
+            logger.warning("Sessions hold %d bytes, over the %d byte limit", total, self.max_bytes)
+
+    def sweep(self, now: Optional[float] = None) -> List[Session]:
+        """
+        Remove idle sessions whose TTL has passed.
+
+        Args:
+            now: Current time.monotonic() (for tests)
+
+        Returns:
+            Expired sessions (already removed; state and IDs still set)
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        for user_id, session in list(self._sessions.items()):
+            ttl = self.ttl if session.ttl is None else session.ttl
+            if not session.active and now - session.touched_at > ttl:
+                del self._sessions[user_id]
+                expired.append(session)
+        self.expired += len(expired)
+        return expired
+
+    def start_sweeper(self, on_expire: Optional[Callable[[Session], Awaitable[None]]] = None) -> None:
+        """
+        Start the background sweeper (idempotent).
+
+        Args:
+            on_expire: Called for each expired session before it is released
+                (e.g. to tell the user)
+        """
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop(on_expire))
+
+    async def _sweep_loop(self, on_expire: Optional[Callable[[Session], Awaitable[None]]]) -> None:
+        """Sweep expired sessions every sweep_interval seconds."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            for session in self.sweep():
+                try:
+                    if on_expire is not None:
+                        await on_expire(session)
+                except Exception as e:
+                    logger.warning("Session expiry callback failed: %s", e)
+                finally:
+                    session.release()
+            if self._sessions:
+                logger.debug("Sessions: %d live, %d bytes resident", len(self._sessions), self.nbytes)
+
+    async def stop_sweeper(self) -> None:
+        """Stop the background sweeper."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def clear(self) -> None:
+        """Remove and release all sessions."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            session.release()
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Get the shared session store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
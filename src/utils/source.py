@@ -0,0 +1,169 @@
+"""
+Per-upload source analysis.
+
+Every copy of an upload (and every repeat request with another method)
+starts from the same original bytes. SourceAnalysis decodes them once and
+keeps what the uniqueizers keep re-deriving: the pixels, ICC profile,
+EXIF, orientation-corrected views and format flags.
+
+Analyses are kept in a process-wide LRU keyed by a digest of the bytes
+and bounded by entry count and decoded size, so worker processes reuse
+them across jobs and sessions.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PIL import Image
+
+from src.config import SOURCE_CACHE_SIZE, SOURCE_CACHE_MAX_BYTES
+from src.utils.image import DecodedImage, load_image
+
+# EXIF orientation tag and the transpose that undoes each value
+# (same mapping as ImageOps.exif_transpose)
+_ORIENTATION_TAG = 0x0112
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+_sources: "OrderedDict[str, SourceAnalysis]" = OrderedDict()
+
+
+def _image_nbytes(img: Image.Image) -> int:
+    """Approximate decoded size of an image."""
+    return img.width * img.height * len(img.getbands())
+
+
+class SourceAnalysis:
+    """
+    Decoded original image plus derived facts, shared by all its copies.
+
+    The pixels and views are shared: callers must treat them as read-only
+    (the same rule as for DecodedImage).
+    """
+
+    def __init__(self, image_bytes: bytes, digest: Optional[str] = None):
+        """
+        Decode and analyze image bytes.
+
+        Args:
+            image_bytes: Original image bytes
+            digest: Digest of image_bytes, if already computed
+        """
+        self.digest = digest or source_digest(image_bytes)
+        self.file_size = len(image_bytes)
+
+        img, original_format = load_image(image_bytes)
+        img.load()
+        # EXIF lives outside img.info, as in DecodedImage
+        self.exif = img.info.pop("exif", None)
+        self.img = img
+        self.format = original_format
+        self.icc_profile = img.info.get("icc_profile")
+        self.size = img.size
+        self.orientation = self._read_orientation()
+
+        self._views: Dict[str, Image.Image] = {}
+
+    @property
+    def is_png(self) -> bool:
+        """Whether the source is a PNG."""
+        return self.format.upper() == "PNG"
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the pixels and cached views."""
+        return _image_nbytes(self.img) + sum(_image_nbytes(view) for view in self._views.values())
+
+    def _read_orientation(self) -> int:
+        """EXIF orientation (1 = normal)."""
+        if not self.exif:
+            return 1
+        try:
+            exif = Image.Exif()
+            exif.load(self.exif)
+            return int(exif.get(_ORIENTATION_TAG, 1))
+        except Exception:
+            return 1
+
+    def oriented(self, mode: str = "RGB") -> Image.Image:
+        """
+        Orientation-corrected view in the given mode, computed once.
+
+        Args:
+            mode: Target mode
+
+        Returns:
+            PIL Image (shared, read-only)
+        """
+        view = self._views.get(mode)
+        if view is None:
+            view = self.img if self.img.mode == mode else self.img.convert(mode)
+            method = _ORIENTATION_TRANSPOSE.get(self.orientation)
+            if method is not None:
+                view = view.transpose(method)
+            self._views[mode] = view
+            _evict()
+        return view
+
+    def decoded(self) -> DecodedImage:
+        """
+        DecodedImage backed by the shared source pixels.
+
+        Returns:
+            New DecodedImage with independent container fields
+        """
+        return DecodedImage(
+            self.img,
+            self.format,
+            icc_profile=self.icc_profile,
+            exif=self.exif,
+            source=self,
+        )
+
+
+def source_digest(image_bytes: bytes) -> str:
+    """Cache key for image bytes."""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+def _evict() -> None:
+    """Drop least recently used analyses beyond the count/size limits."""
+    total = sum(source.nbytes for source in _sources.values())
+    while len(_sources) > 1 and (len(_sources) > SOURCE_CACHE_SIZE or total > SOURCE_CACHE_MAX_BYTES):
+        _, source = _sources.popitem(last=False)
+        total -= source.nbytes
+
+
+def get_source(image_bytes: bytes) -> SourceAnalysis:
+    """
+    Get the analysis for image bytes, decoding them on a cache miss.
+
+    Args:
+        image_bytes: Original image bytes
+
+    Returns:
+        SourceAnalysis (shared, read-only)
+    """
+    key = source_digest(image_bytes)
+    source = _sources.get(key)
+    if source is not None:
+        _sources.move_to_end(key)
+        return source
+
+    source = SourceAnalysis(image_bytes, digest=key)
+    _sources[key] = source
+    _evict()
+    return source
+
+
+def clear_sources() -> None:
+    """Drop all cached analyses."""
+    _sources.clear()
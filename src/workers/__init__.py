@@ -0,0 +1,14 @@
+"""
+Background execution package.
+"""
+
+from .pool import WorkerPool, get_worker_pool, shutdown_worker_pool
+from .scheduler import JobScheduler, get_scheduler
+
+__all__ = [
+    "WorkerPool",
+    "get_worker_pool",
+    "shutdown_worker_pool",
+    "JobScheduler",
+    "get_scheduler",
+]
@@ -0,0 +1,419 @@
+"""
+Process pool for CPU-bound uniqueization jobs.
+
+Handlers await jobs here instead of calling uniqueizers directly, so the
+asyncio event loop keeps serving other users while images are processed.
+
+Jobs report progress events (see src.utils.progress) keyed by their
+cancel token path; a reader thread forwards them to the event loop.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import random
+import secrets
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import WORKER_POOL_SIZE, WORKER_MAX_TASKS_PER_CHILD, VARIANT_CHUNK_SIZE
+from src.utils.cancellation import JobCancelled, cancel_scope, is_cancelled
+from src.utils.progress import ProgressEvent, get_progress_hub, init_worker, progress_scope, report_copy
+
+logger = logging.getLogger(__name__)
+
+# Methods whose variants are independent of each other, so process_variants
+# can be split across workers (method2/method3 plan formats/mirroring over
+# the whole set and must run as a single job)
+PARALLEL_VARIANT_METHODS = {"lsb", "all_combined", "all_combined_with_pixel"}
+
+
+# ============================================================================
+# Job functions (run inside worker processes)
+# ============================================================================
+
+# Uniqueizer instances cached per worker process
+_worker_uniqueizers: Dict[str, Any] = {}
+
+
+def _get_worker_uniqueizer(method_str: str):
+    """Get (or create) the uniqueizer for a method inside a worker."""
+    uniqueizer = _worker_uniqueizers.get(method_str)
+    if uniqueizer is None:
+        from src.uniqueizers import UniqueizationMethod, get_uniqueizer
+        uniqueizer = get_uniqueizer(UniqueizationMethod(method_str))
+        _worker_uniqueizers[method_str] = uniqueizer
+    return uniqueizer
+
+
+def _seed_worker_random(seed: int) -> None:
+    """Give this job its own random stream (stdlib and NumPy)."""
+    random.seed(seed)
+    try:
+        import numpy as np
+        np.random.seed(seed % (2 ** 32))
+    except ImportError:
+        pass
+
+
+@contextmanager
+def _job_scope(cancel_path: Optional[str]) -> Iterator[None]:
+    """Install a request's cancel token and progress key in this worker."""
+    with cancel_scope(cancel_path), progress_scope(cancel_path):
+        yield
+
+
+def process_job(method_str: str, image_bytes: bytes, cancel_path: Optional[str] = None) -> Optional[bytes]:
+    """
+    Run uniqueizer.process() for a method.
+
+    Args:
+        method_str: Uniqueization method key
+        image_bytes: Original image bytes
+        cancel_path: CancelToken.path of the request (None = not cancellable)
+
+    Returns:
+        Processed image bytes (None if the request was cancelled)
+    """
+    with _job_scope(cancel_path):
+        try:
+            result = _get_worker_uniqueizer(method_str).process(image_bytes)
+        except JobCancelled:
+            return None
+        report_copy()
+        return result
+
+
+def process_variants_job(
+    method_str: str, image_bytes: bytes, count: int, cancel_path: Optional[str] = None
+) -> List[bytes]:
+    """
+    Run uniqueizer.process_variants() for a method.
+
+    Args:
+        method_str: Uniqueization method key
+        image_bytes: Original image bytes
+        count: Number of variants
+        cancel_path: CancelToken.path of the request (None = not cancellable)
+
+    Returns:
+        List of processed image bytes (empty if the request was cancelled)
+    """
+    with _job_scope(cancel_path):
+        try:
+            variants = _get_worker_uniqueizer(method_str).process_variants(image_bytes, count=count)
+        except JobCancelled:
+            return []
+        report_copy(len(variants))
+        return variants
+
+
+def process_variants_chunk_job(
+    method_str: str, image_bytes: bytes, count: int, seed: int, cancel_path: Optional[str] = None
+) -> List[bytes]:
+    """
+    Generate one chunk of variants with an independent random stream.
+
+    Variants are generated one at a time, so a cancelled request still
+    returns the variants finished before it was cancelled.
+
+    Args:
+        method_str: Uniqueization method key
+        image_bytes: Original image bytes
+        count: Number of variants in this chunk
+        seed: Random seed for this chunk
+        cancel_path: CancelToken.path of the request (None = not cancellable)
+
+    Returns:
+        List of processed image bytes
+    """
+    _seed_worker_random(seed)
+    uniqueizer = _get_worker_uniqueizer(method_str)
+    variants = []
+    with _job_scope(cancel_path):
+        for _ in range(count):
+            if is_cancelled():
+                break
+            try:
+                variants.extend(uniqueizer.process_variants(image_bytes, count=1))
+            except JobCancelled:
+                break
+            report_copy()
+    return variants
+
+
+def score_copies_job(method_str: str, image_bytes: bytes, copies: List[bytes], fast: bool) -> List[Any]:
+    """
+    Score copies against the original with the quality gate.
+
+    Args:
+        method_str: Uniqueization method key (decides whether SSIM applies)
+        image_bytes: Original image bytes
+        copies: Copy bytes
+        fast: Score at reduced resolution
+
+    Returns:
+        List of QualityScore, in order
+    """
+    from src.utils.quality import QualityGate
+    uniqueizer = _get_worker_uniqueizer(method_str)
+    gate = QualityGate(image_bytes, fast=fast, check_ssim=uniqueizer.preserves_geometry)
+    return gate.score_batch(copies)
+
+
+def split_count(count: int, parts: int) -> List[int]:
+    """
+    Split count into at most `parts` near-equal positive chunk sizes.
+
+    Args:
+        count: Total number of items
+        parts: Maximum number of chunks
+
+    Returns:
+        Chunk sizes (sum == count)
+    """
+    parts = max(1, min(count, parts))
+    base, extra = divmod(count, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+# ============================================================================
+# Pool
+# ============================================================================
+
+class WorkerPool:
+    """
+    Process pool that runs uniqueization jobs off the event loop.
+
+    Workers are started with the "spawn" method so each one gets its own
+    random state, and are recycled after a configurable number of jobs to
+    bound memory growth from large images.
+
+    Workers share one progress event queue with the pool, which outlives
+    executor restarts; a daemon thread publishes its events to the
+    progress hub on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = WORKER_POOL_SIZE,
+        max_tasks_per_child: Optional[int] = WORKER_MAX_TASKS_PER_CHILD,
+    ):
+        """
+        Initialize worker pool.
+
+        Args:
+            max_workers: Number of worker processes
+            max_tasks_per_child: Jobs per worker before it is replaced
+                (None or 0 = never recycle)
+        """
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._events = None
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Create the executor (idempotent)."""
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        if self._executor is not None:
+            return
+        context = multiprocessing.get_context("spawn")
+        if self._events is None:
+            self._events = context.SimpleQueue()
+            self._reader = threading.Thread(
+                target=self._forward_events, args=(self._events,), name="progress-events", daemon=True
+            )
+            self._reader.start()
+        kwargs = {}
+        if sys.version_info >= (3, 11):
+            # Worker recycling needs Python 3.11+; older versions never recycle
+            kwargs["max_tasks_per_child"] = self.max_tasks_per_child
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(self._events,),
+            **kwargs,
+        )
+        logger.info(
+            "Worker pool started: %d workers, recycle after %s jobs",
+            self.max_workers, kwargs.get("max_tasks_per_child") or "no",
+        )
+
+    def _forward_events(self, events) -> None:
+        """Reader thread: publish worker progress events on the event loop."""
+        hub = get_progress_hub()
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                continue
+            try:
+                loop.call_soon_threadsafe(hub.publish, ProgressEvent(*item))
+            except RuntimeError:
+                # Loop closed between the check and the call
+                pass
+
+    def _stop_executor(self, wait: bool) -> None:
+        """Stop the executor, cancelling jobs that haven't started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the executor and the progress event reader.
+
+        Args:
+            wait: Block until running jobs finish
+        """
+        if self._executor is None and self._events is None:
+            return
+        self._stop_executor(wait)
+        if self._events is not None:
+            self._events.put(None)
+            if wait and self._reader is not None:
+                self._reader.join(timeout=5)
+            self._events = None
+            self._reader = None
+        logger.info("Worker pool stopped")
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run a picklable function in a worker process.
+
+        If a worker dies (e.g. killed for memory), the broken executor is
+        replaced and the job is retried once. Every job running on it fails
+        at the same time; only the first one to notice replaces it, the
+        others retry on the replacement.
+
+        Args:
+            func: Module-level function
+            *args: Function arguments
+
+        Returns:
+            Function result
+        """
+        loop = asyncio.get_running_loop()
+        self.start()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, partial(func, *args))
+        except BrokenProcessPool:
+            if self._executor is executor:
+                logger.warning("Worker pool broken, restarting and retrying job")
+                self._stop_executor(wait=False)
+            self.start()
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def process(self, method_str: str, image_bytes: bytes, cancel_path: Optional[str] = None) -> Optional[bytes]:
+        """Process one copy in a worker (None if cancelled via cancel_path)."""
+        return await self.run(process_job, method_str, image_bytes, cancel_path)
+
+    async def iter_variants(
+        self, method_str: str, image_bytes: bytes, count: int, cancel_path: Optional[str] = None
+    ) -> AsyncIterator[Tuple[List[bytes], float]]:
+        """
+        Generate variants in chunks, yielding chunks in request order.
+
+        For methods with independent variants the request is split into
+        chunks of at most VARIANT_CHUNK_SIZE (and at least one per worker).
+        All chunks run concurrently and each is yielded once it and every
+        chunk before it are done, so callers can consume early chunks while
+        later ones are running and the variants come back in order.
+        Other methods yield a single chunk. Chunks that have not finished
+        when the iterator is closed are cancelled.
+
+        When the token at cancel_path is cancelled, running chunks stop
+        between stages and return what they finished (possibly nothing).
+
+        Args:
+            method_str: Uniqueization method key
+            image_bytes: Original image bytes
+            count: Number of variants
+            cancel_path: CancelToken.path of the request (None = not cancellable)
+
+        Yields:
+            (variants, seconds since the request started)
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        if method_str not in PARALLEL_VARIANT_METHODS or count < 2:
+            variants = await self.run(process_variants_job, method_str, image_bytes, count, cancel_path)
+            yield variants, loop.time() - started
+            return
+
+        parts = max(self.max_workers, -(-count // VARIANT_CHUNK_SIZE))
+        tasks = [
+            asyncio.ensure_future(
+                self.run(process_variants_chunk_job, method_str, image_bytes, size, secrets.randbits(64), cancel_path)
+            )
+            for size in split_count(count, parts)
+        ]
+        try:
+            for task in tasks:
+                variants = await task
+                yield variants, loop.time() - started
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def score_copies(self, method_str: str, image_bytes: bytes, copies: List[bytes], fast: bool = True) -> List[Any]:
+        """
+        Score copies with the quality gate, split across workers.
+
+        Each chunk analyzes the original once and scores its copies
+        against the cached statistics.
+
+        Args:
+            method_str: Uniqueization method key
+            image_bytes: Original image bytes
+            copies: Copy bytes
+            fast: Score at reduced resolution
+
+        Returns:
+            List of QualityScore, in order
+        """
+        if not copies:
+            return []
+        chunks, start = [], 0
+        for size in split_count(len(copies), self.max_workers):
+            chunks.append(copies[start:start + size])
+            start += size
+        results = await asyncio.gather(*[
+            self.run(score_copies_job, method_str, image_bytes, chunk, fast)
+            for chunk in chunks
+        ])
+        return [score for chunk in results for score in chunk]
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> WorkerPool:
+    """Get the shared worker pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool()
+    return _pool
+
+
+def shutdown_worker_pool(wait: bool = True) -> None:
+    """Shut down the shared worker pool if it was started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait)
+        _pool = None
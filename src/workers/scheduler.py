@@ -0,0 +1,264 @@
+"""
+Fair admission control for processing requests.
+
+Every request (one image x N copies, or an album) is submitted as a job.
+Jobs are admitted by weighted fair queuing across users:
+
+- A job's cost is its method weight (METHOD_COSTS) times the number of
+  images it produces, so one all_combined_with_pixel x100 request counts
+  as much as many small metadata requests.
+- Each user's jobs get virtual start/finish tags (start-time fair
+  queuing); the queued job with the smallest finish tag is admitted next,
+  so a user with a long backlog can't starve others.
+- At most SCHEDULER_MAX_JOBS jobs run at once, and at most
+  SCHEDULER_MAX_JOBS_PER_USER per user.
+
+Waiting jobs are told their queue position when it changes, at most once
+per PROGRESS_EDIT_INTERVAL each (every job start moves every waiter up, and
+each report is a Telegram message edit).
+
+Handlers submit() jobs and return, so the update loop keeps serving other
+users (and their queue positions) while jobs wait.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from src.config import (
+    SCHEDULER_MAX_JOBS,
+    SCHEDULER_MAX_JOBS_PER_USER,
+    METHOD_COSTS,
+    DEFAULT_METHOD_COST,
+    PROGRESS_EDIT_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Job:
+    """A submitted job waiting for (or holding) a slot."""
+
+    __slots__ = ("user_id", "cost", "start_tag", "finish_tag", "seq", "position", "started", "changed")
+
+    def __init__(self, user_id: int, cost: float, start_tag: float, seq: int):
+        self.user_id = user_id
+        self.cost = cost
+        self.start_tag = start_tag
+        self.finish_tag = start_tag + cost
+        self.seq = seq
+        self.position = 0
+        self.started = False
+        self.changed = asyncio.Event()
+
+
+class JobScheduler:
+    """
+    Weighted fair queue with global and per-user concurrency caps.
+
+    Example:
+        scheduler = get_scheduler()
+        scheduler.submit(
+            user_id, scheduler.cost("all_combined", 10), lambda: generate(...),
+        )
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = SCHEDULER_MAX_JOBS,
+        max_jobs_per_user: int = SCHEDULER_MAX_JOBS_PER_USER,
+        costs: Optional[Dict[str, float]] = None,
+        position_interval: float = PROGRESS_EDIT_INTERVAL,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_jobs: Jobs running at once across all users
+            max_jobs_per_user: Jobs running at once per user
+            costs: Cost weight per method (default METHOD_COSTS)
+            position_interval: Minimum seconds between queue position
+                reports of one job
+        """
+        self.max_jobs = max(1, max_jobs)
+        self.max_jobs_per_user = max(1, max_jobs_per_user)
+        self.costs = METHOD_COSTS if costs is None else costs
+        self.position_interval = position_interval
+
+        self._queue: List[_Job] = []
+        self._running: Dict[int, int] = {}
+        self._last_finish: Dict[int, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._tasks = set()
+
+        self.completed = 0
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a slot."""
+        return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        """Jobs holding a slot."""
+        return sum(self._running.values())
+
+    def cost(self, method_str: str, count: int = 1) -> float:
+        """
+        Cost of producing `count` images with a method.
+
+        Args:
+            method_str: Uniqueization method key
+            count: Number of images
+
+        Returns:
+            Job cost
+        """
+        return self.costs.get(method_str, DEFAULT_METHOD_COST) * max(1, count)
+
+    def submit(
+        self,
+        user_id: int,
+        cost: float,
+        func: Callable[[], Awaitable[T]],
+        on_position: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> "asyncio.Task[T]":
+        """
+        Queue a job in the background (see run()).
+
+        Returns:
+            Task running the job; failures are logged
+        """
+        task = asyncio.create_task(self.run(user_id, cost, func, on_position))
+        self._tasks.add(task)
+        task.add_done_callback(self._job_done)
+        return task
+
+    def _job_done(self, task: asyncio.Task) -> None:
+        """Drop a finished background job and log its failure."""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Job failed: %s", task.exception(), exc_info=task.exception())
+
+    async def run(
+        self,
+        user_id: int,
+        cost: float,
+        func: Callable[[], Awaitable[T]],
+        on_position: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Wait for a fair slot, then run a job.
+
+        Args:
+            user_id: Submitting user
+            cost: Job cost (see cost())
+            func: Coroutine function doing the work
+            on_position: Called with the 1-based queue position while the
+                job waits (when it changes, at most once per
+                position_interval), and with 0 when it starts after having
+                waited
+
+        Returns:
+            Result of func()
+        """
+        start_tag = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+        job = _Job(user_id, cost, start_tag, next(self._seq))
+        self._last_finish[user_id] = job.finish_tag
+        self._queue.append(job)
+        self._dispatch()
+
+        loop = asyncio.get_running_loop()
+        reported = None
+        next_report = loop.time()
+        try:
+            while not job.started:
+                job.changed.clear()
+                if on_position is not None and job.position != reported:
+                    delay = next_report - loop.time()
+                    if delay <= 0:
+                        reported = job.position
+                        next_report = loop.time() + self.position_interval
+                        await self._notify(on_position, job.position)
+                        continue
+                    # Rate limited: report the latest position once allowed
+                    try:
+                        await asyncio.wait_for(job.changed.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await job.changed.wait()
+        except BaseException:
+            if job.started:
+                self._release(job)
+            else:
+                self._queue.remove(job)
+                self._forget(user_id)
+                self._dispatch()
+            raise
+
+        try:
+            if reported is not None:
+                await self._notify(on_position, 0)
+            return await func()
+        finally:
+            self._release(job)
+            self.completed += 1
+
+    async def _notify(self, on_position: Callable[[int], Awaitable[None]], position: int) -> None:
+        """Report a queue position, ignoring failures (e.g. Telegram errors)."""
+        try:
+            await on_position(position)
+        except Exception as e:
+            logger.warning("Queue position callback failed: %s", e)
+
+    def _dispatch(self) -> None:
+        """Start queued jobs while slots are free, then refresh positions."""
+        while self._queue and self.running < self.max_jobs:
+            eligible = [
+                job for job in self._queue
+                if self._running.get(job.user_id, 0) < self.max_jobs_per_user
+            ]
+            if not eligible:
+                break
+            job = min(eligible, key=lambda j: (j.finish_tag, j.seq))
+            self._queue.remove(job)
+            self._running[job.user_id] = self._running.get(job.user_id, 0) + 1
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+            job.started = True
+            job.changed.set()
+
+        for position, job in enumerate(sorted(self._queue, key=lambda j: (j.finish_tag, j.seq)), 1):
+            if job.position != position:
+                job.position = position
+                job.changed.set()
+
+    def _release(self, job: _Job) -> None:
+        """Free a job's slot and admit the next ones."""
+        remaining = self._running.get(job.user_id, 0) - 1
+        if remaining > 0:
+            self._running[job.user_id] = remaining
+        else:
+            self._running.pop(job.user_id, None)
+        self._forget(job.user_id)
+        self._dispatch()
+
+    def _forget(self, user_id: int) -> None:
+        """Drop an idle user's finish tag (their next job starts at virtual time)."""
+        if user_id not in self._running and not any(job.user_id == user_id for job in self._queue):
+            self._last_finish.pop(user_id, None)
+
+
+_scheduler: Optional[JobScheduler] = None
+
+
+def get_scheduler() -> JobScheduler:
+    """Get the shared job scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
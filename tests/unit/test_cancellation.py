@@ -0,0 +1,146 @@
+"""
+Tests for cooperative job cancellation and deadlines.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from src.handlers.photo import _enforce_quality
+from src.utils.cancellation import CancelToken, JobCancelled, cancel_scope, check_cancelled, is_cancelled
+from src.utils.quality import QualityScore
+from src.utils.session_store import Session, SessionStore
+
+
+def test_check_cancelled_raises_after_marker_is_written():
+    token = CancelToken()
+    try:
+        with cancel_scope(token.path):
+            check_cancelled()  # Not cancelled yet
+
+            token.cancel()
+            assert os.path.exists(token.path)
+            assert is_cancelled()
+            with pytest.raises(JobCancelled):
+                check_cancelled()
+
+        # Outside the scope nothing is watched
+        check_cancelled()
+    finally:
+        token.close()
+    assert not os.path.exists(token.path)
+
+
+def test_job_cancelled_passes_broad_exception_handlers():
+    token = CancelToken()
+    token.cancel("deadline")
+    try:
+        with cancel_scope(token.path), pytest.raises(JobCancelled):
+            try:
+                check_cancelled()
+            except Exception:
+                pytest.fail("JobCancelled must not be an Exception")
+    finally:
+        token.close()
+    assert token.reason == "deadline"
+
+
+def test_first_reason_is_kept_and_close_stops_signalling():
+    token = CancelToken(deadline=100.0)
+    assert token.remaining(40.0) == 60.0
+    assert token.remaining(140.0) == 0.0
+
+    token.cancel("deadline")
+    token.cancel("cancelled")
+    assert token.reason == "deadline"
+    token.close()
+
+    late = CancelToken()
+    late.close()
+    late.cancel()
+    assert late.cancelled
+    assert not os.path.exists(late.path)
+
+
+def test_replacing_a_running_session_cancels_its_token():
+    async def main():
+        store = SessionStore()
+        session = store.put(Session(1, 1, state="processing", image_bytes=b"x"))
+        token = session.cancel_token = CancelToken()
+        session.job = asyncio.create_task(asyncio.sleep(3600))
+
+        store.put(Session(1, 1, image_bytes=b"y"))
+        await asyncio.sleep(0)
+        return token, session
+
+    token, session = asyncio.run(main())
+    assert token.reason == "cancelled"
+    assert session.job is None
+    token.close()
+
+
+def test_job_discarding_its_own_session_is_not_cancelled():
+    async def main():
+        store = SessionStore()
+        session = store.put(Session(1, 1, state="processing", image_bytes=b"x"))
+        token = session.cancel_token = CancelToken()
+
+        async def job():
+            await asyncio.sleep(0)
+            store.discard(1, session)
+
+        task = session.job = asyncio.create_task(job())
+        await task
+        return token
+
+    token = asyncio.run(main())
+    assert token.reason is None
+    token.close()
+
+
+class _FailingGatePool:
+    """Pool stub whose copies all fail the quality gate."""
+
+    def __init__(self, token=None):
+        self.token = token
+        self.cancel_paths = []
+        self.scored = []
+
+    async def process(self, method_str, image_bytes, cancel_path=None):
+        self.cancel_paths.append(cancel_path)
+        if self.token is not None:
+            self.token.cancel()
+        return None
+
+    async def score_copies(self, method_str, image_bytes, copies, fast=True):
+        self.scored.append(list(copies))
+        return [QualityScore(0.5, 1.0, False, "ssim") for _ in copies]
+
+
+def test_quality_gate_stops_on_cancelled_regeneration():
+    token = CancelToken()
+    pool = _FailingGatePool(token)
+    try:
+        copies = asyncio.run(_enforce_quality(pool, "lsb", b"x", [b"a", b"b", b"c", b"d"], set(), 60.0, token))
+    finally:
+        token.close()
+
+    assert copies == [b"a", b"b", b"c", b"d"]
+    # One regeneration batch with the token's path, then no further rounds
+    assert pool.cancel_paths and set(pool.cancel_paths) == {token.path}
+    # Cancelled (None) results are never scored
+    assert pool.scored == [[b"a", b"b", b"c", b"d"]]
+
+
+def test_quality_gate_skips_regeneration_after_cancel():
+    token = CancelToken()
+    token.cancel()
+    pool = _FailingGatePool()
+    try:
+        copies = asyncio.run(_enforce_quality(pool, "lsb", b"x", [b"a"], set(), 60.0, token))
+    finally:
+        token.close()
+
+    assert copies == [b"a"]
+    assert pool.cancel_paths == []
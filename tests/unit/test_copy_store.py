@@ -0,0 +1,35 @@
+"""
+Tests for spilled copy sets and streaming them into archives.
+"""
+
+import zipfile
+
+from src.utils.archive import create_zip_archive
+from src.utils.copy_store import CopyStore
+
+
+def test_spilled_copies_stream_into_archive(tmp_path):
+    store = CopyStore(inline_max_bytes=10, spill_dir=str(tmp_path))
+    copies = store.create()
+    copies.add(b"small", "a.jpg")
+    copies.add(b"x" * 1000, "b.png")
+    copies.add(b"y" * 1000, "c.txt")
+    assert copies.memory_bytes == 5 and copies.disk_bytes == 2000
+
+    # Only the current copy is open at a time
+    files = []
+    for f, _ in copies.iter_files():
+        assert all(previous.closed for previous in files)
+        files.append(f)
+    archive = create_zip_archive(copies.iter_files())
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.namelist() == ["a.jpg", "b.png", "c.txt"]
+        assert zf.read("b.png") == b"x" * 1000
+        assert zf.read("c.txt") == b"y" * 1000
+        assert zf.getinfo("b.png").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("c.txt").compress_type == zipfile.ZIP_DEFLATED
+
+    copies.close()
+    assert store.disk_bytes == 0
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,28 @@
+"""
+Tests for DecodedImage encoding.
+"""
+
+import io
+
+from PIL import Image
+
+from src.utils.image import DecodedImage
+
+
+def test_to_bytes_leaves_shared_source_info_untouched(sample_png_bytes):
+    source = DecodedImage.from_source(sample_png_bytes)
+    info_before = dict(source.img.info)
+
+    copy = DecodedImage.from_source(sample_png_bytes)
+    copy.icc_profile = b"not-a-real-profile"
+    result = copy.to_bytes()
+
+    assert copy.img is source.img  # Pixels come from the shared cache
+    assert source.img.info == info_before
+    assert Image.open(io.BytesIO(result)).info.get("icc_profile") == b"not-a-real-profile"
+
+
+def test_to_bytes_without_icc_drops_profile(sample_png_bytes):
+    decoded = DecodedImage.from_source(sample_png_bytes)
+    decoded.icc_profile = None
+    assert "icc_profile" not in Image.open(io.BytesIO(decoded.to_bytes())).info
@@ -0,0 +1,120 @@
+"""
+Tests for JPEG segment splitting and EXIF splicing.
+"""
+
+import io
+
+import piexif
+import pytest
+from PIL import Image
+
+from src.uniqueizers.iso import ISOUUniqueizer
+from src.uniqueizers.orientation import OrientationUniqueizer
+from src.utils.jpeg_segments import (
+    APP0,
+    APP1,
+    APP13,
+    COM,
+    EXIF_HEADER,
+    get_exif,
+    join_segments,
+    replace_exif,
+    split_segments,
+)
+
+
+def _exif(software: bytes) -> bytes:
+    return piexif.dump({"0th": {piexif.ImageIFD.Software: software}})
+
+
+@pytest.fixture
+def jpeg_with_exif(sample_jpeg_bytes):
+    """JPEG with an APP1/EXIF segment."""
+    img = Image.open(io.BytesIO(sample_jpeg_bytes))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=95, exif=_exif(b"original"))
+    return buffer.getvalue()
+
+
+def _image_data(jpeg_bytes: bytes) -> bytes:
+    return split_segments(jpeg_bytes)[1]
+
+
+def test_split_join_round_trip(sample_jpeg_bytes, jpeg_with_exif):
+    for data in (sample_jpeg_bytes, jpeg_with_exif):
+        segments, tail = split_segments(data)
+        assert tail.startswith(b"\xff\xda")
+        assert join_segments(segments, tail) == data
+
+
+def test_replace_exif_without_existing_app1(sample_jpeg_bytes):
+    assert get_exif(sample_jpeg_bytes) == b""
+
+    result = replace_exif(sample_jpeg_bytes, _exif(b"new"))
+
+    segments, tail = split_segments(result)
+    assert tail == _image_data(sample_jpeg_bytes)
+    # Inserted after the JFIF APP0 segment
+    assert segments[0][0] == APP0
+    assert segments[1][0] == APP1
+    assert piexif.load(get_exif(result))["0th"][piexif.ImageIFD.Software] == b"new"
+
+
+def test_replace_exif_replaces_existing_app1(jpeg_with_exif):
+    result = replace_exif(jpeg_with_exif, _exif(b"replaced")[len(EXIF_HEADER):])
+
+    segments, tail = split_segments(result)
+    assert tail == _image_data(jpeg_with_exif)
+    exif_segments = [payload for marker, payload in segments if marker == APP1]
+    assert len(exif_segments) == 1
+    assert piexif.load(exif_segments[0])["0th"][piexif.ImageIFD.Software] == b"replaced"
+    assert Image.open(io.BytesIO(result)).size == (100, 100)
+
+
+@pytest.fixture
+def jpeg_with_metadata(jpeg_with_exif):
+    """JPEG with EXIF plus XMP, IPTC and comment segments."""
+    segments, tail = split_segments(jpeg_with_exif)
+    segments[1:1] = [
+        (APP1, b"http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>"),
+        (APP13, b"Photoshop 3.0\x008BIM"),
+        (COM, b"original comment"),
+    ]
+    return join_segments(segments, tail)
+
+
+def test_replace_exif_strips_source_metadata(jpeg_with_metadata):
+    result = replace_exif(jpeg_with_metadata, _exif(b"new"))
+
+    segments, tail = split_segments(result)
+    assert tail == _image_data(jpeg_with_metadata)
+    assert [marker for marker, _ in segments].count(APP1) == 1
+    assert not any(marker in (APP13, COM) for marker, _ in segments)
+    assert b"xmpmeta" not in result and b"original comment" not in result
+
+
+def test_replace_exif_can_keep_other_segments(jpeg_with_metadata):
+    result = replace_exif(jpeg_with_metadata, _exif(b"new"), strip_markers=())
+
+    markers = [marker for marker, _ in split_segments(result)[0]]
+    assert markers.count(APP1) == 2
+    assert APP13 in markers and COM in markers
+
+
+@pytest.mark.parametrize("uniqueizer_cls", [ISOUUniqueizer, OrientationUniqueizer])
+def test_exif_uniqueizers_drop_source_metadata(jpeg_with_metadata, uniqueizer_cls):
+    result = uniqueizer_cls().process(jpeg_with_metadata)
+
+    assert _image_data(result) == _image_data(jpeg_with_metadata)
+    assert b"xmpmeta" not in result and b"original comment" not in result
+
+
+@pytest.mark.parametrize("cut", [3, 5, 20])
+def test_truncated_input_raises(sample_jpeg_bytes, cut):
+    with pytest.raises(ValueError):
+        split_segments(sample_jpeg_bytes[:cut])
+
+
+def test_not_a_jpeg_raises(sample_png_bytes):
+    with pytest.raises(ValueError):
+        split_segments(sample_png_bytes)
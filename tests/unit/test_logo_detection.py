@@ -0,0 +1,44 @@
+"""
+Tests for the logo detection memo.
+"""
+
+import numpy as np
+from PIL import Image
+
+from src.utils import logo_detection
+
+
+def _striped(text_row: int) -> Image.Image:
+    """Sharp-edged image; text_row moves a thin dark line (invisible at 16x16)."""
+    arr = np.zeros((256, 256), dtype=np.uint8)
+    arr[:, ::4] = 255
+    arr[text_row, :] = 0
+    return Image.fromarray(arr).convert("RGB")
+
+
+def test_lookalike_images_do_not_share_result(monkeypatch):
+    calls = []
+
+    def fake_ocr(img):
+        calls.append(img)
+        return len(calls) == 1
+
+    monkeypatch.setattr(logo_detection, "_run_ocr", fake_ocr)
+    monkeypatch.setattr(logo_detection, "_results", type(logo_detection._results)())
+
+    assert logo_detection.detect_text(_striped(10)) is True
+    assert logo_detection.detect_text(_striped(11)) is False
+    assert len(calls) == 2
+
+
+def test_memo_by_key(monkeypatch):
+    calls = []
+    monkeypatch.setattr(logo_detection, "_run_ocr", lambda img: calls.append(img) or True)
+    monkeypatch.setattr(logo_detection, "_results", type(logo_detection._results)())
+
+    img = _striped(10)
+    assert logo_detection.detect_text(img, key="source-a")
+    assert logo_detection.detect_text(img, key="source-a")
+    assert len(calls) == 1
+    logo_detection.detect_text(img, key="source-b")
+    assert len(calls) == 2
@@ -0,0 +1,52 @@
+"""
+Tests for the LSB uniqueizer across image modes.
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.uniqueizers.lsb import LSBUniqueizer
+
+
+def _png(mode: str) -> bytes:
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 256, (60, 80, 3), dtype=np.uint8))
+    if mode == "P":
+        img = img.quantize(64)
+    elif mode == "RGBA":
+        img = img.convert("RGBA")
+        img.putalpha(128)
+    else:
+        img = img.convert(mode)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("mode", ["1", "L", "P", "RGBA"])
+def test_process_keeps_mode_and_changes_few_pixels(mode):
+    data = _png(mode)
+    source = Image.open(io.BytesIO(data))
+
+    result = LSBUniqueizer(modification_percent=5.0).process(data)
+
+    output = Image.open(io.BytesIO(result))
+    assert output.mode == mode
+    assert output.size == source.size
+    before, after = np.asarray(source), np.asarray(output)
+    changed = np.any(before != after, axis=-1) if before.ndim == 3 else before != after
+    assert 0 < changed.mean() <= 0.06
+    if mode == "RGBA":
+        assert np.array_equal(before[..., 3], after[..., 3])
+
+
+@pytest.mark.parametrize("mode", ["1", "L", "P", "RGBA"])
+def test_variants_are_distinct(mode):
+    data = _png(mode)
+    variants = LSBUniqueizer().process_variants(data, count=3)
+
+    assert len(set(variants)) == 3
+    assert data not in variants
@@ -0,0 +1,84 @@
+"""
+Tests for PNG chunk rewriting.
+"""
+
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from src.utils.png_chunks import (
+    PNG_SIGNATURE,
+    join_chunks,
+    make_iccp_chunk,
+    make_phys_chunk,
+    make_text_chunk,
+    replace_chunks,
+    split_chunks,
+)
+
+
+@pytest.fixture
+def png_with_srgb(sample_png_bytes):
+    """PNG with an sRGB chunk and a text chunk."""
+    chunks = split_chunks(sample_png_bytes)
+    extra = [(b"sRGB", b"\x00"), make_text_chunk("Comment", "original")]
+    return join_chunks(chunks[:1] + extra + chunks[1:])
+
+
+def _raw_chunks(png_bytes: bytes):
+    """(type, data, crc) triples read without CRC verification."""
+    pos = len(PNG_SIGNATURE)
+    while pos < len(png_bytes):
+        length, chunk_type = struct.unpack(">I4s", png_bytes[pos:pos + 8])
+        data = png_bytes[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", png_bytes[pos + 8 + length:pos + 12 + length])
+        yield chunk_type, data, crc
+        pos += 12 + length
+
+
+def test_split_join_round_trip(sample_png_bytes, png_with_srgb):
+    for data in (sample_png_bytes, png_with_srgb):
+        assert join_chunks(split_chunks(data)) == data
+
+
+def test_replace_chunks_writes_valid_crcs(png_with_srgb):
+    result = replace_chunks(png_with_srgb, [make_phys_chunk(300, 300), make_text_chunk("Comment", "new")])
+
+    for chunk_type, data, crc in _raw_chunks(result):
+        assert zlib.crc32(chunk_type + data) == crc
+    Image.open(io.BytesIO(result)).load()
+
+
+def test_replace_chunks_order(png_with_srgb):
+    result = replace_chunks(png_with_srgb, [make_phys_chunk(300, 300), make_text_chunk("Comment", "new")])
+
+    types = [chunk_type for chunk_type, _ in split_chunks(result)]
+    assert types[0] == b"IHDR"
+    assert types[-1] == b"IEND"
+    assert types.index(b"pHYs") < types.index(b"IDAT")
+    assert types.count(b"pHYs") == 1
+    # The old text chunk with the same keyword is replaced
+    texts = [data for chunk_type, data in split_chunks(result) if chunk_type == b"tEXt"]
+    assert texts == [b"Comment\x00new"]
+    # Image data is copied through unchanged
+    idat = [data for chunk_type, data in split_chunks(png_with_srgb) if chunk_type == b"IDAT"]
+    assert [data for chunk_type, data in split_chunks(result) if chunk_type == b"IDAT"] == idat
+
+
+def test_iccp_drops_srgb(png_with_srgb):
+    result = replace_chunks(png_with_srgb, [make_iccp_chunk(b"\x00" * 128)])
+
+    types = [chunk_type for chunk_type, _ in split_chunks(result)]
+    assert b"iCCP" in types
+    assert b"sRGB" not in types
+    assert types.index(b"iCCP") < types.index(b"IDAT")
+
+
+def test_corrupt_crc_raises(sample_png_bytes):
+    data = bytearray(sample_png_bytes)
+    data[len(PNG_SIGNATURE) + 10] ^= 0xFF  # Inside IHDR data
+    with pytest.raises(ValueError):
+        split_chunks(bytes(data))
@@ -0,0 +1,40 @@
+"""
+Tests for the worker pool's variant chunking.
+"""
+
+import asyncio
+
+from src.workers import pool as pool_module
+from src.workers.pool import WorkerPool, split_count
+
+
+def test_split_count_is_balanced():
+    assert split_count(10, 3) == [4, 3, 3]
+    assert split_count(2, 4) == [1, 1]
+    assert sum(split_count(101, 7)) == 101
+
+
+def test_iter_variants_yields_chunks_in_order_while_running_concurrently(monkeypatch):
+    monkeypatch.setattr(pool_module, "VARIANT_CHUNK_SIZE", 2)
+    pool = WorkerPool(max_workers=3)
+    started = []
+
+    async def fake_run(func, method_str, image_bytes, size, seed, cancel_path):
+        index = len(started)
+        started.append(index)
+        # Later chunks finish first
+        await asyncio.sleep(0.01 * (3 - index))
+        return ["{}-{}".format(index, i) for i in range(size)]
+
+    monkeypatch.setattr(pool, "run", fake_run)
+
+    async def main():
+        chunks = []
+        async for variants, _ in pool.iter_variants("lsb", b"x", 6):
+            # Every chunk was submitted before the first one is yielded
+            assert len(started) == 3
+            chunks.append(variants)
+        return chunks
+
+    chunks = asyncio.run(main())
+    assert chunks == [["0-0", "0-1"], ["1-0", "1-1"], ["2-0", "2-1"]]
@@ -0,0 +1,28 @@
+"""
+Tests for the resolution uniqueizer.
+"""
+
+import pytest
+
+from src.uniqueizers.resolution import ResolutionUniqueizer
+from src.utils.png_chunks import join_chunks, make_phys_chunk, split_chunks
+
+
+@pytest.mark.parametrize("dpi", ResolutionUniqueizer.RESOLUTIONS)
+def test_png_output_differs_from_source_phys(sample_png_bytes, dpi):
+    chunks = split_chunks(sample_png_bytes)
+    source = join_chunks(chunks[:1] + [make_phys_chunk(dpi, dpi)] + chunks[1:])
+
+    uniqueizer = ResolutionUniqueizer()
+    for _ in range(20):
+        result = uniqueizer.process(source)
+        assert result != source
+        assert [data for chunk_type, data in split_chunks(result) if chunk_type == b"IDAT"] == \
+            [data for chunk_type, data in chunks if chunk_type == b"IDAT"]
+
+
+def test_jpeg_output_differs_from_source(sample_jpeg_bytes):
+    uniqueizer = ResolutionUniqueizer()
+    first = uniqueizer.process(sample_jpeg_bytes)
+    for _ in range(20):
+        assert uniqueizer.process(first) != first
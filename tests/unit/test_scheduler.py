@@ -0,0 +1,140 @@
+"""
+Tests for the fair job scheduler.
+"""
+
+import asyncio
+
+from src.workers.scheduler import JobScheduler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _settle():
+    """Let all ready tasks run until they block."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_backlog_does_not_starve_other_users():
+    async def main():
+        scheduler = JobScheduler(max_jobs=1, max_jobs_per_user=1, position_interval=0)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name):
+            order.append(name)
+            await gate.wait()
+
+        tasks = [scheduler.submit(1, 1, lambda i=i: job("a{}".format(i))) for i in range(5)]
+        await _settle()
+        tasks.append(scheduler.submit(2, 1, lambda: job("b0")))
+        await _settle()
+
+        gate.set()
+        await asyncio.gather(*tasks)
+        return order
+
+    order = _run(main())
+    # User 2 runs right after user 1's job that was already running
+    assert order[:2] == ["a0", "b0"]
+    assert sorted(order) == ["a0", "a1", "a2", "a3", "a4", "b0"]
+
+
+def test_caps_are_never_exceeded():
+    async def main():
+        scheduler = JobScheduler(max_jobs=3, max_jobs_per_user=2, position_interval=0)
+        running = {}
+        peaks = {"total": 0, "user": 0}
+
+        async def job(user_id, duration):
+            running[user_id] = running.get(user_id, 0) + 1
+            peaks["total"] = max(peaks["total"], sum(running.values()))
+            peaks["user"] = max(peaks["user"], running[user_id])
+            await asyncio.sleep(duration)
+            running[user_id] -= 1
+
+        tasks = [
+            scheduler.submit(user_id, 1 + i % 3, lambda u=user_id, i=i: job(u, 0.001 * (i % 4)))
+            for i in range(10)
+            for user_id in (1, 2, 3, 4)
+        ]
+        await asyncio.gather(*tasks)
+        return scheduler, peaks
+
+    scheduler, peaks = _run(main())
+    assert peaks["total"] == 3
+    assert peaks["user"] <= 2
+    assert scheduler.completed == 40
+    assert scheduler.queued == 0 and scheduler.running == 0
+
+
+def test_cancelled_waiter_is_removed_from_queue():
+    async def main():
+        scheduler = JobScheduler(max_jobs=1, max_jobs_per_user=1, position_interval=0)
+        gate = asyncio.Event()
+        ran = []
+
+        async def job(name):
+            ran.append(name)
+            await gate.wait()
+
+        first = scheduler.submit(1, 1, lambda: job("first"))
+        waiter = scheduler.submit(2, 1, lambda: job("cancelled"))
+        last = scheduler.submit(3, 1, lambda: job("last"))
+        await _settle()
+        assert scheduler.queued == 2
+
+        waiter.cancel()
+        await _settle()
+        assert scheduler.queued == 1
+
+        gate.set()
+        await asyncio.gather(first, last)
+        return scheduler, ran, waiter
+
+    scheduler, ran, waiter = _run(main())
+    assert waiter.cancelled()
+    assert ran == ["first", "last"]
+    assert scheduler.queued == 0 and scheduler.running == 0
+
+
+def test_positions_are_reported_until_start():
+    async def main():
+        scheduler = JobScheduler(max_jobs=1, max_jobs_per_user=1, position_interval=0)
+        gates = [asyncio.Event() for _ in range(4)]
+        positions = []
+
+        async def report(position):
+            positions.append(position)
+
+        tasks = [scheduler.submit(user_id, 1, gates[user_id].wait) for user_id in (0, 1, 2)]
+        tasks.append(scheduler.submit(3, 1, gates[3].wait, on_position=report))
+        for gate in gates:
+            await _settle()
+            gate.set()
+        await asyncio.gather(*tasks)
+        return positions
+
+    assert _run(main()) == [3, 2, 1, 0]
+
+
+def test_position_reports_are_rate_limited():
+    async def main():
+        scheduler = JobScheduler(max_jobs=1, max_jobs_per_user=1, position_interval=3600)
+        positions = []
+
+        async def report(position):
+            positions.append(position)
+
+        async def job():
+            await asyncio.sleep(0)
+
+        tasks = [scheduler.submit(user_id, 1, job) for user_id in range(1, 11)]
+        tasks.append(scheduler.submit(99, 1, job, on_position=report))
+        await asyncio.gather(*tasks)
+        return positions
+
+    # First position, then nothing until the start notification
+    assert _run(main()) == [10, 0]
@@ -0,0 +1,113 @@
+"""
+Tests for the bounded session store.
+"""
+
+import time
+
+import pytest
+
+from src.utils.copy_store import QuotaExceededError
+from src.utils.session_store import Session, SessionStore
+
+
+def _session(user_id: int, size: int = 10, state: str = "method_select") -> Session:
+    return Session(user_id, chat_id=user_id, state=state, image_bytes=b"x" * size)
+
+
+def test_sweep_expires_idle_sessions_after_ttl():
+    store = SessionStore(ttl=60)
+    old = store.put(_session(1))
+    new = store.put(_session(2))
+    short = store.put(_session(3))
+    short.ttl = 5
+    now = time.monotonic()
+    old.touched_at = now - 61
+    new.touched_at = now - 30
+    short.touched_at = now - 6
+
+    expired = store.sweep(now=now)
+
+    assert set(expired) == {old, short}
+    assert 1 not in store and 3 not in store
+    assert store.get(2) is new
+    assert store.expired == 2
+
+
+def test_sweep_skips_active_sessions():
+    store = SessionStore(ttl=60)
+    session = store.put(_session(1, state="processing"))
+    session.touched_at -= 3600
+
+    assert store.sweep() == []
+    assert store.get(1) is session
+
+
+def test_get_refreshes_ttl():
+    store = SessionStore(ttl=60)
+    session = store.put(_session(1))
+    session.touched_at -= 50
+    store.get(1)
+
+    assert store.sweep(now=time.monotonic() + 30) == []
+
+
+def test_eviction_is_least_recently_used_first():
+    store = SessionStore(max_bytes=30)
+    first = store.put(_session(1))
+    store.put(_session(2))
+    store.put(_session(3))
+    store.get(1)  # User 2 is now least recently used
+
+    store.put(_session(4))
+
+    assert 2 not in store
+    assert 1 in store and 3 in store and 4 in store
+    assert store.evicted == 1
+    assert first.image_bytes is not None
+
+
+def test_eviction_skips_active_sessions():
+    store = SessionStore(max_bytes=30)
+    active = store.put(_session(1, state="processing"))
+    store.put(_session(2))
+    store.put(_session(3))
+
+    store.put(_session(4))
+
+    assert 1 in store and 2 not in store
+    assert active.image_bytes is not None
+
+
+def test_put_rejects_session_over_user_quota():
+    store = SessionStore(user_max_bytes=100)
+    previous = store.put(_session(1))
+    too_large = _session(1, size=101)
+
+    with pytest.raises(QuotaExceededError):
+        store.put(too_large)
+
+    assert too_large.image_bytes is None
+    # The user's previous session is left in place
+    assert store.get(1) is previous
+
+
+def test_put_replaces_and_releases_previous_session():
+    store = SessionStore()
+    old = store.put(_session(1))
+    new = store.put(_session(1))
+
+    assert store.get(1) is new
+    assert old.image_bytes is None
+
+
+def test_discard_leaves_newer_session_alone():
+    store = SessionStore()
+    old = store.put(_session(1))
+    new = store.put(_session(1))
+
+    store.discard(1, old)
+    assert store.get(1) is new
+
+    store.discard(1, new)
+    assert 1 not in store
+    assert new.image_bytes is None